@@ -1,19 +1,297 @@
+import asyncio
+import contextlib
+import json
+import logging
 import os
+import tempfile
+import threading
+import time
+import weakref
+from pathlib import Path
 
-import requests
+from cachetools import LRUCache, TTLCache
 
 import constants
+from scouting_backend.timing import timed
+
+logger = logging.getLogger(__name__)
 
 TEAM_KEY = "frc2073"
 YEAR = str(constants.CONST_YEAR)
 X_TBA_Auth_Key = os.environ.get("X_TBA_AUTH_KEY")
 
+TBA_BASE_URL = os.environ.get("TBA_BASE_URL", "https://www.thebluealliance.com/api/v3")
+# (connect, read) timeouts in seconds
+TBA_TIMEOUT = (float(os.environ.get("TBA_CONNECT_TIMEOUT", 3.05)), float(os.environ.get("TBA_READ_TIMEOUT", 10)))
+# How long a response is served without asking TBA again
+TBA_CACHE_TTL = float(os.environ.get("TBA_CACHE_TTL", 60))
+# Where responses are persisted for use when TBA cannot be reached
+TBA_CACHE_DIR = Path(os.environ.get("TBA_CACHE_DIR", Path(__file__).resolve().parent.parent / "tba_cache"))
+# Never touch the network, serve everything from TBA_CACHE_DIR
+TBA_OFFLINE = os.environ.get("TBA_OFFLINE", "False").lower() == "true"
+# Served by an ASGI server (scouting_backend/asgi.py sets it), whose event loop lives as long as the process
+DJANGO_ASGI = os.environ.get("DJANGO_ASGI", "False").lower() == "true"
+
+
+# Marks a cache miss, TBA can answer with JSON null
+_MISSING = object()
+
+
+class TBAUnavailable(Exception):
+    """TBA could not be reached and there is no stored copy of the response"""
+
+
+class TBAStore:
+    """
+    On-disk copy of TBA responses, one JSON file per API path holding the
+    data, its ETag / Last-Modified and when it was fetched.
+    """
+
+    def __init__(self, directory=TBA_CACHE_DIR):
+        self.directory = Path(directory)
+
+    def _file(self, path):
+        return self.directory / (path.strip("/").replace("/", "__") + ".json")
+
+    def load(self, path):
+        try:
+            with open(self._file(path), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, path, data, etag=None, last_modified=None):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "path": path,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+            "data": data,
+        }
+        # Write to a temp file and rename so readers never see half a file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._file(path))
+
+
+class TBAClient:
+    """
+    Blue Alliance API client sharing one pooled requests.Session, created on
+    the first request so importing this module (every worker at startup)
+    does not load requests.
+    Responses are kept in an in-process TTL cache; once an entry expires the
+    next request is conditional (If-None-Match / If-Modified-Since), so data
+    that has not changed costs a 304 instead of a full download.
+    Cached JSON is shared between callers, so treat it as read-only.
+
+    With a store, every response is also written to disk and served from there
+    when TBA is unreachable, or always when offline is set.
+    """
+
+    def __init__(self, auth_key=X_TBA_Auth_Key, base_url=TBA_BASE_URL, timeout=TBA_TIMEOUT,
+                 cache_ttl=TBA_CACHE_TTL, cache_size=256, session=None, store=None, offline=False):
+        self.auth_key = auth_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.store = store
+        self.offline = offline
+        self._session = self._configure(session) if session is not None else None
+
+        # path -> parsed JSON, fresh until the TTL runs out
+        self._fresh = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        # path -> (etag, last_modified, parsed JSON), kept past the TTL for revalidation
+        self._validators = LRUCache(maxsize=cache_size * 4)
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+
+                    self._session = self._configure(requests.Session())
+        return self._session
+
+    def _configure(self, session):
+        from requests.adapters import HTTPAdapter
+
+        session.headers.update({"X-TBA-Auth-Key": self.auth_key or ""})
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def get(self, path):
+        """GET a TBA endpoint (e.g. "/event/2025cc/teams/simple") and return its JSON"""
+        data = self._fresh_copy(path)
+        if data is not _MISSING:
+            return data
+        etag, last_modified, cached = self._validators_for(path)
+        if self.offline:
+            return self._serve_stored(path, cached, "TBA offline mode is on")
+
+        import requests
+
+        try:
+            with timed('tba'):
+                response = self.session.get(self.base_url + path,
+                                            headers=self._conditional_headers(etag, last_modified),
+                                            timeout=self.timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            return self._serve_stored(path, cached, f"TBA unreachable: {e}")
+        return self._accept(path, response, etag, last_modified, cached)
+
+    def _fresh_copy(self, path):
+        """Cached JSON for path if its TTL has not run out, else _MISSING"""
+        with self._lock:
+            return self._fresh.get(path, _MISSING)
+
+    def _validators_for(self, path):
+        """(etag, last_modified, JSON) of the last response for path, (None, None, None) if there is none"""
+        with self._lock:
+            etag, last_modified, cached = self._validators.get(path, (None, None, None))
+
+        if cached is None and self.store is not None:
+            # Cold process: revalidate against what was persisted last time
+            stored = self.store.load(path)
+            if stored is not None:
+                etag, last_modified, cached = stored["etag"], stored["last_modified"], stored["data"]
+        return etag, last_modified, cached
+
+    @staticmethod
+    def _conditional_headers(etag, last_modified):
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def _accept(self, path, response, etag, last_modified, cached):
+        """
+        JSON of a TBA response (requests or httpx, they share this interface),
+        cached and stored; the stored copy for server errors and 304s
+        """
+        if response.status_code >= 500:
+            return self._serve_stored(path, cached, f"TBA returned {response.status_code}")
+
+        if response.status_code == 304 and cached is not None:
+            data = cached
+        else:
+            response.raise_for_status()
+            data = response.json()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        with self._lock:
+            self._fresh[path] = data
+            if etag or last_modified:
+                self._validators[path] = (etag, last_modified, data)
+        if self.store is not None:
+            self.store.save(path, data, etag, last_modified)
+        return data
+
+    def _serve_stored(self, path, cached, reason):
+        if cached is None:
+            raise TBAUnavailable(f"{reason}, and no stored copy of {path}")
+        logger.warning("%s, serving stored copy of %s", reason, path)
+        with self._lock:
+            self._fresh[path] = cached
+        return cached
+
+    def clear(self):
+        with self._lock:
+            self._fresh.clear()
+            self._validators.clear()
+
+
+class AsyncTBAClient:
+    """
+    asyncio counterpart of TBAClient for async views, sending requests with
+    httpx (imported on first use, like requests). It shares the TTL cache, validators and store of the TBAClient it
+    wraps, so a response fetched through either serves both.
+
+    With shared set, each event loop keeps one httpx.AsyncClient (and its
+    connection pool) for its lifetime, which only pays off when the loop
+    lives as long as the process, as under ASGI. Otherwise every request
+    gets its own client, closed after it: under WSGI async_to_sync runs each
+    async view on a new loop, and a client left behind on one is never closed.
+    """
+
+    def __init__(self, sync_client, transport=None, shared=False):
+        self.sync_client = sync_client
+        self.transport = transport
+        self.shared = shared
+        # event loop -> its httpx.AsyncClient, when shared
+        self._http_clients = weakref.WeakKeyDictionary()
+
+    def _new_http(self):
+        import httpx
+
+        connect, read = self.sync_client.timeout
+        return httpx.AsyncClient(
+            headers={"X-TBA-Auth-Key": self.sync_client.auth_key or ""},
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=16, max_keepalive_connections=4),
+            transport=self.transport,
+        )
+
+    @contextlib.asynccontextmanager
+    async def _http(self):
+        """httpx.AsyncClient for one request"""
+        if not self.shared:
+            async with self._new_http() as http:
+                yield http
+            return
+
+        loop = asyncio.get_running_loop()
+        http = self._http_clients.get(loop)
+        if http is None:
+            http = self._http_clients[loop] = self._new_http()
+        yield http
+
+    async def get(self, path):
+        """TBAClient.get without blocking the event loop"""
+        sync_client = self.sync_client
+        data = sync_client._fresh_copy(path)
+        if data is not _MISSING:
+            return data
+        # May read the store from disk
+        etag, last_modified, cached = await asyncio.to_thread(sync_client._validators_for, path)
+        if sync_client.offline:
+            return sync_client._serve_stored(path, cached, "TBA offline mode is on")
+
+        import httpx
+
+        try:
+            async with self._http() as http:
+                with timed('tba'):
+                    response = await http.get(sync_client.base_url + path,
+                                              headers=sync_client._conditional_headers(etag, last_modified))
+        except httpx.TransportError as e:
+            return sync_client._serve_stored(path, cached, f"TBA unreachable: {e!r}")
+        # Writes the response to the store
+        return await asyncio.to_thread(sync_client._accept, path, response, etag, last_modified, cached)
+
+
+client = TBAClient(store=TBAStore(), offline=TBA_OFFLINE)
+async_client = AsyncTBAClient(client, shared=DJANGO_ASGI)
+
 
 def get_team_events():
-    team_events = requests.get(f"https://www.thebluealliance.com/api/v3/team/{TEAM_KEY}/events/{YEAR}",
-                               headers={"X-TBA-Auth-Key": X_TBA_Auth_Key})
+    return _event_names(client.get(f"/team/{TEAM_KEY}/events/{YEAR}"))
+
+
+async def aget_team_events():
+    return _event_names(await async_client.get(f"/team/{TEAM_KEY}/events/{YEAR}"))
+
+
+def _event_names(team_events):
     events = {}
-    for event in team_events.json():
+    for event in team_events:
         events[event["key"]] = event["name"]
     events["testing"] = "Training"
 
@@ -30,26 +308,29 @@ def get_team_events():
 
 
 def get_match_schedule(event_key):
-    matches_at_event = requests.get(f"https://www.thebluealliance.com/api/v3/event/{event_key}/matches/simple",
-                                    headers={"X-TBA-Auth-Key": X_TBA_Auth_Key}).json()
+    matches_at_event = client.get(f"/event/{event_key}/matches/simple")
     return matches_at_event
 
 
+async def aget_match_schedule(event_key):
+    return await async_client.get(f"/event/{event_key}/matches/simple")
+
+
 def get_teams_list(event_key):
-    teams_at_event = requests.get(f"https://www.thebluealliance.com/api/v3/event/{event_key}/teams/simple",
-                                  headers={"X-TBA-Auth-Key": X_TBA_Auth_Key}).json()
+    teams_at_event = client.get(f"/event/{event_key}/teams/simple")
     return teams_at_event
 
 
-def get_single_match(event_key, match_id):
-    match_key = event_key + "_" + match_id
-    raw_match = requests.get(f"https://www.thebluealliance.com/api/v3/match/{match_key}/simple",
-                             headers={"X-TBA-Auth-Key": X_TBA_Auth_Key}).json()
-    ## should probably add erorr handling so errors are not thrown in the console. but the feature works!
-    match = {"red": [], "blue": []}
-    for red_team in raw_match["alliances"]["red"]["team_keys"]:
-        match["red"].append(red_team.split("frc")[1])
-    for blue_team in raw_match["alliances"]["blue"]["team_keys"]:
-        match["blue"].append(blue_team.split("frc")[1])
+async def aget_teams_list(event_key):
+    return await async_client.get(f"/event/{event_key}/teams/simple")
+
 
-    return match
+def prewarm_event(event_key):
+    """
+    Fetch and persist everything the app reads from TBA for one event, so the
+    pages keep working offline. Returns (team count, match count).
+    """
+    get_team_events()
+    teams_at_event = get_teams_list(event_key)
+    matches_at_event = get_match_schedule(event_key)
+    return len(teams_at_event), len(matches_at_event)
@@ -0,0 +1,209 @@
+import tempfile
+import threading
+from unittest import mock
+
+import httpx
+import requests
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+
+from . import tba
+from .tba import AsyncTBAClient, TBAClient, TBAStore, TBAUnavailable
+
+
+def fake_response(status_code=200, json_data=None, headers=None):
+    response = mock.Mock(status_code=status_code, headers=headers or {})
+    response.json.return_value = json_data
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(str(status_code))
+    return response
+
+
+class TBAClientTests(SimpleTestCase):
+
+    def setUp(self):
+        self.session = mock.Mock(headers={})
+        self.client = TBAClient(auth_key="key", session=self.session, cache_ttl=60)
+
+    def test_repeat_calls_are_served_from_cache(self):
+        self.session.get.return_value = fake_response(json_data=[{"team_number": 2073}])
+
+        first = self.client.get("/event/2025test/teams/simple")
+        second = self.client.get("/event/2025test/teams/simple")
+
+        self.assertEquals(first, second)
+        self.assertEquals(self.session.get.call_count, 1)
+        self.assertEquals(self.session.headers["X-TBA-Auth-Key"], "key")
+
+    def test_expired_entry_is_revalidated_with_etag(self):
+        self.session.get.return_value = fake_response(
+            json_data={"key": "2025test"}, headers={"ETag": 'W/"abc"', "Last-Modified": "Sat, 01 Mar 2025"})
+        self.client.get("/event/2025test")
+        self.client._fresh.clear()
+
+        self.session.get.return_value = fake_response(status_code=304)
+        data = self.client.get("/event/2025test")
+
+        self.assertEquals(data, {"key": "2025test"})
+        headers = self.session.get.call_args.kwargs["headers"]
+        self.assertEquals(headers["If-None-Match"], 'W/"abc"')
+        self.assertEquals(headers["If-Modified-Since"], "Sat, 01 Mar 2025")
+
+    def test_requests_use_timeout(self):
+        self.session.get.return_value = fake_response(json_data=[])
+        self.client.get("/status")
+        self.assertEquals(self.session.get.call_args.kwargs["timeout"], self.client.timeout)
+
+    def test_errors_are_raised_and_not_cached(self):
+        self.session.get.return_value = fake_response(status_code=404)
+        with self.assertRaises(requests.HTTPError):
+            self.client.get("/status")
+
+        self.session.get.return_value = fake_response(json_data={"ok": True})
+        self.assertEquals(self.client.get("/status"), {"ok": True})
+
+
+class TBAStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = TBAStore(directory.name)
+        self.session = mock.Mock(headers={})
+
+    def make_client(self, **kwargs):
+        return TBAClient(auth_key="key", session=self.session, store=self.store, **kwargs)
+
+    def test_responses_are_persisted_with_validators(self):
+        self.session.get.return_value = fake_response(json_data=[1, 2], headers={"ETag": '"v1"'})
+        self.make_client().get("/event/2025test/teams/simple")
+
+        stored = self.store.load("/event/2025test/teams/simple")
+        self.assertEquals(stored["data"], [1, 2])
+        self.assertEquals(stored["etag"], '"v1"')
+        self.assertIn("fetched_at", stored)
+
+    def test_new_process_revalidates_from_store(self):
+        self.store.save("/event/2025test", {"key": "2025test"}, etag='"v1"')
+        self.session.get.return_value = fake_response(status_code=304)
+
+        self.assertEquals(self.make_client().get("/event/2025test"), {"key": "2025test"})
+        self.assertEquals(self.session.get.call_args.kwargs["headers"]["If-None-Match"], '"v1"')
+
+    def test_network_failure_serves_stored_copy(self):
+        self.store.save("/event/2025test/teams/simple", [{"team_number": 2073}])
+        self.session.get.side_effect = requests.ConnectionError("no wifi")
+
+        with self.assertLogs('api.tba', 'WARNING') as logs:
+            data = self.make_client().get("/event/2025test/teams/simple")
+        self.assertEquals(data, [{"team_number": 2073}])
+        self.assertIn("serving stored copy of /event/2025test/teams/simple", logs.output[0])
+
+    def test_offline_mode_never_uses_network(self):
+        self.store.save("/event/2025test", {"key": "2025test"})
+        client = self.make_client(offline=True)
+
+        self.assertEquals(client.get("/event/2025test"), {"key": "2025test"})
+        with self.assertRaises(TBAUnavailable):
+            client.get("/event/unknown")
+        self.session.get.assert_not_called()
+
+    def test_prewarm_stores_roster_and_schedule(self):
+        client = self.make_client()
+        responses = {
+            "/event/2025test/teams/simple": [{"team_number": 2073}],
+            "/event/2025test/matches/simple": [{"key": "2025test_qm1", "alliances": {}}],
+        }
+        self.session.get.side_effect = lambda url, **kwargs: fake_response(
+            json_data=responses.get(url[len(client.base_url):], []))
+
+        with mock.patch.object(tba, "client", client):
+            self.assertEquals(tba.prewarm_event("2025test"), (1, 1))
+        self.assertEquals(self.store.load("/event/2025test/matches/simple")["data"][0]["key"], "2025test_qm1")
+        self.assertEquals(self.store.load("/event/2025test/teams/simple")["data"], [{"team_number": 2073}])
+
+
+class AsyncTBAClientTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = TBAStore(directory.name)
+        self.requests = []
+        self.responses = []
+        self.client = TBAClient(auth_key="key", session=mock.Mock(headers={}), store=self.store, cache_ttl=60)
+
+    def handler(self, request):
+        self.requests.append(request)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def get(self, path):
+        async_client = AsyncTBAClient(self.client, transport=httpx.MockTransport(self.handler))
+        return async_to_sync(async_client.get)(path)
+
+    def test_shares_cache_with_sync_client(self):
+        self.responses.append(httpx.Response(200, json=[{"team_number": 2073}], headers={"ETag": '"v1"'}))
+
+        self.assertEquals(self.get("/event/2025test/teams/simple"), [{"team_number": 2073}])
+        self.assertEquals(self.client.get("/event/2025test/teams/simple"), [{"team_number": 2073}])
+        self.assertEquals(self.requests[0].headers["X-TBA-Auth-Key"], "key")
+        self.assertEquals(self.store.load("/event/2025test/teams/simple")["etag"], '"v1"')
+        self.client.session.get.assert_not_called()
+
+    def test_store_is_written_off_the_event_loop(self):
+        loop_threads, save_threads = [], []
+        self.responses.append(httpx.Response(200, json={"key": "2025test"}))
+        handler = self.handler
+        self.handler = lambda request: loop_threads.append(threading.current_thread()) or handler(request)
+        save = self.store.save
+        with mock.patch.object(self.store, 'save',
+                               lambda *args: save_threads.append(threading.current_thread()) or save(*args)):
+            self.assertEquals(self.get("/event/2025test"), {"key": "2025test"})
+        self.assertEquals(len(save_threads), 1)
+        self.assertNotEqual(save_threads[0], loop_threads[0])
+
+    def test_client_per_request_is_closed(self):
+        clients = []
+        real_new_http = AsyncTBAClient._new_http
+
+        def new_http(async_client):
+            clients.append(real_new_http(async_client))
+            return clients[-1]
+
+        self.responses += [httpx.Response(200, json=[]), httpx.Response(200, json=[])]
+        with mock.patch.object(AsyncTBAClient, '_new_http', new_http):
+            self.get("/event/2025test/teams/simple")
+            self.get("/event/2025test/matches/simple")
+        self.assertEquals(len(clients), 2)
+        self.assertTrue(all(http.is_closed for http in clients))
+
+    def test_shared_client_per_event_loop(self):
+        self.responses += [httpx.Response(200, json=[]), httpx.Response(200, json=[])]
+        async_client = AsyncTBAClient(self.client, transport=httpx.MockTransport(self.handler), shared=True)
+
+        async def get_both():
+            await async_client.get("/event/2025test/teams/simple")
+            await async_client.get("/event/2025test/matches/simple")
+            return list(async_client._http_clients.values())
+
+        clients = async_to_sync(get_both)()
+        self.assertEquals(len(clients), 1)
+        self.assertFalse(clients[0].is_closed)
+
+    def test_revalidates_stored_copy(self):
+        self.store.save("/event/2025test", {"key": "2025test"}, etag='"v1"')
+        self.responses.append(httpx.Response(304))
+
+        self.assertEquals(self.get("/event/2025test"), {"key": "2025test"})
+        self.assertEquals(self.requests[0].headers["If-None-Match"], '"v1"')
+
+    def test_network_failure_serves_stored_copy(self):
+        self.store.save("/event/2025test", {"key": "2025test"})
+        self.responses += [httpx.ConnectError("no wifi"), httpx.ConnectError("no wifi")]
+
+        self.assertEquals(self.get("/event/2025test"), {"key": "2025test"})
+        with self.assertRaises(TBAUnavailable):
+            self.get("/event/unknown")
@@ -1,15 +1,11 @@
 import os
 from django.shortcuts import render, redirect
 from django.urls import reverse
-import google_auth_oauthlib.flow
-import requests
 
 from constants import AUTHORIZED_EMAIL
 from .models import AuthorizedUser
 
 # Create your views here.
-os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
-os.environ['OAUTHLIB_RELAX_TOKEN_SCOPE'] = '1'
 
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/userinfo.profile',
           'https://www.googleapis.com/auth/userinfo.email']
@@ -36,6 +32,22 @@ client_config = {
 }
 
 
+def make_flow(request):
+    """
+    OAuth flow redirecting back to oauth2callback. google_auth_oauthlib is
+    imported here, on the first login, rather than when every worker starts.
+    """
+    import google_auth_oauthlib.flow
+
+    # Read by oauthlib when the token is fetched
+    os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
+    os.environ['OAUTHLIB_RELAX_TOKEN_SCOPE'] = '1'
+    flow = google_auth_oauthlib.flow.Flow.from_client_config(
+        client_config=client_config, scopes=SCOPES)
+    flow.redirect_uri = request.build_absolute_uri(reverse('oauth2callback'))
+    return flow
+
+
 def authorize(request):
     # If user is already authenticated, redirect to home
     if request.session.get('email'):
@@ -43,10 +55,7 @@ def authorize(request):
     
     # Check if this is a direct auth request (from login button)
     if request.GET.get('login') == 'true':
-        flow = google_auth_oauthlib.flow.Flow.from_client_config(
-            client_config=client_config, scopes=SCOPES)
-
-        flow.redirect_uri = request.build_absolute_uri(reverse('oauth2callback'))
+        flow = make_flow(request)
         print(f"Redirect URI: {flow.redirect_uri}")  # Debug line
 
         authorization_url, state = flow.authorization_url(
@@ -60,9 +69,9 @@ def authorize(request):
 
 
 def oauth2callback(request):
-    flow = google_auth_oauthlib.flow.Flow.from_client_config(
-        client_config=client_config, scopes=SCOPES) # , state=state
-    flow.redirect_uri = request.build_absolute_uri(reverse('oauth2callback')) # "https://silver-chainsaw-4w5jqgp7xw4fjx96-8000.app.github.dev/auth/oauth2callback"
+    import requests
+
+    flow = make_flow(request)
 
     # Use the authorization server's response to fetch the OAuth 2.0 tokens.
     authorization_response = request.build_absolute_uri()
@@ -0,0 +1,6 @@
+"""
+Standalone benchmarks, run from the repository root with
+`python -m benchmarks.<name> --help`. Each creates and drops its own test
+database (test_<name> next to the configured one), so DATABASE_URL may point
+at a development Postgres or be left unset for SQLite.
+"""
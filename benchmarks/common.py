@@ -0,0 +1,113 @@
+"""Helpers shared by the benchmarks: Django setup, a scratch database, WSGI requests and timing stats"""
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter
+from wsgiref.util import setup_testing_defaults
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'scouting_backend.settings')
+
+
+def setup_django():
+    import django
+    django.setup()
+
+
+@contextmanager
+def scratch_database():
+    """Create the test database with every migration applied, drop it afterwards"""
+    from django.db import connections
+    from django.test.utils import setup_databases, teardown_databases
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings_dict = connections['default'].settings_dict
+        if settings_dict['ENGINE'].endswith('sqlite3'):
+            # A file, not Django's default in-memory test database, which never reconnects
+            settings_dict.setdefault('TEST', {})['NAME'] = str(Path(directory) / 'benchmark.sqlite3')
+            # The migrations use Postgres-only operations, so create the tables from the models
+            settings_dict['TEST']['MIGRATE'] = False
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            yield
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+
+# Sent as both cookie and header so POSTs pass CSRF checks like a browser's would
+CSRF_TOKEN = 'benchmark' * 3 + 'token'
+
+
+def wsgi_request(application, method, path, query='', body=b'', headers=None):
+    """
+    Run one request through the full WSGI stack, closing the response like a
+    server does (which is when Django closes or keeps the DB connection).
+    Returns (status, body).
+    """
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost',
+        'CONTENT_LENGTH': str(len(body)),
+        'CONTENT_TYPE': 'application/json',
+        'wsgi.input': io.BytesIO(body),
+        # HTTPS, or production settings redirect every request
+        'wsgi.url_scheme': 'https',
+        'HTTPS': 'on',
+        'SERVER_PORT': '443',
+        'HTTP_ORIGIN': 'https://localhost',
+        'HTTP_COOKIE': f'csrftoken={CSRF_TOKEN}',
+        'HTTP_X_CSRFTOKEN': CSRF_TOKEN,
+    }
+    environ.update(headers or {})
+    setup_testing_defaults(environ)
+    status = []
+    result = application(environ, lambda code, response_headers, exc_info=None: status.append(code))
+    try:
+        content = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return status[0], content
+
+
+def time_calls(function, repeat):
+    """Seconds each of `repeat` calls of function took"""
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        timings.append(perf_counter() - start)
+    return timings
+
+
+def summarize(timings):
+    """{'mean', 'p50', 'p95', 'p99'} in milliseconds"""
+    cuts = statistics.quantiles(timings, n=100, method='inclusive')
+    return {
+        'mean': round(statistics.fmean(timings) * 1000, 3),
+        'p50': round(cuts[49] * 1000, 3),
+        'p95': round(cuts[94] * 1000, 3),
+        'p99': round(cuts[98] * 1000, 3),
+    }
+
+
+def print_table(rows, columns):
+    """rows of dicts as an aligned text table"""
+    widths = {column: max(len(column), *(len(str(row[column])) for row in rows)) for column in columns}
+    print('  '.join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print('  '.join(str(row[column]).ljust(widths[column]) for column in columns))
+
+
+def scan_payload(team_number, match_number, event_key, scout_name="Benchmark"):
+    return json.dumps({
+        "teamNumber": team_number, "matchNumber": match_number, "comp_code": event_key, "name": scout_name,
+        "autoL4": match_number % 3, "teleL4": match_number % 5, "endClimb": 2, "autoPath": "A,B,processor",
+    }).encode()
@@ -0,0 +1,101 @@
+"""
+Request latency of the scanner and rankings views with database connections
+closed after every request (the old conn_max_age=0), kept open between
+requests, and pooled (only if psycopg 3 and psycopg_pool are installed).
+
+    python -m benchmarks.db_connections --requests 200 --handshake-ms 40
+
+--handshake-ms adds a delay whenever a new connection is opened, standing in
+for the TCP + TLS + auth round trips to a remote host like Supabase that a
+local Postgres or SQLite does not have.
+"""
+import argparse
+from time import sleep
+
+from benchmarks.common import (print_table, scan_payload, scratch_database, setup_django, summarize, time_calls,
+                               wsgi_request)
+
+EVENT_KEY = "2025bench"
+TEAMS = range(1, 41)
+
+
+def seed():
+    from teams.models import EventTeam, Team_Match_Data, Teams
+
+    EventTeam.objects.bulk_create(EventTeam(event=EVENT_KEY, team_number=team) for team in TEAMS)
+    Teams.objects.bulk_create(Teams(event=EVENT_KEY, team_number=team) for team in TEAMS)
+    Team_Match_Data.objects.bulk_create(
+        Team_Match_Data(event=EVENT_KEY, team_number=team, match_number=match, scout_name="Seed", teleL4=match % 4)
+        for team in TEAMS for match in range(1, 13)
+    )
+
+
+def configure(mode):
+    """Point the default connection at a mode, closing whatever it had open"""
+    from django.db import connection
+
+    connection.close()
+    if getattr(connection, 'pool', None) is not None:
+        connection.close_pool()
+    connection.settings_dict['CONN_MAX_AGE'] = 600 if mode == 'persistent' else 0
+    connection.settings_dict['CONN_HEALTH_CHECKS'] = mode == 'persistent'
+    options = connection.settings_dict.setdefault('OPTIONS', {})
+    options.pop('pool', None)
+    if mode == 'pool':
+        options['pool'] = {'min_size': 1, 'max_size': 4}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help="requests per view and mode")
+    parser.add_argument('--handshake-ms', type=float, default=0, help="simulated cost of opening a connection")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connection
+    from django.db.backends.signals import connection_created
+
+    from scouting_backend.database import pool_available
+
+    connects = []
+
+    def on_connect(**kwargs):
+        connects.append(1)
+        sleep(args.handshake_ms / 1000)
+
+    modes = ['closed', 'persistent']
+    if connection.vendor == 'postgresql' and pool_available():
+        modes.append('pool')
+    else:
+        print("Skipping pool mode: needs Postgres with psycopg 3 and psycopg_pool installed\n")
+
+    application = get_wsgi_application()
+    rows = []
+    with scratch_database():
+        seed()
+        connection_created.connect(on_connect)
+        for mode in modes:
+            configure(mode)
+            counter = iter(range(10 ** 9))
+            views = {
+                'scanner': lambda: wsgi_request(application, 'POST', '/scanner/', body=scan_payload(
+                    TEAMS[next(counter) % len(TEAMS)], 100 + next(counter), EVENT_KEY),
+                    headers={'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}),
+                'rankings': lambda: wsgi_request(application, 'GET', '/strategy/rankings/', f'comp={EVENT_KEY}'),
+            }
+            for view, request in views.items():
+                status, _ = request()  # warm up (and open the pool)
+                assert status.startswith('200'), f"{view} returned {status}"
+                connects.clear()
+                timings = time_calls(request, args.requests)
+                rows.append({'view': view, 'mode': mode, 'connects': len(connects), **summarize(timings)})
+        connection_created.disconnect(on_connect)
+        configure('closed')
+
+    print(f"{args.requests} requests per row, {connection.vendor}, handshake {args.handshake_ms} ms, times in ms")
+    print_table(rows, ['view', 'mode', 'connects', 'mean', 'p50', 'p95', 'p99'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+End-to-end latency of the pages used at an event, against a synthetic event
+(teams/synthetic.py) in a scratch database. Every request goes through the
+full middleware stack with Django's test client. TBA is a local server
+answering for the same synthetic event: the roster and schedule are synced
+from it like before an event, and views that fall back to TBA talk to it.
+Picklists and TBA responses are stored in temporary directories.
+
+    python -m benchmarks.end_to_end --requests 300
+    python -m benchmarks.end_to_end --requests 300 --save-baseline
+
+Each endpoint gets --requests requests in a row (scanner first, posting the
+scans of the matches not yet played) and is reported with its throughput,
+latency percentiles and database queries per request, read from the
+Server-Timing header. The results are compared with benchmarks/baseline.json,
+and the run fails if an endpoint's p95 is more than --tolerance slower. The
+baseline is only meaningful on the machine that saved it: save one before a
+change, compare after.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from time import perf_counter
+
+from benchmarks.common import print_table, scratch_database, setup_django, summarize
+
+EVENT_KEY = "2025synth"
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+ENDPOINTS = ('scanner', 'rankings', 'dashboard', 'team_page', 'picklist_submit', 'get_path_data')
+
+QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def start_fake_tba(responses):
+    """
+    ThreadingHTTPServer answering the paths in `responses` (filled in later
+    is fine) with their JSON; returns its base URL
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            path = self.path.split('?')[0]
+            self.send_response(200 if path in responses else 404)
+            body = json.dumps(responses.get(path, {"Errors": ["Not found"]})).encode()
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def workloads(schedule, played, seed):
+    """{endpoint: function(client, i) making the i-th request}"""
+    from teams.synthetic import match_scans
+
+    rng = random.Random(seed)
+    played_matches = schedule[:played]
+    # Scans still to come in, in match order; posted again (as updates) once all are in
+    pending = [scan for match in schedule[played:] for scan in match_scans(EVENT_KEY, match, seed)]
+    pending = pending or [scan for match in played_matches for scan in match_scans(EVENT_KEY, match, seed)]
+    robots = [(int(team_key[3:]), match['match_number']) for match in played_matches
+              for color in ('red', 'blue') for team_key in match['alliances'][color]['team_keys']]
+    teams = sorted({team for team, _ in robots})
+    picklist = {'version': 0}
+
+    def scanner(client, i):
+        return client.post('/scanner/', pending[i % len(pending)], content_type='application/json',
+                           headers={'x-requested-with': 'XMLHttpRequest'})
+
+    def rankings(client, i):
+        return client.get('/strategy/rankings/', {'comp': EVENT_KEY})
+
+    def dashboard(client, i):
+        match = rng.choice(schedule)
+        return client.post(f'/strategy/dashboard/?comp={EVENT_KEY}', {'match_number': match['match_number']},
+                           content_type='application/json', headers={'x-requested-with': 'XMLHttpRequest'})
+
+    def team_page(client, i):
+        return client.get(f'/teams/{rng.choice(teams)}/', {'comp': EVENT_KEY})
+
+    def picklist_submit(client, i):
+        # The picklist page: a strategist dragging one team at a time, saving each edit
+        op = {'type': 'move', 'team': rng.choice(teams), 'tier': rng.randrange(5), 'index': rng.randrange(10)}
+        response = client.post(f'/strategy/picklist/submit/?comp={EVENT_KEY}&save_to_db=true',
+                               {'version': picklist['version'], 'ops': [op]}, content_type='application/json')
+        picklist['version'] = response.json().get('version', picklist['version'])
+        return response
+
+    def get_path_data(client, i):
+        team, match = rng.choice(robots)
+        return client.get(f'/api/get_path_data/{team}/', {'comp': EVENT_KEY, 'match': match})
+
+    return {name: function for name, function in locals().items() if name in ENDPOINTS}
+
+
+def run(endpoint, request, count):
+    """Row of results for `count` requests made with request(client, i)"""
+    from django.test import Client
+
+    client = Client()
+    timings, queries, errors = [], [], []
+    start = perf_counter()
+    for i in range(count):
+        began = perf_counter()
+        response = request(client, i)
+        timings.append(perf_counter() - began)
+        if response.status_code != 200:
+            errors.append(f"{response.status_code} {response.content[:200]!r}")
+        found = QUERIES.search(response.get('Server-Timing', ''))
+        if found:
+            queries.append(int(found.group(1)))
+    elapsed = perf_counter() - start
+    if errors:
+        print(f"{endpoint}: {len(errors)} failed, first: {errors[0]}")
+    return {
+        'endpoint': endpoint, 'requests': count, 'errors': len(errors), 'per_sec': round(count / elapsed, 1),
+        'queries': round(sum(queries) / len(queries), 1) if queries else '-', **summarize(timings),
+    }
+
+
+def compare(rows, baseline, tolerance):
+    """Adds the p95 change against the baseline to each row; returns the endpoints over tolerance"""
+    regressed = []
+    for row in rows:
+        before = baseline.get(row['endpoint'])
+        if not before:
+            row['vs_baseline'] = 'new'
+            continue
+        change = row['p95'] / before['p95'] - 1
+        row['vs_baseline'] = f"{change:+.0%}"
+        if change > tolerance:
+            regressed.append(row['endpoint'])
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=300, help="requests per endpoint")
+    parser.add_argument('--teams', type=int, default=75, help="teams at the synthetic event")
+    parser.add_argument('--matches', type=int, default=100, help="qualification matches")
+    parser.add_argument('--played', type=int, default=80, help="matches scouted before the run")
+    parser.add_argument('--seed', type=int, default=0, help="synthetic event and request mix seed")
+    parser.add_argument('--endpoints', nargs='*', choices=ENDPOINTS, default=ENDPOINTS, help="only these")
+    parser.add_argument('--baseline', type=Path, default=BASELINE, help="results to compare with")
+    parser.add_argument('--save-baseline', action='store_true', help="store this run's results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed p95 slowdown, 0.25 = 25%%")
+    args = parser.parse_args()
+
+    # api.tba reads its settings on import
+    tba = {}
+    tba_cache = tempfile.TemporaryDirectory()
+    os.environ.update({'TBA_BASE_URL': start_fake_tba(tba), 'TBA_CACHE_DIR': tba_cache.name, 'DEBUG': 'true'})
+    setup_django()
+
+    from django.core.cache import cache
+    from django.test.utils import setup_test_environment
+
+    from strategy.picklists import channel
+    from strategy.schedule import sync_match_schedule
+    from teams.roster import sync_event_roster
+    from teams.synthetic import generate_event, synthetic_tba_responses
+
+    tba.update(synthetic_tba_responses(EVENT_KEY, args.teams, args.matches, args.seed))
+    setup_test_environment()
+    picklists = tempfile.TemporaryDirectory()
+    channel.store.directory = Path(picklists.name)
+    with scratch_database(), tba_cache, picklists:
+        cache.clear()
+        counts = generate_event(EVENT_KEY, args.teams, args.matches, args.played, args.seed)
+        # What the site does before an event, here from the fake TBA
+        sync_event_roster(EVENT_KEY)
+        sync_match_schedule(EVENT_KEY)
+        print(f"{EVENT_KEY}: " + ', '.join(f"{count} {name.replace('_', ' ')}" for name, count in counts.items()))
+
+        requests = workloads(tba[f"/event/{EVENT_KEY}/matches/simple"], args.played, args.seed)
+        rows = [run(endpoint, requests[endpoint], args.requests) for endpoint in ENDPOINTS
+                if endpoint in args.endpoints]
+
+    columns = ['endpoint', 'requests', 'errors', 'per_sec', 'queries', 'mean', 'p50', 'p95', 'p99']
+    regressed = []
+    if args.baseline.exists() and not args.save_baseline:
+        regressed = compare(rows, json.loads(args.baseline.read_text()), args.tolerance)
+        columns.append('vs_baseline')
+    print(f"{args.requests} requests per endpoint, times in ms, vs_baseline is the p95 change")
+    print_table(rows, columns)
+
+    if args.save_baseline:
+        baseline = {row['endpoint']: {key: row[key] for key in ('per_sec', 'mean', 'p50', 'p95', 'p99')}
+                    for row in rows}
+        args.baseline.write_text(json.dumps(baseline, indent=2) + '\n')
+        print(f"Saved {args.baseline}")
+    if regressed:
+        sys.exit(f"p95 more than {args.tolerance:.0%} over the baseline: {', '.join(regressed)}")
+
+
+if __name__ == '__main__':
+    main()
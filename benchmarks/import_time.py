@@ -0,0 +1,73 @@
+"""
+Cold start cost: importing scouting_backend.wsgi and loading the URLconf (what
+the first request does), measured with `python -X importtime` in fresh
+processes. Prints the total and the packages taking longest, with each
+package's own import time summed over its modules.
+
+    python -m benchmarks.import_time --runs 5 --top 15
+
+LAZY_MODULES are imported on first use and must not show up here; the run
+fails if one does.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from benchmarks.common import print_table
+
+ROOT = Path(__file__).resolve().parent.parent
+
+STARTUP = ("import scouting_backend.wsgi; "
+           "from django.urls import get_resolver; get_resolver().url_patterns")
+
+# Third-party clients only needed by some requests
+LAZY_MODULES = ('requests', 'httpx', 'cloudinary', 'google_auth_oauthlib', 'oauthlib')
+
+
+def import_times():
+    """{module: (self us, cumulative us)} from one fresh interpreter"""
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'scouting_backend.settings'}
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help="fresh processes to take the median of")
+    parser.add_argument('--top', type=int, default=15, help="packages to list")
+    args = parser.parse_args()
+
+    runs = [import_times() for _ in range(args.runs)]
+    totals = [sum(own for own, _ in times.values()) for times in runs]
+    by_package = defaultdict(list)
+    for times in runs:
+        package_times = defaultdict(int)
+        for name, (own, _) in times.items():
+            package_times[name.split('.')[0]] += own
+        for package, own in package_times.items():
+            by_package[package].append(own)
+
+    rows = sorted(({'package': package, 'ms': round(statistics.median(values) / 1000, 1),
+                    'share': f"{statistics.median(values) / statistics.median(totals):.0%}"}
+                   for package, values in by_package.items()), key=lambda row: -row['ms'])
+    print(f"Startup imports: median {statistics.median(totals) / 1000:.1f} ms over {args.runs} runs")
+    print_table(rows[:args.top], ['package', 'ms', 'share'])
+
+    loaded = [module for module in LAZY_MODULES if module in runs[0]]
+    if loaded:
+        sys.exit(f"Imported at startup, should be lazy: {', '.join(loaded)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Throughput of the SQLite fallback with scanner writes and dashboard reads in
+parallel threads, with SQLite's defaults (rollback journal, deferred
+transactions) and with the concurrent mode from scouting_backend/database.py.
+
+    python -m benchmarks.sqlite_concurrency --writers 4 --readers 4 --seconds 10
+
+The cache is disabled so every dashboard read queries the database, like the
+first view of a match after new scans. Always uses a scratch SQLite file,
+whatever DATABASE_URL says.
+"""
+import argparse
+import os
+import threading
+from time import perf_counter
+
+os.environ.pop('DATABASE_URL', None)
+
+from benchmarks.common import (print_table, scan_payload, scratch_database, setup_django, summarize,  # noqa: E402
+                               wsgi_request)
+
+EVENT_KEY = "2025bench"
+TEAMS = range(1, 41)
+MATCHES = range(1, 61)
+
+
+def seed():
+    from strategy.models import Match, MatchAlliance
+    from teams.models import Team_Match_Data, Teams
+
+    Teams.objects.bulk_create(Teams(event=EVENT_KEY, team_number=team) for team in TEAMS)
+    Team_Match_Data.objects.bulk_create(
+        Team_Match_Data(event=EVENT_KEY, team_number=team, match_number=match, scout_name="Seed", teleL4=match % 4)
+        for team in TEAMS for match in range(1, 13)
+    )
+    matches = Match.objects.bulk_create(
+        Match(event=EVENT_KEY, key=f"{EVENT_KEY}_qm{number}", comp_level='qm', match_number=number, number=number)
+        for number in MATCHES
+    )
+    MatchAlliance.objects.bulk_create(
+        MatchAlliance(match=match, color=color, station=station,
+                      team_number=TEAMS[(match.number * 6 + index) % len(TEAMS)])
+        for match in matches
+        for index, (color, station) in enumerate((color, station) for color in ('red', 'blue') for station in (1, 2, 3))
+    )
+
+
+def configure(concurrent):
+    from django.db import connections
+
+    from scouting_backend.database import sqlite_config
+
+    connection = connections['default']
+    connection.close()
+    config = sqlite_config(connection.settings_dict['NAME'], 600, concurrent)
+    connection.settings_dict['OPTIONS'] = config['OPTIONS']
+    connection.settings_dict['PRAGMAS'] = config['PRAGMAS']
+    if not concurrent:
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode = DELETE")  # Stored in the file, undo an earlier run
+        connection.close()
+
+
+def run(application, writers, readers, seconds):
+    """(timings, errors) by 'write' and 'read' from threads hammering the app for `seconds`"""
+    from django.db import connection
+
+    deadline = perf_counter() + seconds
+    results = {'write': [], 'read': []}
+    errors = {'write': [], 'read': []}
+    lock = threading.Lock()
+
+    def worker(kind, number):
+        timings = []
+        count = 0
+        try:
+            while perf_counter() < deadline:
+                count += 1
+                start = perf_counter()
+                if kind == 'write':
+                    status, body = wsgi_request(application, 'POST', '/scanner/', body=scan_payload(
+                        TEAMS[(number * 7 + count) % len(TEAMS)], 100 + count, EVENT_KEY, f"Scout {number}"),
+                        headers={'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'})
+                else:
+                    status, body = wsgi_request(
+                        application, 'POST', '/strategy/dashboard/', f'comp={EVENT_KEY}',
+                        body=f'{{"match_number": {MATCHES[count % len(MATCHES)]}}}'.encode(),
+                        headers={'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'})
+                if status.startswith('200'):
+                    timings.append(perf_counter() - start)
+                else:
+                    with lock:
+                        errors[kind].append(f"{status} {body[:200]!r}")
+        finally:
+            connection.close()
+        with lock:
+            results[kind].extend(timings)
+
+    threads = [threading.Thread(target=worker, args=('write', number)) for number in range(writers)]
+    threads += [threading.Thread(target=worker, args=('read', number)) for number in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=4, help="threads posting scans")
+    parser.add_argument('--readers', type=int, default=4, help="threads loading dashboard previews")
+    parser.add_argument('--seconds', type=float, default=10, help="duration of each mode")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.wsgi import get_wsgi_application
+    from django.test.utils import override_settings
+
+    application = get_wsgi_application()
+    rows = []
+    with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}), \
+            scratch_database():
+        seed()
+        for mode, concurrent in (('default', False), ('concurrent', True)):
+            configure(concurrent)
+            results, errors = run(application, args.writers, args.readers, args.seconds)
+            for kind, timings in results.items():
+                rows.append({
+                    'mode': mode, 'kind': kind, 'ok': len(timings), 'per_sec': round(len(timings) / args.seconds, 1),
+                    'errors': len(errors[kind]), **summarize(timings or [0, 0]),
+                })
+                if errors[kind]:
+                    print(f"{mode} {kind}: {len(errors[kind])} failed, first: {errors[kind][0]}")
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds} s per mode, times in ms")
+    print_table(rows, ['mode', 'kind', 'ok', 'per_sec', 'errors', 'mean', 'p50', 'p95', 'p99'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Throughput of a TBA-bound view (/get_events/) under gunicorn (WSGI, a thread
+per request) and uvicorn (ASGI, the async views), against a fake TBA server
+that answers after --tba-ms. --long-polls clients first open picklist
+long-polls and hold them, like laptops waiting on the picklist page.
+
+    python -m benchmarks.wsgi_vs_asgi --clients 64 --long-polls 16 --seconds 10
+
+Both servers run with --workers processes; gunicorn gets --threads threads
+each. TBA_CACHE_TTL=0 so every request goes to the fake TBA. DEBUG=true so
+plain HTTP is not redirected; no database is touched. Needs gunicorn, which
+is not in requirements.txt.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from time import perf_counter, sleep
+
+import httpx
+
+from benchmarks.common import print_table, summarize
+
+ROOT = Path(__file__).resolve().parent.parent
+EVENTS = [{"key": f"2025ev{number}", "name": f"Event {number}"} for number in range(8)]
+
+
+def start_fake_tba(delay):
+    """ThreadingHTTPServer answering every GET with EVENTS after `delay` seconds; returns its base URL"""
+    body = json.dumps(EVENTS).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            sleep(delay)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_command(kind, port, workers, threads):
+    if kind == 'wsgi':
+        return [sys.executable, '-m', 'gunicorn', 'scouting_backend.wsgi:application', '--bind', f'127.0.0.1:{port}',
+                '--workers', str(workers), '--threads', str(threads), '--log-level', 'warning']
+    return [sys.executable, '-m', 'uvicorn', 'scouting_backend.asgi:application', '--port', str(port),
+            '--workers', str(workers), '--no-access-log', '--log-level', 'warning']
+
+
+def wait_until_up(url, timeout=30):
+    deadline = perf_counter() + timeout
+    while perf_counter() < deadline:
+        try:
+            if httpx.get(url, timeout=5).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        sleep(0.2)
+    raise RuntimeError(f"{url} did not come up in {timeout} s")
+
+
+async def load(base_url, clients, long_polls, seconds):
+    """(timings, errors) of `clients` loops requesting /get_events/ for `seconds`"""
+    timings, errors = [], []
+    limits = httpx.Limits(max_connections=clients + long_polls, max_keepalive_connections=clients + long_polls)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=seconds + 30) as http:
+        async def long_poll():
+            try:
+                await http.get('/strategy/picklist/submit/', params={'comp': '2025bench', 'version': 0, 'wait': 'true'})
+            except httpx.HTTPError:
+                pass
+
+        polls = [asyncio.create_task(long_poll()) for _ in range(long_polls)]
+        await asyncio.sleep(0.5)  # Let them reach the server
+
+        deadline = perf_counter() + seconds
+
+        async def client():
+            while perf_counter() < deadline:
+                start = perf_counter()
+                try:
+                    response = await http.get('/get_events/')
+                except httpx.HTTPError as e:
+                    errors.append(repr(e))
+                    continue
+                if response.status_code == 200:
+                    timings.append(perf_counter() - start)
+                else:
+                    errors.append(f"{response.status_code} {response.text[:200]!r}")
+
+        await asyncio.gather(*(client() for _ in range(clients)))
+        for poll in polls:
+            poll.cancel()
+    return timings, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=64, help="concurrent clients requesting /get_events/")
+    parser.add_argument('--long-polls', type=int, default=16, help="picklist long-polls held open during the run")
+    parser.add_argument('--seconds', type=float, default=10, help="duration of each server's run")
+    parser.add_argument('--tba-ms', type=float, default=200, help="fake TBA response time")
+    parser.add_argument('--workers', type=int, default=2, help="server processes")
+    parser.add_argument('--threads', type=int, default=8, help="gunicorn threads per process")
+    args = parser.parse_args()
+
+    tba_url = start_fake_tba(args.tba_ms / 1000)
+    rows = []
+    for kind in ('wsgi', 'asgi'):
+        port = free_port()
+        with tempfile.TemporaryDirectory() as tba_cache:
+            env = {**os.environ, 'DEBUG': 'true', 'TBA_BASE_URL': tba_url, 'TBA_CACHE_TTL': '0',
+                   'TBA_CACHE_DIR': tba_cache, 'PICKLIST_POLL_TIMEOUT': str(args.seconds + 5)}
+            env.pop('DATABASE_URL', None)
+            server = subprocess.Popen(server_command(kind, port, args.workers, args.threads), cwd=ROOT, env=env)
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                wait_until_up(base_url + '/get_events/')
+                timings, errors = asyncio.run(load(base_url, args.clients, args.long_polls, args.seconds))
+            finally:
+                server.terminate()
+                server.wait(30)
+        rows.append({
+            'server': kind, 'ok': len(timings), 'per_sec': round(len(timings) / args.seconds, 1),
+            'errors': len(errors), **summarize(timings or [0, 0]),
+        })
+        if errors:
+            print(f"{kind}: {len(errors)} failed, first: {errors[0]}")
+
+    print(f"{args.clients} clients, {args.long_polls} long-polls, TBA {args.tba_ms} ms, {args.workers} workers "
+          f"({args.threads} threads for WSGI), {args.seconds} s per server, times in ms")
+    print_table(rows, ['server', 'ok', 'per_sec', 'errors', 'mean', 'p50', 'p95', 'p99'])
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,7 @@
  * Handles drag-and-drop team selection for match strategy
  */
 
-import { postJSON, triggerHapticFeedback, getCookie } from '@shared/api';
+import { triggerHapticFeedback, getCookie } from '@shared/api';
 import { getElementById, querySelector, addEventListener, createElement, debounce } from '@shared/utils';
 
 class TeamPicklist {
@@ -12,13 +12,15 @@ class TeamPicklist {
     this.draggedItem = null;
     this.saveTimeout = null;
     this.lastUpdateTime = 0;
-    this.lastTimestamp = 0;
+    this.lastVersion = 0; // Picklist version these lists were built from
+    this.clientId = Math.random().toString(36).slice(2); // Tags our own ops in the server's log
+    this.pendingOps = []; // Edits the server has not accepted yet
     this.isFetching = false;
     
     // Configuration
     this.config = {
       inactivityTimeout: 3000, // 3 seconds of inactivity before auto-save
-      fetchUpdateInterval: 5000, // Fetch updates every 5 seconds
+      retryInterval: 5000, // Wait before polling again after an error
       listIds: ['no_pick', '1st_pick', '2nd_pick', '3rd_pick', 'dnp'],
     };
 
@@ -108,25 +110,79 @@ class TeamPicklist {
   }
 
   /**
-   * Save data temporarily (frequent updates)
+   * Post the pending edits to the server's operation log, or every tier when
+   * the server has no picklist yet. "merged" means someone else saved in
+   * between and "conflict" that our full replace was stale; either way the
+   * server's lists replace ours. If the request fails the edits go back in
+   * front of any made meanwhile and are resent with the next save; only a
+   * 400, which the same ops would get again, drops them.
+   * @param {string} url - Submit URL
+   * @returns {Promise<Object>} Response data
    */
-  async saveTemporary() {
+  async postPicklist(url) {
+    const ops = this.pendingOps;
+    this.pendingOps = [];
+    const body = this.lastVersion === 0
+      ? { version: 0, data: this.getTeamData(), client: this.clientId }
+      : { version: this.lastVersion, ops, client: this.clientId };
+
+    let response;
     try {
-      const data = this.getTeamData();
-      const response = await fetch(`/strategy/picklist/submit/?comp=${this.compCode}`, {
+      response = await fetch(url, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'X-CSRFToken': getCookie('csrftoken'),
         },
-        body: JSON.stringify(data),
+        body: JSON.stringify(body),
       });
+    } catch (error) {
+      this.pendingOps = ops.concat(this.pendingOps);
+      throw error;
+    }
+    if (!response.ok && response.status !== 409) {
+      if (response.status !== 400) {
+        this.pendingOps = ops.concat(this.pendingOps);
+      }
+      throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+    }
 
-      const result = await response.json();
-      this.lastTimestamp = result.timestamp;
-      return result;
+    const result = await response.json();
+    if (result.status === 'merged' || result.status === 'conflict') {
+      this.updateLists(result.data);
+    }
+    if (result.version) {
+      this.lastVersion = Math.max(this.lastVersion, result.version);
+    }
+    return result;
+  }
+
+  /**
+   * Op moving a team to where it now sits in the lists
+   * @param {HTMLElement} item - Team element
+   * @returns {Object} Move op
+   */
+  moveOp(item) {
+    const list = item.parentNode;
+    return {
+      type: 'move',
+      team: parseInt(item.id),
+      tier: this.config.listIds.indexOf(list.id),
+      index: Array.from(list.children).indexOf(item),
+    };
+  }
+
+  /**
+   * Save data temporarily (frequent updates); failed edits stay queued
+   * @returns {Promise<Object|null>} Response data, null if nothing was sent or it failed
+   */
+  async saveTemporary() {
+    if (this.pendingOps.length === 0 && this.lastVersion !== 0) return null;
+    try {
+      return await this.postPicklist(`/strategy/picklist/submit/?comp=${this.compCode}`);
     } catch (error) {
       console.error('Error saving temporarily:', error);
-      throw error;
+      return null;
     }
   }
 
@@ -140,12 +196,10 @@ class TeamPicklist {
     this.showStatus('Saving...', 'loading');
 
     try {
-      const data = this.getTeamData();
-      
-      const response = await postJSON(
-        `/strategy/picklist/submit/?comp=${this.compCode}&save_to_db=true`, 
-        data
-      );
+      const response = await this.postPicklist(`/strategy/picklist/submit/?comp=${this.compCode}&save_to_db=true`);
+      if (response.status === 'conflict') {
+        throw new Error(response.message);
+      }
 
       this.showStatus('Sent to database!', 'success');
       triggerHapticFeedback();
@@ -159,7 +213,9 @@ class TeamPicklist {
       return response;
     } catch (error) {
       console.error('Error saving to database:', error);
-      this.showStatus('Error saving to database. Please try again.', 'error');
+      this.showStatus(error.message === 'Picklist was changed by someone else'
+        ? 'Picklist was changed by someone else, their version is shown.'
+        : 'Error saving to database. Please try again.', 'error');
       this.elements.saveButton.disabled = false;
 
       setTimeout(() => {
@@ -247,14 +303,14 @@ class TeamPicklist {
   }
 
   /**
-   * Fetch updates from server with throttling
+   * Long-poll the server until the picklist changes past lastVersion
    */
   async fetchUpdates() {
     if (this.isFetching) return; // Prevent overlapping requests
     this.isFetching = true;
 
     try {
-      const url = `/strategy/picklist/submit/?comp=${this.compCode}&timestamp=${this.lastTimestamp}&t=${Date.now()}`;
+      const url = `/strategy/picklist/submit/?comp=${this.compCode}&version=${this.lastVersion}&wait=true&t=${Date.now()}`;
       const response = await fetch(url, {
         headers: {
           'Cache-Control': 'no-cache',
@@ -265,18 +321,49 @@ class TeamPicklist {
       const result = await response.json();
       
       if (result.status === 'updated') {
-        this.lastTimestamp = result.timestamp;
+        this.lastVersion = result.version;
         this.updateLists(result.data);
+      } else if (result.status === 'ops') {
+        this.lastVersion = Math.max(this.lastVersion, result.version);
+        this.applyOps(result.ops);
       } else if (result.status === 'no_change') {
-        this.lastTimestamp = result.timestamp;
+        this.lastVersion = result.version;
       }
+      this.isFetching = false;
+      this.fetchUpdates();
     } catch (error) {
       console.error('Error fetching updates:', error);
-    } finally {
       this.isFetching = false;
+      setTimeout(() => this.fetchUpdates(), this.config.retryInterval);
     }
   }
 
+  /**
+   * Apply other strategists' logged ops to our lists, ours are already shown
+   * @param {Array} entries - Logged {version, op, client} entries
+   */
+  applyOps(entries) {
+    entries.filter(entry => entry.client !== this.clientId).forEach(({ op }) => {
+      if (op.type === 'replace') {
+        this.updateLists(op.data);
+      } else if (op.type === 'move') {
+        const list = this.elements.lists[this.config.listIds[op.tier]];
+        const item = document.getElementById(String(op.team)) || this.createTeamElement(op.team);
+        item.remove();
+        list.insertBefore(item, list.children[op.index] || null);
+      } else if (op.type === 'swap') {
+        const first = getElementById(String(op.teams[0]));
+        const second = getElementById(String(op.teams[1]));
+        if (first && second) {
+          const marker = createElement('li');
+          first.replaceWith(marker);
+          second.replaceWith(first);
+          marker.replaceWith(second);
+        }
+      }
+    });
+  }
+
   /**
    * Update lists with new data
    * @param {Array} data - Array of team arrays for each list
@@ -351,6 +438,7 @@ class TeamPicklist {
     }
 
     this.draggedItem.classList.remove('being-dragged');
+    this.pendingOps.push(this.moveOp(this.draggedItem));
     this.draggedItem = null;
     
     this.save();
@@ -409,9 +497,8 @@ class TeamPicklist {
    * Start periodic updates
    */
   startPeriodicUpdates() {
-    setInterval(() => {
-      this.fetchUpdates();
-    }, this.config.fetchUpdateInterval);
+    // Each long-poll starts the next one as soon as it returns
+    this.fetchUpdates();
   }
 
   /**
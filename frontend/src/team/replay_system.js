@@ -1,8 +1,403 @@
 /**
  * Replay System Module
- * Placeholder for future migration
+ * Animates a scout-drawn auto path over the field map on the team page
  */
 
-console.log('Replay system module loaded (placeholder)');
+import { getElementById, querySelector, addEventListener, createElement } from '@shared/utils';
 
-export default {};
\ No newline at end of file
+// Size of the field map the positions below were measured on
+const ORIGINAL_CANVAS_WIDTH = 512;
+const ORIGINAL_CANVAS_HEIGHT = 400;
+
+// Field position configurations, same names as FIELD_POSITIONS in teams/paths.py
+const FIELD_POSITIONS = {
+  A: { x: 277, y: 170 },
+  B: { x: 279, y: 230 },
+  C: { x: 285, y: 288 },
+  D: { x: 331, y: 315 },
+  E: { x: 375, y: 315 },
+  F: { x: 419, y: 288 },
+  G: { x: 430, y: 220 },
+  H: { x: 430, y: 170 },
+  I: { x: 418, y: 105 },
+  J: { x: 374, y: 80 },
+  K: { x: 330, y: 80 },
+  L: { x: 284, y: 105 },
+  processor: { x: 388, y: 375 },
+  groundA: { x: 173, y: 110 },
+  groundB: { x: 176, y: 210 },
+  groundC: { x: 175, y: 300 },
+  sourceA: { x: 88, y: 120 },
+  sourceB: { x: 86, y: 300 },
+};
+
+// Every path of the team at this event, fetched once in a single request and
+// shared by the replay and the match table's "View Path" links
+let teamPathsRequest = null;
+
+/**
+ * Load the team's paths from /teams/<number>/paths/
+ * @returns {Promise<Array>} [{match_number, quantifier, scout_name, path}]
+ */
+export function loadTeamPaths() {
+  if (!teamPathsRequest) {
+    const teamNumber = document.getElementById('team_number')?.value;
+    const compCode = new URLSearchParams(window.location.search).get('comp');
+    if (!teamNumber || !compCode) {
+      return Promise.reject(new Error('Missing team number or competition code'));
+    }
+
+    teamPathsRequest = fetch(`/teams/${teamNumber}/paths/?comp=${encodeURIComponent(compCode)}`, {
+      headers: { Accept: 'application/json' },
+      credentials: 'same-origin',
+    })
+      .then(response => {
+        if (!response.ok) {
+          throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+      })
+      .then(data => data.paths)
+      .catch(error => {
+        // Let the next call try again
+        teamPathsRequest = null;
+        throw error;
+      });
+  }
+  return teamPathsRequest;
+}
+
+class ReplaySystem {
+  constructor() {
+    this.canvas = getElementById('replayCanvas');
+    this.ctx = this.canvas ? this.canvas.getContext('2d') : null;
+    this.positions = []; // Position names of the loaded path
+    this.currentIndex = 0;
+    this.isPlaying = false;
+    this.animationFrame = null;
+
+    this.animationProgress = 0;
+    this.animationDuration = 1000; // Milliseconds per waypoint
+    this.lastTimestamp = 0;
+
+    this.elements = {
+      pathSelector: null,
+      currentPosition: null,
+      totalPositions: null,
+    };
+
+    if (this.ctx) {
+      this.init();
+    }
+  }
+
+  /**
+   * Initialize the replay
+   */
+  init() {
+    this.elements.pathSelector = getElementById('pathSelector');
+    this.elements.currentPosition = getElementById('currentPosition');
+    this.elements.totalPositions = getElementById('totalPositions');
+    this.initializeCanvas();
+    this.setupEventListeners();
+  }
+
+  /**
+   * Size the canvas to the field map it is drawn over
+   */
+  initializeCanvas() {
+    const img = querySelector("img[alt='Auto Map']");
+    if (!img) {
+      console.error('Auto Map image not found');
+      return;
+    }
+    this.canvas.width = img.width;
+    this.canvas.height = img.height;
+  }
+
+  /**
+   * Setup event listeners
+   */
+  setupEventListeners() {
+    addEventListener(this.elements.pathSelector, 'change', e => {
+      const selectedOption = e.target.options[e.target.selectedIndex];
+      if (selectedOption.value) {
+        this.loadPath(selectedOption.value, selectedOption.getAttribute('data-scout'));
+      }
+    });
+
+    const controls = {
+      playButton: () => this.play(),
+      pauseButton: () => this.pause(),
+      resetButton: () => this.reset(),
+      backButton: () => this.step(-1),
+      forwardButton: () => this.step(1),
+    };
+    Object.entries(controls).forEach(([id, handler]) => {
+      addEventListener(getElementById(id), 'click', handler);
+    });
+
+    addEventListener(window, 'resize', () => {
+      this.initializeCanvas();
+      this.reset();
+    });
+  }
+
+  /**
+   * Canvas coordinates of a named position
+   * @param {string} name - Position name
+   * @returns {{x: number, y: number}|null} Scaled position, null for unknown names
+   */
+  scaledPosition(name) {
+    const position = FIELD_POSITIONS[name];
+    if (!position) {
+      return null;
+    }
+    return {
+      x: position.x * (this.canvas.width / ORIGINAL_CANVAS_WIDTH),
+      y: position.y * (this.canvas.height / ORIGINAL_CANVAS_HEIGHT),
+    };
+  }
+
+  /**
+   * Show the path of a match, from the team's paths loaded once
+   * @param {string|number} matchNumber - Match number
+   * @param {string} scoutName - Scout whose path to show, first one if empty
+   */
+  async loadPath(matchNumber, scoutName = '') {
+    let paths;
+    try {
+      paths = await loadTeamPaths();
+    } catch (error) {
+      console.error('Error fetching path data:', error);
+      return;
+    }
+
+    const records = paths.filter(path => String(path.match_number) === String(matchNumber));
+    const data = records.find(path => path.scout_name === scoutName) || records[0];
+    if (!data || !data.path) {
+      console.error('No path data for match', matchNumber);
+      return;
+    }
+
+    this.positions = data.path
+      .split(',')
+      .map(position => position.trim())
+      .filter(Boolean);
+    this.reset();
+
+    if (data.scout_name) {
+      this.updateScoutInfo(`Scout: ${data.scout_name}`);
+    }
+    if (records.length > 1 && !scoutName) {
+      this.showScoutOptions(
+        records.map(record => record.scout_name),
+        matchNumber
+      );
+    }
+  }
+
+  /**
+   * Message box under the path selector, created on first use
+   * @param {string} id - Element ID
+   * @param {string} className - Classes of a new box
+   * @returns {HTMLElement} The box
+   */
+  messageBox(id, className) {
+    let box = document.getElementById(id);
+    if (!box) {
+      box = createElement('div', { id, className });
+      const after = document.getElementById('scout-info') || this.elements.pathSelector;
+      after.parentNode.insertBefore(box, after.nextSibling);
+    }
+    return box;
+  }
+
+  /**
+   * Display which scout drew the path
+   * @param {string} message - Text to show
+   */
+  updateScoutInfo(message) {
+    this.messageBox('scout-info', 'alert alert-info mt-2').textContent = message;
+  }
+
+  /**
+   * Let the user pick between several scouts' paths of one match
+   * @param {Array<string>} scouts - Scout names
+   * @param {string|number} matchNumber - Match number
+   */
+  showScoutOptions(scouts, matchNumber) {
+    const optionsDiv = this.messageBox('scout-options', 'alert alert-warning mt-2');
+    optionsDiv.innerHTML = '';
+    optionsDiv.style.display = '';
+    optionsDiv.appendChild(
+      createElement('p', {}, 'Multiple scout records found. Select a scout:')
+    );
+
+    const buttonContainer = createElement('div', { className: 'd-flex gap-2' });
+    scouts.forEach(scout => {
+      const button = createElement(
+        'button',
+        { className: 'btn btn-sm btn-outline-primary' },
+        scout || 'Unknown Scout'
+      );
+      addEventListener(button, 'click', () => {
+        this.loadPath(matchNumber, scout);
+        optionsDiv.style.display = 'none';
+      });
+      buttonContainer.appendChild(button);
+    });
+    optionsDiv.appendChild(buttonContainer);
+  }
+
+  /**
+   * Draw a waypoint dot
+   * @param {{x: number, y: number}} position - Canvas position
+   * @param {number} radius - Dot radius
+   * @param {string} color - Fill color
+   */
+  drawDot(position, radius, color) {
+    this.ctx.beginPath();
+    this.ctx.arc(position.x, position.y, radius, 0, 2 * Math.PI);
+    this.ctx.fillStyle = color;
+    this.ctx.fill();
+  }
+
+  /**
+   * Draw the current waypoint and the leg to the next one
+   * @returns {Array} [current, next] canvas positions, either may be null
+   */
+  drawLeg() {
+    const current = this.scaledPosition(this.positions[this.currentIndex]);
+    const next = this.scaledPosition(this.positions[this.currentIndex + 1]);
+    if (!current) {
+      return [null, null];
+    }
+
+    this.drawDot(current, 5, 'rgba(255, 0, 0, 0.5)');
+    if (next) {
+      this.ctx.beginPath();
+      this.ctx.moveTo(current.x, current.y);
+      this.ctx.lineTo(next.x, next.y);
+      this.ctx.strokeStyle = 'rgba(255, 0, 0, 0.5)';
+      this.ctx.lineWidth = 2;
+      this.ctx.stroke();
+      this.drawDot(next, 5, 'rgba(255, 0, 0, 0.3)');
+    }
+    return [current, next];
+  }
+
+  /**
+   * Redraw the still frame of the current waypoint
+   */
+  render() {
+    this.clearCanvas();
+    this.drawLeg();
+    this.updatePositionDisplay();
+  }
+
+  /**
+   * Animation frame: move the robot along the current leg
+   * @param {number} timestamp - requestAnimationFrame time
+   */
+  animate(timestamp) {
+    if (!this.isPlaying) return;
+
+    if (!this.lastTimestamp) {
+      this.lastTimestamp = timestamp;
+    }
+    this.animationProgress += timestamp - this.lastTimestamp;
+    this.lastTimestamp = timestamp;
+
+    this.clearCanvas();
+    const [current, next] = this.drawLeg();
+    if (current && next) {
+      const t = Math.min(this.animationProgress / this.animationDuration, 1);
+      this.drawDot(
+        { x: current.x + (next.x - current.x) * t, y: current.y + (next.y - current.y) * t },
+        10,
+        'red'
+      );
+
+      if (t === 1) {
+        this.currentIndex++;
+        this.animationProgress = 0;
+        this.lastTimestamp = 0;
+      }
+    }
+    this.updatePositionDisplay();
+
+    if (this.currentIndex < this.positions.length - 1) {
+      this.animationFrame = requestAnimationFrame(time => this.animate(time));
+    } else {
+      this.isPlaying = false;
+    }
+  }
+
+  /**
+   * Update the "position x of y" counter
+   */
+  updatePositionDisplay() {
+    const { currentPosition, totalPositions } = this.elements;
+    if (currentPosition && totalPositions && this.positions.length) {
+      currentPosition.textContent = this.currentIndex + 1;
+      totalPositions.textContent = this.positions.length;
+    }
+  }
+
+  play() {
+    if (this.isPlaying || this.currentIndex >= this.positions.length - 1) {
+      return;
+    }
+    this.isPlaying = true;
+    this.lastTimestamp = 0;
+    this.animationProgress = 0;
+    this.animate(performance.now());
+  }
+
+  pause() {
+    this.isPlaying = false;
+    if (this.animationFrame) {
+      cancelAnimationFrame(this.animationFrame);
+      this.animationFrame = null;
+    }
+  }
+
+  reset() {
+    this.pause();
+    this.currentIndex = 0;
+    this.render();
+  }
+
+  /**
+   * Move one waypoint back (-1) or forward (1)
+   * @param {number} delta - Direction
+   */
+  step(delta) {
+    const index = this.currentIndex + delta;
+    if (index >= 0 && index < this.positions.length) {
+      this.pause();
+      this.currentIndex = index;
+      this.render();
+    }
+  }
+
+  clearCanvas() {
+    this.ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
+  }
+}
+
+// Initialize when DOM is ready
+document.addEventListener('DOMContentLoaded', () => {
+  const replay = new ReplaySystem();
+
+  // The match table's "View Path" links share the same request
+  window.loadTeamPaths = loadTeamPaths;
+
+  // Make available globally for debugging
+  if (process.env.NODE_ENV === 'development') {
+    window.replaySystem = replay;
+  }
+});
+
+export default ReplaySystem;
@@ -1,8 +1,28 @@
+import json
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 # Create your tests here.
 from django.urls import reverse, resolve
-from .views import scanner
+
+from teams.models import Teams, Team_Match_Data, TeamEventAggregate
+from .views import scanner, scanner_bulk
+
+
+def make_scan(team_number=2073, match_number=1, name="Scout A", **fields):
+    scan = {
+        "teamNumber": team_number,
+        "matchNumber": match_number,
+        "name": name,
+        "comp_code": "2025test",
+        "quantifier": "Quals",
+        "driverRanking": 3,
+        "defenseRanking": 1,
+    }
+    scan.update(fields)
+    return scan
 
 
 class ScannerTests(TestCase):
@@ -15,3 +35,74 @@ class ScannerTests(TestCase):
     def test_scanner_url_resolves_scanner_view(self):
         view = resolve('/scanner/')
         self.assertEquals(view.func, scanner)
+
+
+class ScannerBulkTests(TestCase):
+
+    def post_scans(self, scans):
+        return self.client.post(reverse('scanner_bulk'), data=json.dumps(scans),
+                                content_type='application/json')
+
+    def test_scanner_bulk_url_resolves_scanner_bulk_view(self):
+        view = resolve('/scanner/bulk/')
+        self.assertEquals(view.func, scanner_bulk)
+
+    def test_bulk_creates_and_updates(self):
+        Team_Match_Data.objects.create(team_number=2073, event="2025test", match_number=1,
+                                       scout_name="Scout A", teleL4=1)
+
+        response = self.post_scans([
+            make_scan(teleL4=5),
+            make_scan(team_number=254, name="Scout B"),
+        ])
+
+        self.assertEquals(response.status_code, 200)
+        body = response.json()
+        self.assertEquals([r["status"] for r in body["results"]], ["updated", "created"])
+        self.assertEquals(Team_Match_Data.objects.count(), 2)
+        self.assertEquals(Team_Match_Data.objects.get(team_number=2073).teleL4, 5)
+        self.assertTrue(Teams.objects.filter(team_number=254, event="2025test").exists())
+
+    def test_single_and_bulk_scans_share_a_key(self):
+        self.client.post(reverse('scanner'), data=json.dumps(make_scan(name="Scout A ", comp_code="2025test ")),
+                         content_type='application/json', HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        response = self.post_scans([make_scan(name=" Scout A", teleL4=5)])
+
+        self.assertEquals(response.json()["results"][0]["status"], "updated")
+        scan = Team_Match_Data.objects.get()
+        self.assertEquals((scan.event, scan.scout_name, scan.teleL4), ("2025test", "Scout A", 5))
+
+    def test_bulk_reports_invalid_items_and_keeps_valid_ones(self):
+        response = self.post_scans([make_scan(), make_scan(name="")])
+
+        body = response.json()
+        self.assertEquals(body["results"][0]["status"], "created")
+        self.assertEquals(body["results"][1]["status"], "error")
+        self.assertIn("Scout name is required", body["results"][1]["errors"])
+        self.assertEquals(Team_Match_Data.objects.count(), 1)
+
+    def test_bulk_later_duplicate_wins(self):
+        response = self.post_scans([make_scan(teleL1=1), make_scan(teleL1=2)])
+
+        body = response.json()
+        self.assertEquals([r["status"] for r in body["results"]], ["skipped", "created"])
+        self.assertEquals(Team_Match_Data.objects.get().teleL1, 2)
+
+    def test_bulk_upserts_in_constant_queries(self):
+        scans = [make_scan(team_number=team, match_number=match)
+                 for team in range(1, 7) for match in range(1, 6)]
+        # savepoint + release around: existing lookup, teams insert, match data upsert,
+        # then in a nested savepoint the aggregates' insert, lock and update
+        with self.assertNumQueries(10):
+            response = self.post_scans(scans)
+        self.assertEquals(response.json()["created"], 30)
+
+    def test_bulk_overwrite_is_retracted_from_aggregate(self):
+        self.post_scans([make_scan(match_number=1, teleL4=2), make_scan(match_number=2, teleL4=4)])
+        self.post_scans([make_scan(match_number=1, teleL4=6)])
+        aggregate = TeamEventAggregate.objects.get(team_number=2073, event="2025test", quantifier="Quals")
+        self.assertEquals((aggregate.match_count, aggregate.sum_teleL4), (2, 10))
+
+    def test_bulk_rejects_non_array(self):
+        response = self.post_scans(make_scan())
+        self.assertEquals(response.status_code, 400)
@@ -1,97 +1,124 @@
 import json
+from django.db import transaction
 from django.http import JsonResponse
 from django.shortcuts import render
+from strategy.caching import invalidate_teams
+from teams.aggregates import SCAN_VALUE_FIELDS, apply_scan_changes, scan_values
 from teams.models import Teams, Team_Match_Data
+from teams.paths import encode_path
+from .validation import validate_scan_data
 
 # We don't need numpy or login_required for this view
 # @login_required 
 
+# Upper bound on how many scans a single bulk request may carry
+MAX_BULK_SCANS = 500
+
+# Fields that make up Team_Match_Data's unique_together key
+SCAN_KEY_FIELDS = ('team_number', 'event', 'match_number', 'scout_name')
+
+
+def get_int_default(data_from_post, key, default_val=0):
+    """Safely gets an integer from the POST data, or returns a default."""
+    try:
+        # Check for None or empty string before int conversion
+        val = data_from_post.get(key)
+        if val is None or val == "":
+            return default_val
+        return int(val)
+    except (ValueError, TypeError):
+        return default_val
+
+
+def parse_scan(data_from_post):
+    """
+    Split a QR payload into its unique key and the defaults to upsert.
+    Raises KeyError/ValueError/TypeError if the key identifiers are invalid.
+    """
+    # Stripped, so a stray space in the QR code overwrites the scan instead of adding one
+    key = {
+        'team_number': int(data_from_post["teamNumber"]),
+        'event': str(data_from_post["comp_code"]).strip(),
+        'match_number': int(data_from_post["matchNumber"]),
+        'scout_name': str(data_from_post.get("name") or "").strip(),
+    }
+
+    # Get quantifier, falling back to the model's default
+    quantifier_val = data_from_post.get("quantifier")
+    if not quantifier_val in ['Quals', 'Playoff', 'Prac']:
+        quantifier_val = 'Quals' # Default from model
+
+    auto_path = data_from_post.get("autoPath", [])
+    auto_path_code = encode_path(auto_path)
+
+    # Build the 'defaults' dictionary for all other data fields
+    # This is everything we want to update if the match is found.
+    match_data_defaults = {
+        'quantifier': quantifier_val,
+        'start_pos': get_int_default(data_from_post, "startPos", 0),
+        'missed_auto': get_int_default(data_from_post, "missed_auto", 0),
+
+        'auto_leave': get_int_default(data_from_post, "autoLeave"),
+        'auto_L1': get_int_default(data_from_post, "autoL1"),
+        'auto_L2': get_int_default(data_from_post, "autoL2"),
+        'auto_L3': get_int_default(data_from_post, "autoL3"),
+        'auto_L4': get_int_default(data_from_post, "autoL4"),
+        'auto_net': get_int_default(data_from_post, "autoNet"),
+        'auto_processor': get_int_default(data_from_post, "autoProcessor"),
+        'auto_removed': get_int_default(data_from_post, "autoRemoved"),
+
+        # Raw path only when it cannot be encoded, see teams/paths.py
+        'auto_path': auto_path if auto_path_code is None else [], # Model default
+        'auto_path_code': auto_path_code,
+
+        'teleL1': get_int_default(data_from_post, "teleL1"),
+        'teleL2': get_int_default(data_from_post, "teleL2"),
+        'teleL3': get_int_default(data_from_post, "teleL3"),
+        'teleL4': get_int_default(data_from_post, "teleL4"),
+        'telenet': get_int_default(data_from_post, "telenet"),
+        'teleProcessor': get_int_default(data_from_post, "teleProcessor"),
+        'teleRemoved': get_int_default(data_from_post, "teleRemoved"),
+
+        'climb': get_int_default(data_from_post, "endClimb"),
+        'driver_ranking': get_int_default(data_from_post, "driverRanking"),
+        'defense_ranking': get_int_default(data_from_post, "defenseRanking"),
+
+        'comment': data_from_post.get("comment", ""),
+
+        'is_broken': get_int_default(data_from_post, "isBroken", 0),
+        'is_disabled': get_int_default(data_from_post, "isDisabled", 0),
+        'is_tipped': get_int_default(data_from_post, "isTipped", 0),
+    }
+    return key, match_data_defaults
+
+
 def scanner(request):
     if request.method == "POST" and request.headers.get("x-requested-with") == "XMLHttpRequest":
         try:
             # Safely parse JSON data
             data_from_post = json.loads(request.body.decode("utf-8"))
 
-            # 1. Get the key identifying fields. We must fail if these are invalid.
+            # 1. Get the key identifying fields and the data to store.
+            #    We must fail if the key fields are invalid.
             try:
-                team_num = int(data_from_post["teamNumber"])
-                event_code = data_from_post["comp_code"]
-                match_num = int(data_from_post["matchNumber"])
-                
-                scout_name = data_from_post.get("name")
-                if not scout_name:
+                key, match_data_defaults = parse_scan(data_from_post)
+                if not key['scout_name']:
                     return JsonResponse({"error": "Missing or empty 'name' field from scout"}, status=400)
-                
+
             except (KeyError, ValueError, TypeError) as e:
                 return JsonResponse({"error": f"Missing or invalid key identifier: {e}"}, status=400)
 
             # 2. Ensure team exists
-            Teams.objects.get_or_create(team_number=team_num, event=event_code)
-
-            # 3. Helper function to get an integer from the data or return a default
-            def get_int_default(key, default_val=0):
-                """Safely gets an integer from the POST data, or returns a default."""
-                try:
-                    # Check for None or empty string before int conversion
-                    val = data_from_post.get(key)
-                    if val is None or val == "":
-                        return default_val
-                    return int(val)
-                except (ValueError, TypeError):
-                    return default_val
-
-            # 4. Get quantifier, falling back to the model's default
-            quantifier_val = data_from_post.get("quantifier")
-            if not quantifier_val in ['Quals', 'Playoff', 'Prac']:
-                quantifier_val = 'Quals' # Default from model
-
-            # 5. Build the 'defaults' dictionary for all other data fields
-            #    This is everything we want to update if the match is found.
-            #    Notice 'scout_name' is REMOVED from this dictionary.
-            match_data_defaults = {
-                'quantifier': quantifier_val,
-                'start_pos': get_int_default("startPos", 0),
-                'missed_auto': get_int_default("missed_auto", 0),
-                
-                'auto_leave': get_int_default("autoLeave"),
-                'auto_L1': get_int_default("autoL1"),
-                'auto_L2': get_int_default("autoL2"),
-                'auto_L3': get_int_default("autoL3"),
-                'auto_L4': get_int_default("autoL4"),
-                'auto_net': get_int_default("autoNet"),
-                'auto_processor': get_int_default("autoProcessor"),
-                'auto_removed': get_int_default("autoRemoved"),
-                
-                'auto_path': data_from_post.get("autoPath", list), # Uses model default
-                
-                'teleL1': get_int_default("teleL1"),
-                'teleL2': get_int_default("teleL2"),
-                'teleL3': get_int_default("teleL3"),
-                'teleL4': get_int_default("teleL4"),
-                'telenet': get_int_default("telenet"),
-                'teleProcessor': get_int_default("teleProcessor"),
-                'teleRemoved': get_int_default("teleRemoved"),
-                
-                'climb': get_int_default("endClimb"),
-                'driver_ranking': get_int_default("driverRanking"),
-                'defense_ranking': get_int_default("defenseRanking"),
-                
-                'comment': data_from_post.get("comment", ""),
-                
-                'is_broken': get_int_default("isBroken", 0),
-                'is_disabled': get_int_default("isDisabled", 0),
-                'is_tipped': get_int_default("isTipped", 0),
-            }
+            Teams.objects.get_or_create(team_number=key['team_number'], event=key['event'])
 
-            # 6. Use update_or_create
-            #    This now finds a match based on all four key fields.
+            # 3. Use update_or_create
+            #    This finds a match based on all four key fields.
             #    If a different scout scans, it will create a new entry.
+            #    Cached pages and the team's aggregate are updated by post_save,
+            #    see strategy/caching.py and teams/aggregates.py
             obj, created = Team_Match_Data.objects.update_or_create(
-                team_number=team_num,
-                event=event_code,
-                match_number=match_num,
-                scout_name=scout_name, # <-- THIS IS THE CHANGE
-                defaults=match_data_defaults
+                defaults=match_data_defaults,
+                **key
             )
 
             confirmation_msg = "Successfully Updated"
@@ -110,4 +137,103 @@ def scanner(request):
             return JsonResponse({"error": f"An unexpected error occurred: {e}"}, status=500)
 
     # If it's not an AJAX request, serve the HTML page
-    return render(request, "qr_scanner.html")
\ No newline at end of file
+    return render(request, "qr_scanner.html")
+
+
+def scanner_bulk(request):
+    """
+    Ingest a JSON array of QR payloads in one request.
+    Every scan is validated first, then all valid ones are upserted in a single
+    transaction keyed on Team_Match_Data's unique_together. Returns one result
+    per submitted item, in order.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method"}, status=405)
+
+    try:
+        scans = json.loads(request.body.decode("utf-8"))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({"error": "Invalid JSON format"}, status=400)
+
+    if not isinstance(scans, list):
+        return JsonResponse({"error": "Expected a JSON array of scans"}, status=400)
+    if len(scans) > MAX_BULK_SCANS:
+        return JsonResponse({"error": f"Cannot submit more than {MAX_BULK_SCANS} scans at once"}, status=400)
+
+    results = [None] * len(scans)
+    # Valid scans by unique key; a later scan for the same key wins
+    pending = {}
+
+    for index, scan in enumerate(scans):
+        if not isinstance(scan, dict):
+            results[index] = {"index": index, "status": "error", "errors": ["Scan must be a JSON object"]}
+            continue
+
+        is_valid, errors = validate_scan_data(scan)
+        if not is_valid:
+            results[index] = {"index": index, "status": "error", "errors": errors}
+            continue
+
+        key, match_data_defaults = parse_scan(scan)
+        key_tuple = tuple(key[field] for field in SCAN_KEY_FIELDS)
+
+        if key_tuple in pending:
+            superseded = pending[key_tuple][0]
+            results[superseded] = {"index": superseded, "status": "skipped",
+                                   "errors": [f"Superseded by scan {index} in this batch"]}
+        pending[key_tuple] = (index, key, match_data_defaults)
+
+    if pending:
+        try:
+            with transaction.atomic():
+                # One query to tell inserts from updates, keeping the old values
+                # so overwritten scans can be retracted from the aggregates
+                candidates = Team_Match_Data.objects.select_for_update().filter(
+                    event__in={key[1] for key in pending},
+                    team_number__in={key[0] for key in pending},
+                    match_number__in={key[2] for key in pending},
+                ).values(*SCAN_VALUE_FIELDS, 'scout_name')
+                existing = {
+                    tuple(row[field] for field in SCAN_KEY_FIELDS): row for row in candidates
+                }
+
+                Teams.objects.bulk_create(
+                    [Teams(team_number=team_number, event=event)
+                     for team_number, event in {(key[0], key[1]) for key in pending}],
+                    ignore_conflicts=True,
+                )
+
+                # Insert everything at once, overwriting rows whose key already exists.
+                # Every parsed scan carries the same set of data fields.
+                saved = Team_Match_Data.objects.bulk_create(
+                    [Team_Match_Data(**key, **defaults) for _, key, defaults in pending.values()],
+                    update_conflicts=True,
+                    unique_fields=list(SCAN_KEY_FIELDS),
+                    update_fields=list(match_data_defaults),
+                )
+
+                # bulk_create sends no post_save, so aggregates and cached pages are updated here
+                apply_scan_changes([
+                    (existing.get(key_tuple), scan_values(obj))
+                    for key_tuple, obj in zip(pending, saved)
+                ])
+                for event in {key[1] for key in pending}:
+                    teams = [key[0] for key in pending if key[1] == event]
+                    transaction.on_commit(lambda event=event, teams=teams: invalidate_teams(event, teams))
+        except Exception as e:
+            print(f"Error in bulk scanner view: {e}")
+            return JsonResponse({"error": f"An unexpected error occurred: {e}"}, status=500)
+
+        for key_tuple, obj in zip(pending, saved):
+            index = pending[key_tuple][0]
+            results[index] = {
+                "index": index,
+                "status": "updated" if key_tuple in existing else "created",
+                "id": obj.id,
+            }
+
+    summary = {"created": 0, "updated": 0, "skipped": 0, "error": 0}
+    for result in results:
+        summary[result["status"]] += 1
+
+    return JsonResponse({"results": results, **summary}, status=200)
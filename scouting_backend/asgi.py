@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'scouting_backend.settings')
+# Read by scouting_backend/database.py: no persistent connections without a pool
+os.environ['DJANGO_ASGI'] = 'true'
 
 application = get_asgi_application()
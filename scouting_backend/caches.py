@@ -0,0 +1,53 @@
+"""
+CACHES for settings.py, picked with the CACHE_BACKEND environment variable:
+
+    locmem  per-process memory; every gunicorn worker has its own copy, so an
+            invalidation in one worker leaves the others stale until timeout
+    file    files under CACHE_LOCATION (default <project>/django_cache), shared
+            by every worker on the host
+    db      the django_cache table (`manage.py createcachetable`), shared by
+            every worker and host using the database
+    dummy   caches nothing
+
+What is cached and when it is dropped is in strategy/caching.py.
+"""
+import os
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+# Entries kept before the oldest third is culled
+CACHE_MAX_ENTRIES = 5000
+
+# Seconds an entry is kept unless set with its own timeout
+CACHE_TIMEOUT = 60 * 60
+
+
+def cache_config(base_dir, backend=None):
+    """CACHES setting; backend defaults to CACHE_BACKEND, else locmem"""
+    if backend is None:
+        backend = os.environ.get('CACHE_BACKEND', 'locmem').strip().lower()
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f"CACHE_BACKEND must be one of {', '.join(CACHE_BACKENDS)}, not {backend!r}")
+
+    location = {
+        'locmem': 'scouting',
+        'file': os.environ.get('CACHE_LOCATION') or os.path.join(base_dir, 'django_cache'),
+        'db': os.environ.get('CACHE_LOCATION') or 'django_cache',
+        'dummy': '',
+    }[backend]
+    return {
+        'default': {
+            'BACKEND': CACHE_BACKENDS[backend],
+            'LOCATION': location,
+            'TIMEOUT': CACHE_TIMEOUT,
+            'KEY_PREFIX': 'scouting',
+            'OPTIONS': {
+                'MAX_ENTRIES': CACHE_MAX_ENTRIES,
+            },
+        }
+    }
@@ -0,0 +1,137 @@
+"""
+DATABASES['default'] for settings.py.
+
+With DATABASE_URL (Postgres) connections are kept open between requests for
+DB_CONN_MAX_AGE seconds, health checked before reuse, so a request does not
+pay the TCP + TLS + auth handshake to the database host. DB_POOL=true swaps
+that for a psycopg connection pool per worker process, which needs psycopg 3
+and psycopg_pool installed; without them it falls back to persistent
+connections.
+
+Under ASGI (scouting_backend/asgi.py sets DJANGO_ASGI) Django runs each
+request's sync ORM work on a thread of its own, so a kept connection is never
+reused: it would sit idle until DB_CONN_MAX_AGE and exhaust the database's
+connection limit under load. There connections are closed after every
+request unless DB_POOL is set.
+
+Without DATABASE_URL the local SQLite file is used, by default in a
+concurrent mode for pit laptops: write-ahead logging so rankings reads do
+not wait on scanner writes, transactions that take the write lock up front
+so they queue on the busy timeout instead of failing with "database is
+locked", and the SQLITE_PRAGMAS below applied to every new connection.
+SQLITE_CONCURRENT=false keeps SQLite's defaults.
+"""
+import os
+import warnings
+from importlib.util import find_spec
+
+import dj_database_url
+from django.db.backends.signals import connection_created
+
+# Seconds an idle persistent connection is kept; 0 closes it after every request
+DB_CONN_MAX_AGE = 600
+
+# Connections per worker process in pool mode, and seconds to wait for one
+DB_POOL_MIN_SIZE = 2
+DB_POOL_MAX_SIZE = 8
+DB_POOL_TIMEOUT = 10
+
+# Seconds a SQLite connection waits for another's write lock
+SQLITE_TIMEOUT = 20
+
+# Run on every new SQLite connection in concurrent mode
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # Durable across application crashes; only a power cut can lose the last commits
+    'synchronous': 'NORMAL',
+    'cache_size': -64 * 1024,  # KiB
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': SQLITE_TIMEOUT * 1000,
+}
+
+
+def env_flag(name, default=False):
+    return os.environ.get(name, str(default)).strip().lower() in ('1', 'true', 'yes')
+
+
+def pool_available():
+    """Django's pool option needs psycopg 3 with psycopg_pool, not psycopg2"""
+    return find_spec('psycopg') is not None and find_spec('psycopg_pool') is not None
+
+
+def database_config(database_url, sqlite_path, pool=None, conn_max_age=None, asgi=None):
+    """
+    Settings dict for the default database. pool, conn_max_age and asgi
+    default to the DB_POOL, DB_CONN_MAX_AGE and DJANGO_ASGI environment
+    variables.
+    """
+    if conn_max_age is None:
+        conn_max_age = int(os.environ.get('DB_CONN_MAX_AGE', DB_CONN_MAX_AGE))
+    if asgi is None:
+        asgi = env_flag('DJANGO_ASGI')
+
+    if not database_url:
+        # A new thread per request under ASGI, see the module docstring
+        return sqlite_config(sqlite_path, 0 if asgi else conn_max_age)
+
+    if pool is None:
+        pool = env_flag('DB_POOL')
+    if pool and not pool_available():
+        # Settings are imported before logging is configured; a warning reaches stderr either way
+        warnings.warn("DB_POOL is set but psycopg 3 and psycopg_pool are not installed, "
+                      "using persistent connections", RuntimeWarning)
+        pool = False
+    if asgi and not pool:
+        conn_max_age = 0
+
+    config = dj_database_url.parse(
+        database_url,
+        # Pooled connections go back to the pool, Django refuses both at once
+        conn_max_age=0 if pool else conn_max_age,
+        conn_health_checks=not pool,
+    )
+    if pool:
+        config.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', DB_POOL_MIN_SIZE)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', DB_POOL_MAX_SIZE)),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', DB_POOL_TIMEOUT)),
+        }
+    if env_flag('DB_DISABLE_SERVER_SIDE_CURSORS'):
+        # Needed behind a transaction-mode pooler such as Supabase's port 6543
+        config['DISABLE_SERVER_SIDE_CURSORS'] = True
+    return config
+
+
+def sqlite_config(sqlite_path, conn_max_age, concurrent=None):
+    """Settings dict for the SQLite fallback; concurrent defaults to SQLITE_CONCURRENT"""
+    if concurrent is None:
+        concurrent = env_flag('SQLITE_CONCURRENT', True)
+    # One local file and no handshake; keeping the connection only saves reopening it
+    config = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': sqlite_path,
+        'CONN_MAX_AGE': conn_max_age,
+        'OPTIONS': {
+            'timeout': SQLITE_TIMEOUT,
+        },
+        # Read by configure_sqlite_connection, not by Django
+        'PRAGMAS': {},
+    }
+    if concurrent:
+        config['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
+        config['PRAGMAS'] = dict(SQLITE_PRAGMAS)
+    return config
+
+
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """connection_created hook applying the database's PRAGMAS"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = connection.settings_dict.get('PRAGMAS') or {}
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+connection_created.connect(configure_sqlite_connection, dispatch_uid='configure_sqlite_connection')
@@ -6,9 +6,11 @@ import random
 import string
 from pathlib import Path
 
-import dj_database_url
 from dotenv import load_dotenv
 
+from scouting_backend.caches import cache_config
+from scouting_backend.database import database_config
+
 load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -52,6 +54,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'scouting_backend.timing.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -64,6 +67,22 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'scouting_backend.urls'
 
+# Request timing lines from scouting_backend/timing.py; INFO logs every request, WARNING only slow ones
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'scouting_backend.timing': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_LOG_LEVEL', 'WARNING').upper(),
+            'propagate': False,
+        },
+    },
+}
+
 UI_TEMPLATES = [
     os.path.join(BASE_DIR, 'templates'),
     os.path.join('scanner', 'templates', 'scanner'),
@@ -89,26 +108,14 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'scouting_backend.wsgi.application'
 
-# Database configuration
+# Database configuration, see scouting_backend/database.py
 DATABASE_URL = os.environ.get("DATABASE_URL")
-if DATABASE_URL:
-    DATABASES = {
-        'default': dj_database_url.config(
-            default=DATABASE_URL,
-            conn_max_age=0,
-            conn_health_checks=True,
-        )
-    }
-else:
-    DATABASES = {
-        'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
-            'OPTIONS': {
-                'timeout': 20,
-            }
-        }
-    }
+DATABASES = {
+    'default': database_config(DATABASE_URL, BASE_DIR / 'db.sqlite3'),
+}
+
+# Cache configuration, see scouting_backend/caches.py
+CACHES = cache_config(BASE_DIR)
 
 # Static files configuration
 STATIC_URL = '/static/'
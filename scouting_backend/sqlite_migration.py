@@ -0,0 +1,253 @@
+"""
+Copy the local SQLite database into the configured one (Postgres), used by
+`manage.py migrate_sqlite_data`.
+
+Each model is streamed from SQLite in primary key order, CHUNK_SIZE rows at
+a time, and every chunk is inserted with one multi-row INSERT in its own
+transaction, so memory stays flat however many scans a season produced.
+After each committed chunk the last copied primary key is written to a
+checkpoint file; a rerun continues from there. The auto-created many-to-many
+tables (user groups and permissions) are copied like any other model.
+
+The SQLite file is read with the sqlite3 module rather than the ORM because
+it may predate later migrations: only the columns both sides have are
+copied, the rest get the model's defaults.
+
+Content types and permissions are built by `migrate` on both sides, not
+copied, and their ids need not match: references to them (group and user
+permissions, admin log entries) are translated through their natural keys,
+(app label, model) and (content type, codename).
+"""
+import json
+import os
+import sqlite3
+from datetime import timezone
+from time import perf_counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import connections, models, transaction
+
+# Rows read and inserted per transaction
+CHUNK_SIZE = 2000
+
+# Copied by default, in foreign key order
+MIGRATED_APPS = ('auth', 'admin', 'sessions', 'authenticate', 'teams', 'strategy', 'scanner')
+
+# Built by `migrate` or derived from other tables, never copied
+SKIPPED_MODELS = ('auth.permission', 'teams.teameventaggregate')
+
+
+def migrated_models(labels=None):
+    """Models to copy, referenced models first; labels like "teams.teams" narrow it down"""
+    if labels:
+        candidates = [apps.get_model(label) for label in labels]
+    else:
+        candidates = [
+            model for model in apps.get_models(include_auto_created=True)
+            if model._meta.app_label in MIGRATED_APPS and model._meta.label_lower not in SKIPPED_MODELS
+        ]
+    ordered = []
+
+    def visit(model):
+        if model in ordered:
+            return
+        for field in model._meta.concrete_fields:
+            target = field.related_model
+            if target is not None and target is not model and target in candidates:
+                visit(target)
+        ordered.append(model)
+
+    for model in candidates:
+        visit(model)
+    return ordered
+
+
+class Checkpoint:
+    """{model label: last copied pk or True when done}, saved as JSON after every chunk"""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.state = json.load(f)
+        except FileNotFoundError:
+            self.state = {}
+
+    def get(self, model):
+        return self.state.get(model._meta.label_lower)
+
+    def set(self, model, value):
+        self.state[model._meta.label_lower] = value
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.path)
+
+
+def _converter(field):
+    """Function turning a raw SQLite value into what field expects"""
+    convert = _value_converter(field)
+    if field.null:
+        return lambda value: None if value is None else convert(value)
+    # Columns made NOT NULL by later migrations hold NULLs in old files
+    return lambda value: field.get_default() if value is None else convert(value)
+
+
+def _id_converter(ids):
+    """Function translating a SQLite id through ids, None if the target has no such row"""
+    return lambda value: None if value is None else ids.get(value)
+
+
+def _value_converter(field):
+    if isinstance(field, models.JSONField):
+        return lambda value: json.loads(value) if isinstance(value, str) else value
+    if isinstance(field, models.DateTimeField) and settings.USE_TZ:
+        def to_aware(value):
+            value = field.to_python(value)
+            # Django stores UTC without an offset in SQLite
+            return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+        return to_aware
+    # Parses dates, booleans stored as 0/1 and ArrayFields stored as JSON text
+    return field.to_python
+
+
+def _quote(name):
+    return f'"{name}"'
+
+
+def _source_columns(source, table):
+    return {row[1] for row in source.execute(f'PRAGMA table_info({_quote(table)})')}
+
+
+def built_by_migrate_ids(source, using='default'):
+    """
+    {ContentType: {SQLite id: target id}, Permission: {...}} matched by
+    natural key; ids the target has no row for map to None
+    """
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Permission = apps.get_model('auth', 'Permission')
+    target_types = {(app_label, model): id for id, app_label, model in
+                    ContentType.objects.using(using).values_list('id', 'app_label', 'model')}
+    content_types = {}
+    if _source_columns(source, ContentType._meta.db_table):
+        content_types = {id: target_types.get((app_label, model)) for id, app_label, model in
+                         source.execute(f'SELECT id, app_label, model FROM {_quote(ContentType._meta.db_table)}')}
+    target_permissions = {(content_type, codename): id for id, content_type, codename in
+                          Permission.objects.using(using).values_list('id', 'content_type_id', 'codename')}
+    permissions = {}
+    if _source_columns(source, Permission._meta.db_table):
+        permissions = {id: target_permissions.get((content_types.get(content_type), codename))
+                       for id, content_type, codename in
+                       source.execute(f'SELECT id, content_type_id, codename FROM {_quote(Permission._meta.db_table)}')}
+    return {ContentType: content_types, Permission: permissions}
+
+
+def copy_model(source, model, checkpoint, using='default', chunk_size=CHUNK_SIZE, report=print, target_ids=None):
+    """
+    Copy one model's table from the source connection, resuming after the
+    checkpoint. Returns the number of rows inserted. target_ids is
+    built_by_migrate_ids(source), looked up when not given.
+    """
+    opts = model._meta
+    done = checkpoint.get(model)
+    if done is True:
+        report(f"{opts.label}: already copied")
+        return 0
+    columns = _source_columns(source, opts.db_table)
+    if not columns:
+        report(f"{opts.label}: not in the SQLite file, skipped")
+        checkpoint.set(model, True)
+        return 0
+
+    # Read what the file has; every field is written, missing ones with their defaults
+    fields = [field for field in opts.concrete_fields if field.column in columns]
+    if target_ids is None:
+        target_ids = built_by_migrate_ids(source, using)
+    converters = [(field.attname, _id_converter(target_ids[field.related_model]) if field.related_model in target_ids
+                   else _converter(field)) for field in fields]
+    translated = [index for index, field in enumerate(fields) if field.related_model in target_ids]
+    # bulk_create stamps these with the current time, the stored values are put back after it
+    stamped = [field for field in fields if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+    table, pk_column = _quote(opts.db_table), _quote(opts.pk.column)
+    select = (f'SELECT {", ".join(_quote(field.column) for field in fields)} '
+              f'FROM {table} WHERE {pk_column} > ? ORDER BY {pk_column} LIMIT ?')
+    first_pk, total = source.execute(f'SELECT MIN({pk_column}), COUNT(*) FROM {table}').fetchone()
+    if first_pk is None:
+        report(f"{opts.label}: empty")
+        checkpoint.set(model, True)
+        return 0
+
+    # Anything below the smallest key, so the first chunk starts at it
+    last_pk = done if done is not None else (first_pk - 1 if isinstance(first_pk, int) else '')
+    queryset = model._base_manager.using(using)
+    existing = queryset.count()
+    copied = unmatched = 0
+    start = perf_counter()
+    pk_index = fields.index(opts.pk)
+    while True:
+        rows = source.execute(select, (last_pk, chunk_size)).fetchall()
+        if not rows:
+            break
+        objs = []
+        for row in rows:
+            values = [convert(value) for (_, convert), value in zip(converters, row)]
+            # A content type or permission the target doesn't have
+            if any(values[index] is None and row[index] is not None for index in translated):
+                unmatched += 1
+                continue
+            objs.append(model(**{attname: value for (attname, _), value in zip(converters, values)}))
+        stored = [[getattr(obj, field.attname) for field in stamped] for obj in objs]
+        with transaction.atomic(using=using):
+            # Rows clashing with a unique constraint are skipped: duplicate scans
+            # from before it existed, or a chunk committed just before a crash.
+            queryset.bulk_create(objs, ignore_conflicts=True)
+            if stamped and objs:
+                for obj, values in zip(objs, stored):
+                    for field, value in zip(stamped, values):
+                        setattr(obj, field.attname, value)
+                queryset.bulk_update(objs, [field.name for field in stamped])
+        last_pk = row[pk_index]
+        checkpoint.set(model, last_pk)
+        copied += len(rows)
+        elapsed = perf_counter() - start
+        report(f"{opts.label}: {copied} rows this run ({total} in SQLite), {copied / elapsed:.0f} rows/s")
+
+    if unmatched:
+        report(f"{opts.label}: left out {unmatched} rows referring to a content type or permission the target lacks")
+    skipped = copied - unmatched - (queryset.count() - existing)
+    if skipped:
+        report(f"{opts.label}: skipped {skipped} rows already in the target or duplicating another row")
+    _reset_sequences(model, using)
+    checkpoint.set(model, True)
+    return copied - unmatched - skipped
+
+
+def _reset_sequences(model, using):
+    """Point serial primary keys past the copied ids so new rows don't collide"""
+    connection = connections[using]
+    statements = connection.ops.sequence_reset_sql(no_style(), [model])
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def migrate_sqlite_data(sqlite_path, checkpoint_path, labels=None, using='default', chunk_size=CHUNK_SIZE,
+                        report=print):
+    """Copy every migrated model from the SQLite file. Returns {model label: rows copied}."""
+    source = sqlite3.connect(f"file:{sqlite_path}?mode=ro", uri=True)
+    checkpoint = Checkpoint(checkpoint_path)
+    counts = {}
+    start = perf_counter()
+    try:
+        target_ids = built_by_migrate_ids(source, using)
+        for model in migrated_models(labels):
+            counts[model._meta.label] = copy_model(source, model, checkpoint, using, chunk_size, report, target_ids)
+    finally:
+        source.close()
+    elapsed = perf_counter() - start
+    rows = sum(counts.values())
+    report(f"Copied {rows} rows this run in {elapsed:.1f} s ({rows / max(elapsed, 1e-9):.0f} rows/s)")
+    return counts
@@ -0,0 +1,224 @@
+"""
+Where a request's time goes.
+
+RequestTimingMiddleware times every request and splits out database queries
+(count and time, from an execute wrapper on every connection) and outbound
+calls wrapped in timed('tba') / timed('cloudinary'). The breakdown is sent
+in a Server-Timing header, so browser dev tools show it per request, and
+logged as one key=value line on this module's logger: at INFO for every
+request (REQUEST_LOG_LEVEL=INFO to see them) and at WARNING past
+REQUEST_SLOW_MS. Views that hold a request open on purpose (long-polls) call
+mark_long_poll: they are never logged as slow and their durations are kept
+under "<url name>:long_poll", apart from the view's normal requests.
+
+Each worker process also keeps the last TIMING_WINDOW durations per URL name
+and per outbound service; timing_summary serves their p50/p95/p99 as JSON.
+"""
+import logging
+import os
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import JsonResponse
+
+from helpers import login_required
+
+logger = logging.getLogger(__name__)
+
+# Durations kept per URL name and per outbound service
+TIMING_WINDOW = 1000
+
+# Requests slower than this are logged at WARNING
+REQUEST_SLOW_MS = float(os.environ.get("REQUEST_SLOW_MS", 1000))
+
+# Outbound services, in Server-Timing order
+SERVICES = ('tba', 'cloudinary')
+
+
+class RequestTimings:
+    """
+    Time spent so far by one request. Async views run queries and outbound
+    calls in worker threads, several at once, so the counters are updated
+    under a lock.
+    """
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.outbound = defaultdict(float)
+        self.long_poll = False
+        self._lock = threading.Lock()
+
+    def add_query(self, seconds):
+        with self._lock:
+            self.db_queries += 1
+            self.db_seconds += seconds
+
+    def add_outbound(self, service, seconds):
+        with self._lock:
+            self.outbound[service] += seconds
+
+    def elapsed(self):
+        return perf_counter() - self.start
+
+
+# The current request's timings, copied into sync_to_async threads with the rest of the context
+_current = ContextVar('request_timings', default=None)
+
+
+class RollingTimings:
+    """The last TIMING_WINDOW durations per key, thread-safe"""
+
+    def __init__(self, window=TIMING_WINDOW):
+        self.window = window
+        self._durations = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def add(self, key, seconds):
+        with self._lock:
+            self._durations[key].append(seconds)
+
+    def summary(self):
+        """{key: {'count', 'p50', 'p95', 'p99'}} with times in milliseconds"""
+        with self._lock:
+            snapshot = {key: sorted(durations) for key, durations in self._durations.items()}
+        return {key: {'count': len(durations), **{f'p{q}': round(_percentile(durations, q) * 1000, 1)
+                                                   for q in (50, 95, 99)}}
+                for key, durations in sorted(snapshot.items())}
+
+    def clear(self):
+        with self._lock:
+            self._durations.clear()
+
+
+def _percentile(sorted_durations, q):
+    """Nearest-rank percentile"""
+    index = max(0, -(-len(sorted_durations) * q // 100) - 1)
+    return sorted_durations[index]
+
+
+views = RollingTimings()
+outbound = RollingTimings()
+
+
+@contextmanager
+def timed(service):
+    """Time an outbound call, adding it to the current request (if any) and to the service's history"""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        seconds = perf_counter() - start
+        outbound.add(service, seconds)
+        timings = _current.get()
+        if timings is not None:
+            timings.add_outbound(service, seconds)
+
+
+def mark_long_poll():
+    """Tag the current request as a long-poll, see the module docstring"""
+    timings = _current.get()
+    if timings is not None:
+        timings.long_poll = True
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(perf_counter() - start)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """connection_created hook adding _time_query to every new connection"""
+    if _time_query not in connection.execute_wrappers:
+        # Outermost, and clear of the push/pop of connection.execute_wrapper()
+        connection.execute_wrappers.insert(0, _time_query)
+
+
+connection_created.connect(install_query_timer, dispatch_uid='install_query_timer')
+
+
+def server_timing(timings, total):
+    """Server-Timing header value, durations in milliseconds"""
+    metrics = [
+        f'total;dur={total * 1000:.1f}',
+        f'db;dur={timings.db_seconds * 1000:.1f};desc="{timings.db_queries} queries"',
+    ]
+    metrics += [f'{service};dur={timings.outbound[service] * 1000:.1f}'
+                for service in SERVICES if service in timings.outbound]
+    return ', '.join(metrics)
+
+
+class RequestTimingMiddleware:
+    """See the module docstring; list it first in MIDDLEWARE so it times the others too"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Opened before this module was imported, e.g. by a management command
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(None, connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        total = timings.elapsed()
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        views.add(f'{view}:long_poll' if timings.long_poll else view, total)
+        response['Server-Timing'] = server_timing(timings, total)
+
+        fields = {
+            'view': view,
+            'method': request.method,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'db_queries': timings.db_queries,
+            'db_ms': round(timings.db_seconds * 1000, 1),
+            **{f'{service}_ms': round(seconds * 1000, 1) for service, seconds in timings.outbound.items()},
+        }
+        if timings.long_poll:
+            fields['long_poll'] = True
+        slow = total * 1000 > REQUEST_SLOW_MS and not timings.long_poll
+        level = logging.WARNING if slow else logging.INFO
+        logger.log(level, ' '.join(f'{key}={value}' for key, value in fields.items()), extra={'timing': fields})
+        return response
+
+
+@login_required
+def timing_summary(request):
+    """Rolling latency percentiles of this worker process"""
+    return JsonResponse({'pid': os.getpid(), 'views': views.summary(), 'outbound': outbound.summary()})
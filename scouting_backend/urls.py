@@ -3,6 +3,7 @@ from django.contrib import admin
 from django.urls import path, include
 
 from scouting_backend import settings
+from scouting_backend.timing import timing_summary
 from teams import views as team_views
 from scanner import views as scanner_views
 from strategy import views as strategy_views
@@ -12,8 +13,11 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', team_views.home, name='home'),
     path('scanner/', scanner_views.scanner, name='scanner'),
+    path('scanner/bulk/', scanner_views.scanner_bulk, name='scanner_bulk'),
     path('teams/', team_views.display_teams, name='teams'),
     path('teams/<int:team_number>/', team_views.team_page, name='team_page'),
+    path('teams/<int:team_number>/paths/', team_views.team_paths, name='team_paths'),
+    path('teams/heatmap/', team_views.path_heatmap, name='path_heatmap'),
     path("teams/human-scout/<int:team_number>/", team_views.human_player_submit, name="human-scout"),
     path('get_events/', team_views.get_events),
     path('pit_scouting/<int:team_number>/', team_views.pit_scouting, name='pit_scouting'),
@@ -23,4 +27,7 @@ urlpatterns = [
     path('strategy/picklist/submit/', strategy_views.picklist_submit, name='picklist_submit'),
     path('api/get_path_data/<int:team_number>/', strategy_views.get_path_data, name='get_path_data'),
     path("auth/", include("authenticate.urls")),
+    path('timing/', timing_summary, name='timing_summary'),
+    # Robot photos waiting for their Cloudinary upload, see teams/photos.py
+    path('media/robots/<str:name>', team_views.robot_photo, name='robot_photo'),
 ]
@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class StrategyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'strategy'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from strategy import caching
+        from strategy.models import PickList_Data
+        from teams.models import Team_Match_Data, Teams
+
+        for model in (Team_Match_Data, Teams):
+            post_save.connect(caching.team_data_changed, sender=model, dispatch_uid=f'cache_{model.__name__}_save')
+            post_delete.connect(caching.team_data_changed, sender=model, dispatch_uid=f'cache_{model.__name__}_delete')
+        post_save.connect(caching.picklist_changed, sender=PickList_Data, dispatch_uid='cache_picklist_save')
+        post_delete.connect(caching.picklist_changed, sender=PickList_Data, dispatch_uid='cache_picklist_delete')
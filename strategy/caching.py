@@ -0,0 +1,107 @@
+"""
+What the site caches and when it is dropped.
+
+Reads:
+  event_rankings(event, quantifier)          rankings page summaries
+  event_roster(event)                        sorted team numbers, teams/roster.py
+  get_match_preview(event, quantifier, n)    dashboard previews, strategy/previews.py
+  saved_picklist(event)                      the PickList_Data row shown on the picklist page
+The last three have a-prefixed versions for async views.
+
+Rankings are keyed by a per-event generation number, so invalidate_event
+drops every quantifier's at once by bumping it. Invalidation is driven by
+post_save/post_delete on Team_Match_Data, Teams and PickList_Data (connected
+in StrategyConfig.ready) and runs once the transaction commits. bulk_create
+and queryset update() send no signals, so code using them calls
+invalidate_teams itself.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+from strategy.models import PickList_Data
+from strategy.previews import aget_match_preview, get_match_preview, invalidate_team_previews  # noqa: F401
+from strategy.stats import team_summaries
+from teams.heatmaps import invalidate_team_heatmaps
+from teams.pages import invalidate_team_page
+from teams.roster import afind_event_team_numbers as aevent_roster  # noqa: F401 (part of the API)
+from teams.roster import find_event_team_numbers as event_roster  # noqa: F401 (part of the API)
+
+# Seconds event-wide results are kept; scans invalidate them well before this
+EVENT_CACHE_TIMEOUT = 60 * 60
+
+
+def _generation_key(event_key):
+    return f"event_generation:{event_key}"
+
+
+def event_generation(event_key):
+    return cache.get_or_set(_generation_key(event_key), 0, None)
+
+
+def event_cache_key(event_key, *parts):
+    """Key of an event-wide result, changed by invalidate_event"""
+    return ':'.join(map(str, ['event', event_key, event_generation(event_key), *parts]))
+
+
+def event_rankings(event_key, quantifier):
+    """{team_number: summary} of every registered team, see strategy.stats.team_summaries"""
+    return cache.get_or_set(
+        event_cache_key(event_key, 'rankings', quantifier),
+        lambda: team_summaries(event_key, quantifier, registered_only=True),
+        EVENT_CACHE_TIMEOUT,
+    )
+
+
+def _picklist_key(event_key):
+    return f"saved_picklist:{event_key}"
+
+
+def saved_picklist(event_key):
+    """values() of the event's PickList_Data row, or None if it was never saved"""
+    picklist = cache.get(_picklist_key(event_key))
+    if picklist is None:
+        picklist = PickList_Data.objects.filter(event=event_key).values().first() or {}
+        cache.set(_picklist_key(event_key), picklist, EVENT_CACHE_TIMEOUT)
+    return picklist or None
+
+
+async def asaved_picklist(event_key):
+    """saved_picklist with the async ORM"""
+    picklist = await cache.aget(_picklist_key(event_key))
+    if picklist is None:
+        picklist = await PickList_Data.objects.filter(event=event_key).values().afirst() or {}
+        await cache.aset(_picklist_key(event_key), picklist, EVENT_CACHE_TIMEOUT)
+    return picklist or None
+
+
+def invalidate_event(event_key):
+    """Drop every event-wide result (the rankings)"""
+    cache.add(_generation_key(event_key), 0, None)
+    try:
+        cache.incr(_generation_key(event_key))
+    except ValueError:  # Evicted between add and incr
+        cache.set(_generation_key(event_key), 1, None)
+
+
+def invalidate_teams(event_key, team_numbers):
+    """Drop everything built from these teams' data at an event"""
+    invalidate_event(event_key)
+    invalidate_team_previews(event_key, team_numbers)
+    invalidate_team_page(event_key, team_numbers)
+    invalidate_team_heatmaps(event_key, team_numbers)
+
+
+def invalidate_picklist(event_key):
+    cache.delete(_picklist_key(event_key))
+
+
+def team_data_changed(sender, instance, **kwargs):
+    """post_save/post_delete of Team_Match_Data and Teams"""
+    event_key, team_number = instance.event, instance.team_number
+    transaction.on_commit(lambda: invalidate_teams(event_key, [team_number]))
+
+
+def picklist_changed(sender, instance, **kwargs):
+    """post_save/post_delete of PickList_Data"""
+    event_key = instance.event
+    transaction.on_commit(lambda: invalidate_picklist(event_key))
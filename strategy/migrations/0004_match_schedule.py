@@ -0,0 +1,44 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strategy', '0003_picklist_data_no_pick_alter_picklist_data_dn_pick_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Match',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(max_length=16)),
+                ('key', models.CharField(max_length=32, unique=True)),
+                ('comp_level', models.CharField(max_length=4)),
+                ('set_number', models.IntegerField(default=1)),
+                ('match_number', models.IntegerField()),
+                ('quantifier', models.CharField(default='Quals', max_length=10)),
+                ('number', models.IntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['event', 'comp_level', 'match_number'], name='strategy_ma_event_aa8e7b_idx'), models.Index(fields=['event', 'quantifier', 'number'], name='strategy_ma_event_49f3ff_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MatchAlliance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('color', models.CharField(max_length=4)),
+                ('station', models.IntegerField()),
+                ('team_number', models.IntegerField()),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alliances', to='strategy.match')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['team_number', 'match'], name='strategy_ma_team_nu_fd7c7a_idx')],
+                'unique_together': {('match', 'color', 'station')},
+            },
+        ),
+    ]
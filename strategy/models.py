@@ -9,4 +9,35 @@ class PickList_Data(models.Model):
     first_pick = ArrayField(models.IntegerField(), default=list)
     second_pick = ArrayField(models.IntegerField(), default=list)
     third_pick = ArrayField(models.IntegerField(), default=list)
-    dn_pick = ArrayField(models.IntegerField(), default=list)
\ No newline at end of file
+    dn_pick = ArrayField(models.IntegerField(), default=list)
+
+
+class Match(models.Model):
+    """One scheduled match from TBA, see strategy/schedule.py"""
+    event = models.CharField(max_length=16)
+    key = models.CharField(max_length=32, unique=True)
+    comp_level = models.CharField(max_length=4)
+    set_number = models.IntegerField(default=1)
+    match_number = models.IntegerField()
+    quantifier = models.CharField(max_length=10, default='Quals')
+    # The number scouts enter: the qual number, or the running playoff match count
+    number = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'comp_level', 'match_number']),
+            models.Index(fields=['event', 'quantifier', 'number']),
+        ]
+
+
+class MatchAlliance(models.Model):
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name='alliances')
+    color = models.CharField(max_length=4)
+    station = models.IntegerField()
+    team_number = models.IntegerField()
+
+    class Meta:
+        unique_together = ('match', 'color', 'station')
+        indexes = [
+            models.Index(fields=['team_number', 'match']),
+        ]
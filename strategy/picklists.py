@@ -0,0 +1,331 @@
+"""
+Live picklist shared between the laptops at alliance selection.
+
+Each event's picklist is five tiers of team numbers (no pick, 1st, 2nd, 3rd,
+do not pick) stored as a snapshot, picklists/picklist_<comp>.json, plus an
+append-only operation log, picklists/picklist_<comp>.log, with one versioned
+op per line. The current picklist is the snapshot with every newer logged op
+applied on top. Once the log grows past PICKLIST_COMPACT_OPS the current
+picklist becomes the new snapshot and the log starts over.
+
+PicklistStore writes under a file lock so gunicorn workers never interleave.
+PicklistChannel keeps the current picklist in memory, reading only the new
+tail of the log when another worker appends, and await_newer() lets an async
+view wait until the version moves past the one its client already has
+(long-polling) without holding a thread. A publish in the same process wakes
+the waiters straight away; one from another process is seen by the disk
+check every PICKLIST_DISK_CHECK_INTERVAL.
+"""
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from time import monotonic, time
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines run a single process
+    fcntl = None
+
+# Longest a long-poll request is held open before answering "no_change"
+PICKLIST_POLL_TIMEOUT = float(os.environ.get("PICKLIST_POLL_TIMEOUT", 25))
+
+# How often a waiting request checks whether another process wrote the file
+PICKLIST_DISK_CHECK_INTERVAL = 1.0
+
+# Logged ops kept before they are folded into a new snapshot
+PICKLIST_COMPACT_OPS = 200
+
+PICKLIST_DIR = Path(__file__).resolve().parent.parent / 'picklists'
+
+PICKLIST_TIERS = 5
+
+
+class PicklistConflict(Exception):
+    """A full replace was based on an older version than the stored one"""
+
+    def __init__(self, current):
+        super().__init__(f"picklist is at version {current.version}")
+        self.current = current
+
+
+def empty_picklist():
+    return [[] for _ in range(PICKLIST_TIERS)]
+
+
+def apply_op(data, op):
+    """
+    Apply one op to a picklist in place. Ops name teams rather than
+    positions, so edits made from different versions still merge:
+      {"type": "move", "team": 254, "tier": 1, "index": 0}
+          take the team out of whichever tier holds it and insert it at index
+      {"type": "swap", "teams": [254, 1678]}
+          exchange the places of two teams
+      {"type": "replace", "data": [[...], [...], [...], [...], [...]]}
+          overwrite every tier
+    Raises ValueError for a malformed op.
+    """
+    try:
+        kind = op['type']
+        if kind == 'move':
+            team, tier, index = int(op['team']), int(op['tier']), int(op['index'])
+            if not 0 <= tier < PICKLIST_TIERS:
+                raise ValueError(f"tier must be between 0 and {PICKLIST_TIERS - 1}")
+            for teams in data:
+                if team in teams:
+                    teams.remove(team)
+            data[tier].insert(max(0, min(index, len(data[tier]))), team)
+        elif kind == 'swap':
+            first, second = (int(team) for team in op['teams'])
+            positions = {team: (tier, teams.index(team))
+                         for tier, teams in enumerate(data) for team in (first, second) if team in teams}
+            if len(positions) == 2:
+                (tier_a, index_a), (tier_b, index_b) = positions[first], positions[second]
+                data[tier_a][index_a], data[tier_b][index_b] = second, first
+        elif kind == 'replace':
+            tiers = [[int(team) for team in teams] for teams in op['data']]
+            if len(tiers) != PICKLIST_TIERS:
+                raise ValueError(f"a picklist has {PICKLIST_TIERS} tiers")
+            data[:] = tiers
+        else:
+            raise ValueError(f"unknown picklist op {kind!r}")
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"malformed picklist op: {e!r}")
+
+
+class Picklist:
+    """
+    One event's picklist at `version`. ops holds the logged
+    {'version', 'op', 'client'} entries newer than the snapshot it was built
+    from, so clients at snapshot_version or later can be sent just those.
+    """
+
+    def __init__(self, version=0, data=None, snapshot_version=0, ops=None, stamp=None, log_offset=0):
+        self.version = version
+        self.data = data if data is not None else empty_picklist()
+        self.snapshot_version = snapshot_version
+        self.ops = ops or []
+        self.stamp = stamp
+        self.log_offset = log_offset
+
+    def ops_since(self, version):
+        """Logged entries after version, or None if they were compacted away"""
+        if version < self.snapshot_version:
+            return None
+        return [entry for entry in self.ops if entry['version'] > version]
+
+
+class PicklistStore:
+    """Snapshot and op log files for each event, written under an exclusive lock"""
+
+    def __init__(self, directory=PICKLIST_DIR, compact_ops=PICKLIST_COMPACT_OPS):
+        self.directory = Path(directory)
+        self.compact_ops = compact_ops
+        self._thread_lock = threading.Lock()
+
+    def path(self, comp_code):
+        return self.directory / f'picklist_{comp_code}.json'
+
+    def log_path(self, comp_code):
+        return self.directory / f'picklist_{comp_code}.log'
+
+    def stamp(self, comp_code):
+        """
+        (snapshot identity, log identity, log size) without reading either
+        file; the snapshot and log are replaced on compaction, the log grows
+        on every op
+        """
+        parts = []
+        for path in (self.path(comp_code), self.log_path(comp_code)):
+            try:
+                stat = path.stat()
+                parts.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                parts.append(None)
+        snapshot, log = parts
+        if snapshot is None and log is None:
+            return None
+        return snapshot, log and log[:1], log and log[2]
+
+    def load(self, comp_code, cached=None):
+        """
+        Current Picklist, or None if it was never saved. Given the previously
+        loaded Picklist, only log lines appended since then are read.
+        """
+        stamp = self.stamp(comp_code)
+        if stamp is None:
+            return None
+        if cached is not None and cached.stamp is not None and cached.stamp[:2] == stamp[:2]:
+            if cached.stamp == stamp:
+                return cached
+            picklist = Picklist(cached.version, [list(teams) for teams in cached.data],
+                                cached.snapshot_version, list(cached.ops), stamp, cached.log_offset)
+        else:
+            picklist = self._read_snapshot(comp_code)
+            picklist.stamp = stamp
+        self._read_log(comp_code, picklist)
+        return picklist
+
+    def _read_snapshot(self, comp_code):
+        try:
+            with open(self.path(comp_code), 'r') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return Picklist()
+        # Files from before versioning hold a bare list or a timestamped dict
+        if isinstance(snapshot, list):
+            snapshot = {'data': snapshot}
+        version = snapshot.get('version', 1)
+        return Picklist(version, snapshot['data'], version)
+
+    def _read_log(self, comp_code, picklist):
+        try:
+            with open(self.log_path(comp_code), 'rb') as f:
+                f.seek(picklist.log_offset)
+                lines = f.read()
+        except OSError:
+            return
+        # Only whole lines; a line still being appended is picked up next time
+        complete = lines[:lines.rfind(b'\n') + 1]
+        picklist.log_offset += len(complete)
+        for line in complete.splitlines():
+            entry = json.loads(line)
+            if entry['version'] <= picklist.version:
+                continue  # Already folded into the snapshot
+            apply_op(picklist.data, entry['op'])
+            picklist.version = entry['version']
+            picklist.ops.append(entry)
+
+    @contextmanager
+    def _locked(self, comp_code):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._thread_lock, open(self.directory / f'picklist_{comp_code}.lock', 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def apply(self, comp_code, ops, base_version=None, client=None):
+        """
+        Append ops to the log and return the resulting Picklist. With a
+        base_version, replace ops raise PicklistConflict unless it is the
+        stored version; moves and swaps always merge onto the latest picklist.
+        Raises ValueError if ops is not a list of ops or base_version not a
+        version number.
+        """
+        if not isinstance(ops, list) or not all(isinstance(op, dict) for op in ops):
+            raise ValueError("ops must be a list of picklist ops")
+        if base_version is not None and (not isinstance(base_version, int) or isinstance(base_version, bool)):
+            raise ValueError("version must be an integer")
+        with self._locked(comp_code):
+            picklist = self.load(comp_code) or Picklist()
+            if base_version is not None and base_version != picklist.version and \
+                    any(op.get('type') == 'replace' for op in ops):
+                raise PicklistConflict(picklist)
+
+            # Validate every op before anything is written
+            data = [list(teams) for teams in picklist.data]
+            entries = []
+            for op in ops:
+                apply_op(data, op)
+                entries.append({'version': picklist.version + len(entries) + 1, 'op': op, 'client': client})
+            if not entries:
+                return picklist
+
+            with open(self.log_path(comp_code), 'a') as f:
+                f.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+            picklist = self.load(comp_code, picklist)
+
+            if len(picklist.ops) >= self.compact_ops:
+                self.compact(comp_code, picklist)
+                picklist = self.load(comp_code)
+        return picklist
+
+    def compact(self, comp_code, picklist):
+        """Write picklist as the snapshot and empty the log. Caller holds the lock."""
+        snapshot = {'version': picklist.version, 'timestamp': int(time() * 1000), 'data': picklist.data}
+        # Snapshot first: a reader that sees the new snapshot with the old log
+        # skips the log entries the snapshot already contains
+        self._replace(self.path(comp_code), json.dumps(snapshot))
+        self._replace(self.log_path(comp_code), '')
+
+    def _replace(self, path, text):
+        # Write to a temp file and rename so readers never see half a file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+class PicklistChannel:
+    """
+    In-memory copy of each event's picklist. The version only ever increases,
+    so a client holding version N has seen every change once the server
+    reports something newer than N.
+
+    Other server processes append to the same log, so the cached copy is
+    checked against the files' stamp (a stat, not a read) before it is trusted.
+    """
+
+    def __init__(self, store=None):
+        self.store = store or PicklistStore()
+        self._picklists = {}
+        self._lock = threading.Lock()
+        # comp_code -> {(event loop, asyncio.Event)} of the requests waiting on it
+        self._waiters = {}
+
+    def current(self, comp_code):
+        """Latest Picklist, or None if it was never saved"""
+        with self._lock:
+            picklist = self.store.load(comp_code, self._picklists.get(comp_code))
+            self._picklists[comp_code] = picklist
+            return picklist
+
+    def publish(self, comp_code, ops, base_version=None, client=None):
+        """
+        Apply ops, wake every waiting client and return the new Picklist.
+        Raises PicklistConflict for a replace based on a stale version.
+        """
+        picklist = self.store.apply(comp_code, ops, base_version, client)
+        self.current(comp_code)
+        with self._lock:
+            waiters = list(self._waiters.get(comp_code, ()))
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # The waiter's loop has closed
+                pass
+        return picklist
+
+    async def await_newer(self, comp_code, since, timeout=PICKLIST_POLL_TIMEOUT):
+        """
+        Wait until the picklist is newer than version `since` or timeout
+        seconds pass, then return the current Picklist (None if never saved)
+        """
+        deadline = monotonic() + timeout
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.setdefault(comp_code, set()).add(waiter)
+        try:
+            while True:
+                # Cleared before the check, so a publish during it still wakes us
+                waiter[1].clear()
+                # current() takes the lock and stats the files, so off the event loop
+                picklist = await asyncio.to_thread(self.current, comp_code)
+                remaining = deadline - monotonic()
+                if (picklist and picklist.version > since) or remaining <= 0:
+                    return picklist
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), min(remaining, PICKLIST_DISK_CHECK_INTERVAL))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._lock:
+                self._waiters[comp_code].discard(waiter)
+                if not self._waiters[comp_code]:
+                    del self._waiters[comp_code]
+
+
+channel = PicklistChannel()
@@ -0,0 +1,119 @@
+"""
+Cached match previews for the dashboard.
+
+A preview is the dashboard's JSON payload for one scheduled match: the
+alliances plus every team's summary. Previews are cached per
+(event, quantifier, match number) until a scan lands for one of the match's
+teams or the schedule is stored again (store_match_schedule drops them once
+it commits). precompute_match_previews fills the cache for every match still
+to be played with two stats queries per quantifier.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Max
+
+from strategy.models import MatchAlliance
+from strategy.schedule import afind_match_alliances, find_match_alliances
+from strategy.stats import SUMMARY_KEYS, team_summaries
+from teams.models import Team_Match_Data
+
+# Seconds a preview is kept if nothing invalidates it first
+MATCH_PREVIEW_TIMEOUT = 60 * 60
+
+
+def preview_cache_key(event_key, quantifier, number):
+    return f"match_preview:{event_key}:{quantifier}:{number}"
+
+
+def build_match_preview(quantifier, match, summaries):
+    """
+    Dashboard payload for match ({"red": [...], "blue": [...]}) from already
+    loaded team_summaries; teams without scans get all zeros
+    """
+    def summary_for(team):
+        return summaries.get(int(team)) or dict.fromkeys(SUMMARY_KEYS, 0)
+
+    return {
+        'red': {team: summary_for(team) for team in match['red']},
+        'blue': {team: summary_for(team) for team in match['blue']},
+        'red_teams': list(match['red']),
+        'blue_teams': list(match['blue']),
+        'quantifier': quantifier,
+    }
+
+
+def get_match_preview(event_key, quantifier, number):
+    """Cached preview of one match, or None if the match is not in the schedule"""
+    key = preview_cache_key(event_key, quantifier, number)
+    preview = cache.get(key)
+    if preview is not None:
+        return preview
+
+    match = find_match_alliances(event_key, quantifier, number)
+    if match is None:
+        return None
+    preview = _load_match_preview(event_key, quantifier, match)
+    cache.set(key, preview, MATCH_PREVIEW_TIMEOUT)
+    return preview
+
+
+async def aget_match_preview(event_key, quantifier, number):
+    """get_match_preview for async views; a schedule miss is fetched from TBA without blocking"""
+    key = preview_cache_key(event_key, quantifier, number)
+    preview = await cache.aget(key)
+    if preview is not None:
+        return preview
+
+    match = await afind_match_alliances(event_key, quantifier, number)
+    if match is None:
+        return None
+    preview = await sync_to_async(_load_match_preview)(event_key, quantifier, match)
+    await cache.aset(key, preview, MATCH_PREVIEW_TIMEOUT)
+    return preview
+
+
+def _load_match_preview(event_key, quantifier, match):
+    # Every team in the match comes from the same two queries
+    summaries = team_summaries(event_key, quantifier, team_numbers=[int(team) for team in match['red'] + match['blue']])
+    return build_match_preview(quantifier, match, summaries)
+
+
+def precompute_match_previews(event_key):
+    """
+    Cache previews for every scheduled match after the last scanned one of its
+    quantifier. Returns the number of previews stored.
+    """
+    last_scanned = dict(
+        Team_Match_Data.objects.filter(event=event_key)
+        .values_list('quantifier').annotate(Max('match_number'))
+    )
+    upcoming = {}
+    for quantifier, number, color, team_number in MatchAlliance.objects.filter(
+        match__event=event_key
+    ).order_by('match__number', 'color', 'station').values_list(
+        'match__quantifier', 'match__number', 'color', 'team_number'
+    ):
+        if number <= last_scanned.get(quantifier, 0):
+            continue
+        match = upcoming.setdefault((quantifier, number), {"red": [], "blue": []})
+        match[color].append(str(team_number))
+
+    previews = {}
+    for quantifier in {quantifier for quantifier, _ in upcoming}:
+        summaries = team_summaries(event_key, quantifier)
+        for (match_quantifier, number), match in upcoming.items():
+            if match_quantifier == quantifier:
+                previews[preview_cache_key(event_key, quantifier, number)] = build_match_preview(
+                    quantifier, match, summaries)
+
+    cache.set_many(previews, MATCH_PREVIEW_TIMEOUT)
+    return len(previews)
+
+
+def invalidate_team_previews(event_key, team_numbers):
+    """Drop the cached previews of every scheduled match one of team_numbers plays in"""
+    matches = MatchAlliance.objects.filter(
+        match__event=event_key, team_number__in=team_numbers
+    ).values_list('match__quantifier', 'match__number').distinct()
+    cache.delete_many([preview_cache_key(event_key, quantifier, number) for quantifier, number in matches])
+
@@ -0,0 +1,138 @@
+"""
+Local copy of an event's match schedule.
+
+sync_match_schedule pulls the whole schedule from TBA in one call and stores
+it as Match / MatchAlliance rows, so the dashboard can resolve a match's
+alliances with an indexed lookup instead of a live TBA request. A match that
+is not stored (a typo, or one TBA hasn't scheduled yet) syncs the schedule at
+most once per SCHEDULE_SYNC_INTERVAL per event, whoever asks: the first miss
+claims the interval with cache.add, later misses get None until it ends. The
+a-prefixed functions are the same for async views, fetching from TBA without
+blocking.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+
+from api.tba import aget_match_schedule, get_match_schedule
+from strategy.models import Match, MatchAlliance
+
+# TBA comp_level values in the order they are played
+PLAYOFF_LEVELS = ('ef', 'qf', 'sf', 'f')
+QUANTIFIER_LEVELS = {'qm': 'Quals', 'pm': 'Prac'}
+
+# Seconds between schedule syncs triggered by lookups of unknown matches
+SCHEDULE_SYNC_INTERVAL = 60
+
+
+def _sync_claim_key(event_key):
+    return f"schedule_sync:{event_key}"
+
+
+def sync_match_schedule(event_key):
+    """Replace the stored schedule for event_key with TBA's. Returns the number of matches."""
+    return store_match_schedule(event_key, get_match_schedule(event_key))
+
+
+def store_match_schedule(event_key, schedule):
+    """
+    Replace the stored schedule for event_key with TBA's /matches/simple
+    response. Matches and alliances are upserted, so concurrent syncs of the
+    same event don't collide on Match.key; anything TBA no longer lists is
+    deleted. The cached previews of every match before or after the sync are
+    dropped once it commits.
+    """
+    # Playoffs are numbered the way scouts count them: 1, 2, 3... across every
+    # round, e.g. double elimination sf1m1..sf13m1 then f1m1..f1m3 as 1..16
+    playoffs = sorted(
+        (raw for raw in schedule if raw['comp_level'] in PLAYOFF_LEVELS),
+        key=lambda raw: (PLAYOFF_LEVELS.index(raw['comp_level']), raw['set_number'], raw['match_number'])
+    )
+    playoff_numbers = {raw['key']: number for number, raw in enumerate(playoffs, start=1)}
+
+    matches = []
+    alliances = []
+    # Sorted so concurrent upserts lock rows in the same order
+    for raw in sorted(schedule, key=lambda raw: raw['key']):
+        match = Match(
+            event=event_key,
+            key=raw['key'],
+            comp_level=raw['comp_level'],
+            set_number=raw.get('set_number', 1),
+            match_number=raw['match_number'],
+            quantifier=QUANTIFIER_LEVELS.get(raw['comp_level'], 'Playoff'),
+            number=playoff_numbers.get(raw['key'], raw['match_number']),
+        )
+        matches.append(match)
+        for color in ('red', 'blue'):
+            for station, team_key in enumerate(raw['alliances'][color]['team_keys'], start=1):
+                alliances.append(MatchAlliance(match=match, color=color, station=station,
+                                               team_number=int(team_key[3:])))
+
+    with transaction.atomic():
+        stored = Match.objects.filter(event=event_key)
+        previews = set(stored.values_list('quantifier', 'number'))
+        stored.exclude(key__in=[match.key for match in matches]).delete()
+        # Sets each match's primary key, inserted or updated, which the alliances pick up
+        Match.objects.bulk_create(
+            matches, update_conflicts=True, unique_fields=['key'],
+            update_fields=['event', 'comp_level', 'set_number', 'match_number', 'quantifier', 'number'],
+        )
+        MatchAlliance.objects.bulk_create(alliances, update_conflicts=True, unique_fields=['match', 'color', 'station'],
+                                          update_fields=['team_number'])
+        # Stations a match no longer has
+        MatchAlliance.objects.filter(match__in=matches).exclude(id__in=[alliance.id for alliance in alliances]).delete()
+
+        previews |= {(match.quantifier, match.number) for match in matches}
+        transaction.on_commit(lambda: _invalidate_previews(event_key, previews))
+
+    return len(matches)
+
+
+def _invalidate_previews(event_key, matches):
+    """Drop the cached previews of (quantifier, number) matches"""
+    # Imported here, strategy.previews reads the schedule through this module
+    from strategy.previews import preview_cache_key
+
+    cache.delete_many([preview_cache_key(event_key, quantifier, number) for quantifier, number in matches])
+
+
+def get_match_alliances(event_key, quantifier, number):
+    """
+    {"red": [...], "blue": [...]} team numbers (as strings) for a match, or
+    None if it is not in the schedule
+    """
+    rows = MatchAlliance.objects.filter(
+        match__event=event_key,
+        match__quantifier=quantifier,
+        match__number=number,
+    ).order_by('color', 'station').values_list('color', 'team_number')
+
+    match = {"red": [], "blue": []}
+    for color, team_number in rows:
+        match[color].append(str(team_number))
+    if not match["red"] and not match["blue"]:
+        return None
+    return match
+
+
+def find_match_alliances(event_key, quantifier, number):
+    """
+    get_match_alliances, syncing the schedule from TBA if the match is missing
+    and no sync of the event was claimed in the last SCHEDULE_SYNC_INTERVAL
+    """
+    match = get_match_alliances(event_key, quantifier, number)
+    if match is None and cache.add(_sync_claim_key(event_key), True, SCHEDULE_SYNC_INTERVAL):
+        sync_match_schedule(event_key)
+        match = get_match_alliances(event_key, quantifier, number)
+    return match
+
+
+async def afind_match_alliances(event_key, quantifier, number):
+    """find_match_alliances for async views"""
+    match = await sync_to_async(get_match_alliances)(event_key, quantifier, number)
+    if match is None and await cache.aadd(_sync_claim_key(event_key), True, SCHEDULE_SYNC_INTERVAL):
+        schedule = await aget_match_schedule(event_key)
+        await sync_to_async(store_match_schedule)(event_key, schedule)
+        match = await sync_to_async(get_match_alliances)(event_key, quantifier, number)
+    return match
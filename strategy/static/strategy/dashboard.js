@@ -1,6 +1,6 @@
 console.log("Script loaded");
 
-const scoringFields = ["auto", "autoleave", "L1", "L2", "L3", "L4", "net", "missed_auto", "processor", "removed", "climb", "total", "defense", "start_pos"];
+const scoringFields = ["auto", "autoleave", "L1", "L2", "L3", "L4", "net", "missed_auto", "processor", "removed", "climb", "total", "defense", "start_pos", "consistency", "recent_form"];
 
 // Add a flag to track initialization
 if (window.dashboardInitialized) {
@@ -102,7 +102,7 @@ if (window.dashboardInitialized) {
                 console.error('Error:', error);
                 const dashboardTable = document.getElementById("dashboardTable");
                 if (dashboardTable) {
-                    dashboardTable.innerHTML = `<tr><td colspan="14">Error: ${error.message}</td></tr>`;
+                    dashboardTable.innerHTML = `<tr><td colspan="18">Error: ${error.message}</td></tr>`;
                 }
             });
         };
@@ -1,33 +1,81 @@
 let draggedItem = null;
 let saveTimeout = null;
 let lastUpdateTime = 0;
-let lastTimestamp = 0;
+let lastVersion = 0; // Picklist version these lists were built from
+const CLIENT_ID = Math.random().toString(36).slice(2); // Tags our own ops in the server's log
+const LIST_IDS = ['no_pick', '1st_pick', '2nd_pick', '3rd_pick', 'dnp'];
 const INACTIVITY_TIMEOUT = 3000; // 3 seconds of inactivity before auto-save
-const FETCH_UPDATE_INTERVAL = 5000; // Fetch updates every 10 seconds
+const RETRY_INTERVAL = 5000; // Wait before polling again after an error
 let isFetching = false; // To prevent overlapping fetch requests
+let pendingOps = []; // Edits the server has not accepted yet
 
-// Function to save to JSON file (frequent updates)
-function saveTemporary() {
-    const lists = ['no_pick', '1st_pick', '2nd_pick', '3rd_pick', 'dnp'];
-    const data = lists.map(listId => 
+function currentLists() {
+    return LIST_IDS.map(listId =>
         Array.from(document.getElementById(listId)?.children || [])
             .map(item => parseInt(item.id))
             .filter(id => !isNaN(id))
     );
+}
+
+// Body of a picklist POST: just the edits, or every tier when the server has
+// no picklist yet (replaces only apply if nobody saved since lastVersion)
+function picklistBody(ops) {
+    if (lastVersion === 0) {
+        return JSON.stringify({version: lastVersion, data: currentLists(), client: CLIENT_ID});
+    }
+    return JSON.stringify({version: lastVersion, ops: ops, client: CLIENT_ID});
+}
 
-    fetch(`/strategy/picklist/submit/?comp=${comp_code}`, {
+// POST the queued edits. If the request fails they go back in front of any
+// made meanwhile and are resent with the next save; only a 400, which the
+// same ops would get again, drops them.
+function postPicklist(url) {
+    const ops = pendingOps;
+    pendingOps = [];
+    return fetch(url, {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
+            'X-CSRFToken': getCookie('csrftoken')  // Include CSRF token if needed
         },
-        body: JSON.stringify(data)
+        body: picklistBody(ops)
     })
-    .then(response => response.json())
     .then(response => {
-        lastTimestamp = response.timestamp;
+        if (!response.ok && response.status !== 409) {
+            if (response.status !== 400) {
+                pendingOps = ops.concat(pendingOps);
+            }
+            throw new Error('Network response was not ok');
+        }
+        return response.json();
+    }, error => {
+        pendingOps = ops.concat(pendingOps);
+        throw error;
+    })
+    .then(handleSaveResponse);
+}
+
+// Send edits to the server's operation log (frequent updates)
+function sendOps(ops) {
+    pendingOps = pendingOps.concat(ops);
+    postPicklist(`/strategy/picklist/submit/?comp=${comp_code}`)
+    .catch(error => {
+        console.error('Error saving picklist, will resend:', error);
     });
 }
 
+// "merged" means someone else saved in between and "conflict" that our full
+// replace was stale; either way the server's lists replace ours
+function handleSaveResponse(response) {
+    if (response.status === 'merged' || response.status === 'conflict') {
+        updateLists(response.data);
+    }
+    if (response.version) {
+        lastVersion = Math.max(lastVersion, response.version);
+    }
+    return response;
+}
+
 // Function to save to database (infrequent updates)
 function saveToDB() {
     const saveButton = document.querySelector('.save-button');
@@ -36,28 +84,12 @@ function saveToDB() {
     
     saveButton.disabled = true;
 
-    const lists = ['no_pick', '1st_pick', '2nd_pick', '3rd_pick', 'dnp'];
-    const data = lists.map(listId => 
-        Array.from(document.getElementById(listId)?.children || [])
-            .map(item => parseInt(item.id))
-            .filter(id => !isNaN(id))
-    );
-
-    fetch(`/strategy/picklist/submit/?comp=${comp_code}&save_to_db=true`, {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-            'X-CSRFToken': getCookie('csrftoken')  // Include CSRF token if needed
-        },
-        body: JSON.stringify(data)
-    })
-    .then(response => {
-        if (!response.ok) {
-            throw new Error('Network response was not ok');
-        }
-        return response.json();
-    })
+    // The server saves its own merged picklist, we only send edits it has not accepted
+    postPicklist(`/strategy/picklist/submit/?comp=${comp_code}&save_to_db=true`)
     .then(data => {
+        if (data.status === 'conflict') {
+            throw new Error(data.message);
+        }
         triggerHapticFeedback();
         statusDiv.style.display = 'block';
         statusDiv.classList.add('success');
@@ -76,7 +108,9 @@ function saveToDB() {
         statusDiv.style.display = 'block';
         statusDiv.classList.add('error');
         statusDiv.classList.remove('success');
-        statusMessage.textContent = 'Error saving to database. Please try again.';
+        statusMessage.textContent = error.message === 'Picklist was changed by someone else'
+            ? 'Picklist was changed by someone else, their version is shown.'
+            : 'Error saving to database. Please try again.';
         saveButton.disabled = false;
 
         setTimeout(() => {
@@ -110,12 +144,13 @@ function createTeamElement(team) {
     `;
 }
 
-// Function to fetch updates with throttling
+// Long-poll for updates: the server holds the request until the picklist
+// changes past lastVersion (or times out), then we immediately ask again
 function fetchUpdates() {
     if (isFetching) return; // Prevent overlapping requests
     isFetching = true;
 
-    fetch(`/strategy/picklist/submit/?comp=${comp_code}&timestamp=${lastTimestamp}&t=${Date.now()}`, {
+    fetch(`/strategy/picklist/submit/?comp=${comp_code}&version=${lastVersion}&wait=true&t=${Date.now()}`, {
         headers: {
             'Cache-Control': 'no-cache',
             'Pragma': 'no-cache'
@@ -124,24 +159,67 @@ function fetchUpdates() {
     .then(response => response.json())
     .then(response => {
         if (response.status === 'updated') {
-            lastTimestamp = response.timestamp;
+            lastVersion = response.version;
             updateLists(response.data);
+        } else if (response.status === 'ops') {
+            lastVersion = Math.max(lastVersion, response.version);
+            applyOps(response.ops);
         } else if (response.status === 'no_change') {
-            lastTimestamp = response.timestamp;
+            lastVersion = response.version;
         }
         isFetching = false;
+        fetchUpdates();
     })
     .catch(error => {
         console.error('Error fetching updates:', error);
         isFetching = false;
+        setTimeout(fetchUpdates, RETRY_INTERVAL);
     });
 }
 
+// Apply other strategists' logged ops to our lists, ours are already shown
+function applyOps(entries) {
+    entries.filter(entry => entry.client !== CLIENT_ID).forEach(entry => {
+        const op = entry.op;
+        if (op.type === 'replace') {
+            updateLists(op.data);
+        } else if (op.type === 'move') {
+            const list = document.getElementById(LIST_IDS[op.tier]);
+            let item = document.getElementById(op.team);
+            if (!item) {
+                const holder = document.createElement('ul');
+                holder.innerHTML = createTeamElement(op.team);
+                item = holder.firstElementChild;
+            }
+            item.remove();
+            list.insertBefore(item, list.children[op.index] || null);
+        } else if (op.type === 'swap') {
+            const first = document.getElementById(op.teams[0]);
+            const second = document.getElementById(op.teams[1]);
+            if (first && second) {
+                const marker = document.createElement('li');
+                first.replaceWith(marker);
+                second.replaceWith(first);
+                marker.replaceWith(second);
+            }
+        }
+    });
+}
+
+// Op moving a team to where it now sits in the lists
+function moveOp(item) {
+    const list = item.parentNode;
+    return {
+        type: 'move',
+        team: parseInt(item.id),
+        tier: LIST_IDS.indexOf(list.id),
+        index: Array.from(list.children).indexOf(item)
+    };
+}
+
 // Function to update the lists with new data
 function updateLists(data) {
-    const lists = ['no_pick', '1st_pick', '2nd_pick', '3rd_pick', 'dnp'];
-    
-    lists.forEach((listId, index) => {
+    LIST_IDS.forEach((listId, index) => {
         const list = document.getElementById(listId);
         if (!list) return;
 
@@ -156,11 +234,11 @@ function updateLists(data) {
 }
 
 // Modified save function
-function save() {
+function save(ops) {
     if (saveTimeout) {
         clearTimeout(saveTimeout);
     }
-    saveTemporary();
+    sendOps(ops);
     resetInactivityTimer(); // Reset the inactivity timer
 }
 
@@ -235,7 +313,7 @@ function onDrop(ev) {
             list.appendChild(droppedItem);
         }
         
-        save();
+        save([moveOp(droppedItem)]);
     }
 
     if (draggedItem) {
@@ -270,7 +348,7 @@ function chosen(ev) {
             listItem.querySelector("s").replaceWith(normal);
         }
     }
-    save();
+    save([moveOp(listItem)]);
     resetInactivityTimer(); // Reset the inactivity timer
 }
 
@@ -295,13 +373,9 @@ function triggerHapticFeedback() {
     }
 }
 
-// Start the periodic updates when the page loads
+// Start listening for updates when the page loads
 document.addEventListener('DOMContentLoaded', function() {
-    // Initial fetch
     fetchUpdates();
-    
-    // Set up periodic updates with throttling
-    setInterval(fetchUpdates, FETCH_UPDATE_INTERVAL);
 
     // Start the inactivity timer
     resetInactivityTimer();
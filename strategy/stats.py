@@ -0,0 +1,270 @@
+"""
+Columnar statistics for every team at an event.
+
+EventStats pulls all Team_Match_Data rows for an event with one values_list
+query and packs them into a team x match x metric NumPy array. Teams with
+fewer matches are padded with NaN, so every statistic is a single nan-aware
+reduction over the match axis.
+
+team_summaries is what the rankings and dashboard show: means and first-scan
+values from one TeamEventAggregate row per team, plus the distribution of
+the total from a load of that single column.
+"""
+import operator
+from functools import cached_property, reduce
+
+import numpy as np
+from django.db.models import F
+
+from teams.models import AGGREGATE_FIELDS, AGGREGATE_MATCH_LIMIT, Team_Match_Data, TeamEventAggregate, Teams
+
+# Per-match metrics, as shown on the rankings and dashboard pages
+METRICS = ('autoleave', 'auto', 'L1', 'L2', 'L3', 'L4', 'net', 'processor',
+           'removed', 'climb', 'total', 'defense')
+
+# Summary keys about the spread of each team's total, which running sums cannot give
+DISTRIBUTION_KEYS = ('total_median', 'total_std', 'total_p25', 'total_p75', 'consistency', 'recent_form')
+
+# Keys of each team summary: metric means, first-scan values and distribution of the total
+SUMMARY_KEYS = METRICS + ('start_pos', 'missed_auto', 'matches') + DISTRIBUTION_KEYS
+
+# Decimal places shown for averaged values
+PRECISION = 3
+
+# Number of most recent matches averaged for recent form
+RECENT_MATCHES = 3
+
+_ROW_FIELDS = ('team_number', 'match_number', 'id', 'start_pos', 'missed_auto') + AGGREGATE_FIELDS
+
+# Team_Match_Data columns adding up to a scan's total
+TOTAL_FIELDS = ('auto_L1', 'auto_L2', 'auto_L3', 'auto_L4', 'auto_net', 'auto_processor',
+                'teleL1', 'teleL2', 'teleL3', 'teleL4', 'telenet', 'teleProcessor', 'climb')
+
+
+def _metric_columns(col):
+    """Derive the METRICS columns from {AGGREGATE_FIELDS name: column}, shape (rows, metrics)"""
+    auto = col['auto_L1'] + col['auto_L2'] + col['auto_L3'] + col['auto_L4'] + col['auto_net'] + col['auto_processor']
+    tele = col['teleL1'] + col['teleL2'] + col['teleL3'] + col['teleL4'] + col['telenet'] + col['teleProcessor']
+    return np.column_stack([
+        col['auto_leave'],
+        auto,
+        col['auto_L1'] + col['teleL1'],
+        col['auto_L2'] + col['teleL2'],
+        col['auto_L3'] + col['teleL3'],
+        col['auto_L4'] + col['teleL4'],
+        col['auto_net'] + col['telenet'],
+        col['auto_processor'] + col['teleProcessor'],
+        col['auto_removed'] + col['teleRemoved'],
+        col['climb'],
+        auto + tele + col['climb'],
+        col['defense_ranking'],
+    ]).astype(float)
+
+
+def _scans(comp_code, quantifier, team_numbers=None, registered_only=False):
+    """Team_Match_Data rows counted toward an event's stats"""
+    rows = Team_Match_Data.objects.filter(
+        event=comp_code,
+        quantifier=quantifier,
+        match_number__lt=AGGREGATE_MATCH_LIMIT,
+    )
+    if team_numbers is not None:
+        rows = rows.filter(team_number__in=team_numbers)
+    if registered_only:
+        rows = rows.filter(team_number__in=Teams.objects.filter(event=comp_code).values('team_number'))
+    return rows.order_by('team_number', 'match_number', 'id')
+
+
+def _slots(team_column):
+    """
+    Teams of a team-sorted column and where each row goes in a team x match
+    array: (teams, team_index, slot, width)
+    """
+    teams, starts, counts = np.unique(team_column, return_index=True, return_counts=True)
+    team_index = np.repeat(np.arange(len(teams)), counts)
+    slot = np.arange(len(team_column)) - np.repeat(starts, counts)
+    return teams, team_index, slot, counts.max() if len(counts) else 0
+
+
+class EventStats:
+    """
+    Team x match x metric array for one event and quantifier.
+    team_numbers[i] owns values[i]; match_numbers[i] holds the match number of
+    each filled slot, ordered by match number. Padding slots are NaN in values.
+    metrics names the last axis: METRICS, or just 'total' after load_totals.
+    """
+
+    def __init__(self, team_numbers, match_numbers, values, start_pos, missed_auto, metrics=METRICS):
+        self.team_numbers = team_numbers
+        self.match_numbers = match_numbers
+        self.values = values
+        self.start_pos = start_pos
+        self.missed_auto = missed_auto
+        self.metrics = metrics
+        self.match_counts = (~np.isnan(values[:, :, 0])).sum(axis=1)
+        self._index = {int(team): i for i, team in enumerate(team_numbers)}
+
+    @classmethod
+    def load(cls, comp_code, quantifier, team_numbers=None, registered_only=False):
+        """
+        Load an event with one query. team_numbers limits the load to those
+        teams; registered_only drops teams without a Teams row for the event.
+        """
+        rows = _scans(comp_code, quantifier, team_numbers, registered_only)
+        raw = np.array(rows.values_list(*_ROW_FIELDS), dtype=np.int64).reshape(-1, len(_ROW_FIELDS))
+        return cls.from_rows(raw)
+
+    @classmethod
+    def load_totals(cls, comp_code, quantifier, team_numbers=None, registered_only=False):
+        """
+        Like load, but only each scan's total, summed by the database.
+        Enough for distributions(); the means come from TeamEventAggregate.
+        """
+        rows = _scans(comp_code, quantifier, team_numbers, registered_only)
+        raw = np.array(
+            rows.values_list('team_number', reduce(operator.add, map(F, TOTAL_FIELDS))),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        teams, team_index, slot, width = _slots(raw[:, 0])
+        values = np.full((len(teams), width, 1), np.nan)
+        values[team_index, slot, 0] = raw[:, 1]
+        return cls(teams, None, values, None, None, metrics=('total',))
+
+    @classmethod
+    def from_rows(cls, raw):
+        """Build from an int array of _ROW_FIELDS rows sorted by team, match and id"""
+        teams, team_index, slot, width = _slots(raw[:, 0])
+
+        values = np.full((len(teams), width, len(METRICS)), np.nan)
+        values[team_index, slot] = _metric_columns({field: raw[:, i] for i, field in enumerate(_ROW_FIELDS)})
+        match_numbers = np.zeros((len(teams), width), dtype=np.int64)
+        match_numbers[team_index, slot] = raw[:, 1]
+
+        # start_pos and missed_auto are taken from each team's earliest scan
+        by_id = np.lexsort((raw[:, 2], raw[:, 0]))
+        first = by_id[np.searchsorted(raw[by_id, 0], teams)]
+
+        return cls(teams, match_numbers, values, raw[first, 3], raw[first, 4])
+
+    def __contains__(self, team_number):
+        return int(team_number) in self._index
+
+    def _nan_reduce(self, func, *args):
+        if not len(self.team_numbers):
+            return np.zeros((0, len(self.metrics)))
+        return func(self.values, *args, axis=1)
+
+    def means(self):
+        return self._nan_reduce(np.nanmean)
+
+    def medians(self):
+        return self._nan_reduce(np.nanmedian)
+
+    def stds(self):
+        return self._nan_reduce(np.nanstd)
+
+    def percentiles(self, q):
+        """Array of shape (len(q), teams, metrics)"""
+        if not len(self.team_numbers):
+            return np.zeros((len(q), 0, len(self.metrics)))
+        return np.nanpercentile(self.values, q, axis=1)
+
+    def consistency(self):
+        """mean / (mean + std) per metric: 1 is perfectly repeatable, 0 when nothing is scored"""
+        means = self.means()
+        spread = means + self.stds()
+        return np.divide(means, spread, out=np.zeros_like(means), where=spread > 0)
+
+    def recent_form(self, matches=RECENT_MATCHES):
+        """Average over each team's last `matches` scans"""
+        if not len(self.team_numbers):
+            return np.zeros((0, len(self.metrics)))
+        slots = np.arange(self.values.shape[1])
+        recent = slots >= (self.match_counts[:, None] - matches)
+        return np.nanmean(np.where(recent[:, :, None], self.values, np.nan), axis=1)
+
+    def distributions(self):
+        """{team_number: {key: value}} of DISTRIBUTION_KEYS for every loaded team"""
+        total = self.metrics.index('total')
+        columns = dict(zip(DISTRIBUTION_KEYS, [
+            self.medians(), self.stds(), *self.percentiles([25, 75]), self.consistency(), self.recent_form(),
+        ]))
+        return {
+            int(team_number): {key: round(float(column[i, total]), PRECISION) for key, column in columns.items()}
+            for i, team_number in enumerate(self.team_numbers)
+        }
+
+    @cached_property
+    def _summaries(self):
+        means, distributions = self.means(), self.distributions()
+
+        summaries = {}
+        for i, team_number in enumerate(self.team_numbers):
+            summary = {metric: round(float(means[i, k]), PRECISION) for k, metric in enumerate(METRICS)}
+            summary.update({
+                'start_pos': int(self.start_pos[i]),
+                'missed_auto': int(self.missed_auto[i]),
+                'matches': int(self.match_counts[i]),
+            })
+            summary.update(distributions[int(team_number)])
+            summaries[int(team_number)] = summary
+        return summaries
+
+    def summaries(self):
+        """{team_number: summary} for every loaded team, keyed by SUMMARY_KEYS"""
+        return self._summaries
+
+    def summary_for(self, team_number):
+        """Summary of one team, all zeros when it has no matches loaded"""
+        if team_number not in self:
+            return dict.fromkeys(SUMMARY_KEYS, 0)
+        return self._summaries[int(team_number)]
+
+    def metric_table(self, team_number):
+        """Per-metric rows of mean/median/std/p25/p75/recent for one team's page"""
+        i = self._index[int(team_number)]
+        columns = {
+            'mean': self.means()[i],
+            'median': self.medians()[i],
+            'std': self.stds()[i],
+            'p25': self.percentiles([25])[0, i],
+            'p75': self.percentiles([75])[0, i],
+            'recent': self.recent_form()[i],
+        }
+        return [
+            dict({'metric': metric}, **{name: round(float(column[k]), PRECISION) for name, column in columns.items()})
+            for k, metric in enumerate(METRICS)
+        ]
+
+
+def team_summaries(comp_code, quantifier, team_numbers=None, registered_only=False):
+    """
+    {team_number: summary} keyed by SUMMARY_KEYS, the same as
+    EventStats.load(...).summaries() in two queries: one TeamEventAggregate row
+    per team for the means, and each scan's total for DISTRIBUTION_KEYS.
+    """
+    aggregates = TeamEventAggregate.objects.filter(event=comp_code, quantifier=quantifier, match_count__gt=0)
+    if team_numbers is not None:
+        aggregates = aggregates.filter(team_number__in=team_numbers)
+    if registered_only:
+        aggregates = aggregates.filter(team_number__in=Teams.objects.filter(event=comp_code).values('team_number'))
+    rows = np.array(
+        aggregates.order_by('team_number').values_list(
+            'team_number', 'match_count', 'start_pos', 'missed_auto', *(f'sum_{field}' for field in AGGREGATE_FIELDS)
+        ),
+        dtype=np.int64,
+    ).reshape(-1, 4 + len(AGGREGATE_FIELDS))
+    if not len(rows):
+        return {}
+
+    counts = rows[:, 1].astype(float)
+    means = _metric_columns({field: rows[:, 4 + i] / counts for i, field in enumerate(AGGREGATE_FIELDS)})
+    distributions = EventStats.load_totals(comp_code, quantifier, rows[:, 0].tolist()).distributions()
+
+    summaries = {}
+    for i, (team_number, matches, start_pos, missed_auto) in enumerate(rows[:, :4].tolist()):
+        summary = {metric: round(float(means[i, k]), PRECISION) for k, metric in enumerate(METRICS)}
+        summary.update({'start_pos': start_pos, 'missed_auto': missed_auto, 'matches': matches})
+        summary.update(distributions.get(team_number, dict.fromkeys(DISTRIBUTION_KEYS, 0)))
+        summaries[team_number] = summary
+    return summaries
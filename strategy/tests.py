@@ -1,3 +1,685 @@
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
 
 # Create your tests here.
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from time import monotonic
+from unittest import mock
+
+import httpx
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.db.models import Avg, F
+from django.urls import reverse
+
+from teams.models import AGGREGATE_MATCH_LIMIT, Teams, Team_Match_Data
+from api.tba import AsyncTBAClient, TBAClient
+from scouting_backend import timing
+from scouting_backend.caches import CACHE_BACKENDS, cache_config
+from scouting_backend.database import database_config
+from .caching import asaved_picklist, saved_picklist
+from .models import Match, MatchAlliance, PickList_Data
+from .picklists import PicklistChannel, PicklistConflict, PicklistStore, apply_op, empty_picklist
+from .previews import get_match_preview, precompute_match_previews, preview_cache_key
+from .schedule import find_match_alliances, get_match_alliances, store_match_schedule, sync_match_schedule
+from .stats import METRICS, EventStats, team_summaries
+
+
+class RankingsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for team_number in range(1, 31):
+            Teams.objects.create(team_number=team_number, event="2025test")
+            for match_number in range(1, 4):
+                Team_Match_Data.objects.create(team_number=team_number, event="2025test",
+                                               match_number=match_number, scout_name="Scout A",
+                                               teleL1=team_number)
+        # Scouted at the event but never registered as a team there
+        Team_Match_Data.objects.create(team_number=9999, event="2025test", match_number=1, scout_name="Scout A")
+
+    def test_rankings_uses_two_queries(self):
+        # Team aggregates, then each scan's total
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('rankings'), {'comp': "2025test", 'quantifier': "Quals"})
+        self.assertEquals(response.status_code, 200)
+
+    def test_rankings_lists_registered_teams_in_order(self):
+        response = self.client.get(reverse('rankings'), {'comp': "2025test"})
+        team_averages = response.context['team_averages']
+        self.assertEquals(list(team_averages), list(range(1, 31)))
+        self.assertEquals(team_averages[7]['L1'], 7)
+        self.assertEquals(team_averages[7]['total'], 7)
+
+    def test_rankings_without_event(self):
+        response = self.client.get(reverse('rankings'))
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.context['team_averages'], {})
+
+    def test_rankings_filters_by_quantifier(self):
+        response = self.client.get(reverse('rankings'), {'comp': "2025test", 'quantifier': "Prac"})
+        self.assertEquals(response.context['team_averages'], {})
+
+    def test_rankings_cached_until_a_scan_is_saved(self):
+        self.client.get(reverse('rankings'), {'comp': "2025test"})
+        with self.assertNumQueries(0):
+            self.client.get(reverse('rankings'), {'comp': "2025test"})
+        with self.captureOnCommitCallbacks(execute=True):
+            Team_Match_Data.objects.create(team_number=7, event="2025test", match_number=4,
+                                           scout_name="Scout A", teleL1=11)
+        response = self.client.get(reverse('rankings'), {'comp': "2025test"})
+        self.assertEquals(response.context['team_averages'][7]['L1'], 8)
+
+    def test_deleted_scan_drops_out_of_rankings(self):
+        Team_Match_Data.objects.create(team_number=7, event="2025test", match_number=4,
+                                       scout_name="Scout A", teleL1=11)
+        self.assertEquals(self.client.get(reverse('rankings'), {'comp': "2025test"})
+                          .context['team_averages'][7]['L1'], 8)
+        with self.captureOnCommitCallbacks(execute=True):
+            Team_Match_Data.objects.get(team_number=7, match_number=4).delete()
+        response = self.client.get(reverse('rankings'), {'comp': "2025test"})
+        self.assertEquals(response.context['team_averages'][7]['L1'], 7)
+
+    def test_deleting_a_team_invalidates_rankings(self):
+        self.client.get(reverse('rankings'), {'comp': "2025test"})
+        with self.captureOnCommitCallbacks(execute=True):
+            Teams.objects.get(team_number=7, event="2025test").delete()
+        response = self.client.get(reverse('rankings'), {'comp': "2025test"})
+        self.assertNotIn(7, response.context['team_averages'])
+
+
+class EventStatsTests(TestCase):
+
+    def setUp(self):
+        # Team 1 scores 2, 4, 6, 8 total; team 2 plays a single match
+        for match_number, teleL1 in enumerate([2, 4, 6, 8], start=1):
+            Team_Match_Data.objects.create(team_number=1, event="2025test", match_number=match_number,
+                                           scout_name="Scout A", teleL1=teleL1, start_pos=match_number)
+        Team_Match_Data.objects.create(team_number=2, event="2025test", match_number=3,
+                                       scout_name="Scout A", teleL4=5, climb=3)
+        Team_Match_Data.objects.create(team_number=2, event="2025test", match_number=120,
+                                       scout_name="Scout A", teleL4=50)
+
+    def test_load_is_one_query(self):
+        with self.assertNumQueries(1):
+            stats = EventStats.load("2025test", "Quals")
+        self.assertEquals(stats.values.shape, (2, 4, len(METRICS)))
+
+    def test_summaries(self):
+        summaries = EventStats.load("2025test", "Quals").summaries()
+
+        self.assertEquals(summaries[1]['total'], 5)
+        self.assertEquals(summaries[1]['total_median'], 5)
+        self.assertEquals(summaries[1]['total_std'], round(float(np.std([2, 4, 6, 8])), 3))
+        self.assertEquals(summaries[1]['recent_form'], 6)
+        self.assertEquals(summaries[1]['start_pos'], 1)
+        self.assertEquals(summaries[2]['total'], 8)
+        self.assertEquals(summaries[2]['matches'], 1)
+        self.assertEquals(summaries[2]['consistency'], 1)
+
+    def test_means_match_orm_averages(self):
+        summaries = EventStats.load("2025test", "Quals").summaries()
+        for team_number in (1, 2):
+            expected = Team_Match_Data.objects.filter(
+                team_number=team_number, event="2025test", match_number__lt=AGGREGATE_MATCH_LIMIT
+            ).aggregate(L4=Avg(F('auto_L4') + F('teleL4')), climb=Avg('climb'))
+            self.assertEquals(summaries[team_number]['L4'], expected['L4'])
+            self.assertEquals(summaries[team_number]['climb'], expected['climb'])
+
+    def test_team_summaries_match_full_load(self):
+        expected = EventStats.load("2025test", "Quals").summaries()
+        self.assertEquals(team_summaries("2025test", "Quals"), expected)
+        self.assertEquals(team_summaries("2025test", "Quals", team_numbers=[2]), {2: expected[2]})
+
+    def test_team_summaries_follow_overwrites_and_deletes(self):
+        scan = Team_Match_Data.objects.get(team_number=1, match_number=4)
+        scan.teleL1 = 20
+        scan.save()
+        Team_Match_Data.objects.get(team_number=2, match_number=3).delete()
+        summaries = team_summaries("2025test", "Quals")
+        self.assertEquals(summaries, EventStats.load("2025test", "Quals").summaries())
+        self.assertEquals(summaries[1]['total'], 8)
+        self.assertNotIn(2, summaries)
+
+    def test_summary_for_team_without_data(self):
+        stats = EventStats.load("2025test", "Quals", team_numbers=[254])
+        self.assertEquals(stats.summary_for("254")['total'], 0)
+
+    def test_metric_table(self):
+        rows = EventStats.load("2025test", "Quals", team_numbers=[1]).metric_table(1)
+        total = next(row for row in rows if row['metric'] == 'total')
+        self.assertEquals((total['p25'], total['p75']), (3.5, 6.5))
+
+
+def tba_match(key, comp_level, set_number, match_number, red, blue):
+    return {
+        "key": key, "comp_level": comp_level, "set_number": set_number, "match_number": match_number,
+        "alliances": {
+            "red": {"team_keys": [f"frc{team}" for team in red]},
+            "blue": {"team_keys": [f"frc{team}" for team in blue]},
+        },
+    }
+
+
+SCHEDULE = [
+    tba_match("2025test_qm1", "qm", 1, 1, [1, 2, 3], [4, 5, 6]),
+    tba_match("2025test_qm2", "qm", 1, 2, [7, 8, 9], [10, 11, 12]),
+    tba_match("2025test_f1m2", "f", 1, 2, [1, 2, 3], [10, 11, 12]),
+    tba_match("2025test_sf2m1", "sf", 2, 1, [7, 8, 9], [4, 5, 6]),
+    tba_match("2025test_sf1m1", "sf", 1, 1, [1, 2, 3], [4, 5, 6]),
+    tba_match("2025test_f1m1", "f", 1, 1, [1, 2, 3], [10, 11, 12]),
+]
+
+
+@mock.patch('strategy.schedule.get_match_schedule', return_value=SCHEDULE)
+class MatchScheduleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # The dashboard is async and fetches with the async client
+        patcher = mock.patch('strategy.schedule.aget_match_schedule', return_value=SCHEDULE)
+        self.aget_match_schedule = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sync_stores_every_match(self, get_match_schedule):
+        self.assertEquals(sync_match_schedule("2025test"), 6)
+        self.assertEquals(Match.objects.filter(event="2025test").count(), 6)
+        self.assertEquals(MatchAlliance.objects.count(), 36)
+
+    def test_playoffs_are_numbered_in_play_order(self, get_match_schedule):
+        sync_match_schedule("2025test")
+        numbers = dict(Match.objects.filter(quantifier="Playoff").values_list('key', 'number'))
+        self.assertEquals(numbers, {"2025test_sf1m1": 1, "2025test_sf2m1": 2,
+                                    "2025test_f1m1": 3, "2025test_f1m2": 4})
+
+    def test_resync_replaces_schedule(self, get_match_schedule):
+        sync_match_schedule("2025test")
+        sync_match_schedule("2025test")
+        self.assertEquals(Match.objects.count(), 6)
+        self.assertEquals(MatchAlliance.objects.count(), 36)
+
+    def test_resync_updates_matches_in_place(self, get_match_schedule):
+        sync_match_schedule("2025test")
+        ids = dict(Match.objects.values_list('key', 'id'))
+        # qm2 gets a new red 1, sf2m1 is dropped
+        schedule = [tba_match("2025test_qm2", "qm", 1, 2, [13, 8, 9], [10, 11, 12])] + \
+                   [raw for raw in SCHEDULE if raw['key'] not in ("2025test_qm2", "2025test_sf2m1")]
+        self.assertEquals(store_match_schedule("2025test", schedule), 5)
+        self.assertEquals(dict(Match.objects.values_list('key', 'id')),
+                          {key: id for key, id in ids.items() if key != "2025test_sf2m1"})
+        self.assertEquals(get_match_alliances("2025test", "Quals", 2)['red'], ["13", "8", "9"])
+        self.assertEquals(MatchAlliance.objects.count(), 30)
+
+    def test_unknown_match_syncs_once_per_interval(self, get_match_schedule):
+        self.assertIsNone(find_match_alliances("2025test", "Quals", 99))
+        self.assertIsNone(find_match_alliances("2025test", "Quals", 98))
+        get_match_schedule.assert_called_once_with("2025test")
+        # The sync stored the rest of the schedule
+        self.assertEquals(find_match_alliances("2025test", "Quals", 1)['red'], ["1", "2", "3"])
+        cache.clear()
+        find_match_alliances("2025test", "Quals", 99)
+        self.assertEquals(get_match_schedule.call_count, 2)
+
+    def test_get_match_alliances(self, get_match_schedule):
+        sync_match_schedule("2025test")
+        with self.assertNumQueries(1):
+            match = get_match_alliances("2025test", "Playoff", 4)
+        self.assertEquals(match, {"red": ["1", "2", "3"], "blue": ["10", "11", "12"]})
+        self.assertIsNone(get_match_alliances("2025test", "Quals", 99))
+
+    def test_dashboard_reads_stored_schedule(self, get_match_schedule):
+        sync_match_schedule("2025test")
+        get_match_schedule.reset_mock()
+        response = self.client.post(
+            reverse('dashboard') + "?comp=2025test",
+            json.dumps({"match_number": "3", "quantifier": "Playoff"}),
+            content_type="application/json",
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.json()['red_teams'], ["1", "2", "3"])
+        self.aget_match_schedule.assert_not_called()
+
+    def test_dashboard_syncs_missing_schedule(self, get_match_schedule):
+        response = self.client.post(
+            reverse('dashboard') + "?comp=2025test",
+            json.dumps({"match_number": "2", "quantifier": "Quals"}),
+            content_type="application/json",
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        self.assertEquals(response.json()['blue_teams'], ["10", "11", "12"])
+        self.aget_match_schedule.assert_awaited_once_with("2025test")
+
+    def test_dashboard_unknown_match(self, get_match_schedule):
+        response = self.client.post(
+            reverse('dashboard') + "?comp=2025test",
+            json.dumps({"match_number": "40", "quantifier": "Quals"}),
+            content_type="application/json",
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        self.assertEquals(response.status_code, 404)
+
+
+class MatchPreviewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('strategy.schedule.get_match_schedule', return_value=SCHEDULE)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        sync_match_schedule("2025test")
+        for team_number in (1, 2, 3, 4, 5, 6):
+            Team_Match_Data.objects.create(team_number=team_number, event="2025test", match_number=1,
+                                           scout_name="Scout A", teleL4=team_number)
+
+    def post_dashboard(self, match_number, quantifier="Quals"):
+        return self.client.post(
+            reverse('dashboard') + "?comp=2025test",
+            json.dumps({"match_number": str(match_number), "quantifier": quantifier}),
+            content_type="application/json",
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+
+    def test_preview_loads_all_teams_with_two_stats_queries(self):
+        # schedule lookup + aggregates and scan totals for all six teams
+        with self.assertNumQueries(3):
+            preview = get_match_preview("2025test", "Quals", 1)
+        self.assertEquals(preview['red']['2']['L4'], 2)
+        self.assertEquals(preview['blue_teams'], ["4", "5", "6"])
+
+    def test_cached_preview_needs_no_queries(self):
+        self.post_dashboard(1)
+        with self.assertNumQueries(0):
+            response = self.post_dashboard(1)
+        self.assertEquals(response.json()['red']['3']['L4'], 3)
+
+    def test_precompute_skips_played_matches(self):
+        self.assertEquals(precompute_match_previews("2025test"), 5)
+        self.assertIsNone(cache.get(preview_cache_key("2025test", "Quals", 1)))
+        self.assertIsNotNone(cache.get(preview_cache_key("2025test", "Quals", 2)))
+        self.assertIsNotNone(cache.get(preview_cache_key("2025test", "Playoff", 4)))
+
+    def test_schedule_sync_drops_previews(self):
+        precompute_match_previews("2025test")
+        schedule = [tba_match("2025test_qm2", "qm", 1, 2, [13, 8, 9], [10, 11, 12])] + \
+                   [raw for raw in SCHEDULE if raw['key'] != "2025test_qm2"]
+        with self.captureOnCommitCallbacks(execute=True):
+            store_match_schedule("2025test", schedule)
+        self.assertIsNone(cache.get(preview_cache_key("2025test", "Quals", 2)))
+        self.assertIsNone(cache.get(preview_cache_key("2025test", "Playoff", 4)))
+        self.assertEquals(self.post_dashboard(2).json()['red_teams'], ["13", "8", "9"])
+
+    def test_scan_invalidates_previews_of_its_team(self):
+        precompute_match_previews("2025test")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('scanner_bulk'), json.dumps([{
+                "teamNumber": 10, "matchNumber": 2, "name": "Scout A", "comp_code": "2025test",
+                "quantifier": "Quals", "teleL4": 7,
+            }]), content_type="application/json")
+
+        # Team 10 plays qm2 and every final, team 1's semifinal is untouched
+        self.assertIsNone(cache.get(preview_cache_key("2025test", "Quals", 2)))
+        self.assertIsNone(cache.get(preview_cache_key("2025test", "Playoff", 3)))
+        self.assertIsNotNone(cache.get(preview_cache_key("2025test", "Playoff", 1)))
+        self.assertEquals(self.post_dashboard(2).json()['blue']['10']['L4'], 7)
+
+
+def replace(*tiers):
+    return [{'type': 'replace', 'data': [list(tier) for tier in tiers] + [[]] * (5 - len(tiers))}]
+
+
+class PicklistOpTests(TestCase):
+
+    def test_move_takes_team_out_of_its_old_tier(self):
+        data = [[1, 2, 3], [4], [], [], []]
+        apply_op(data, {'type': 'move', 'team': 2, 'tier': 1, 'index': 0})
+        self.assertEquals(data, [[1, 3], [2, 4], [], [], []])
+
+    def test_move_clamps_index(self):
+        data = [[1, 2], [], [], [], []]
+        apply_op(data, {'type': 'move', 'team': 1, 'tier': 0, 'index': 99})
+        self.assertEquals(data, [[2, 1], [], [], [], []])
+
+    def test_swap(self):
+        data = [[1, 2], [3], [], [], []]
+        apply_op(data, {'type': 'swap', 'teams': [1, 3]})
+        self.assertEquals(data, [[3, 2], [1], [], [], []])
+
+    def test_malformed_ops(self):
+        for op in ({'type': 'move', 'team': 1, 'tier': 7, 'index': 0}, {'type': 'fly'}, {'team': 1},
+                   {'type': 'replace', 'data': [[1]]}):
+            with self.assertRaises(ValueError):
+                apply_op(empty_picklist(), op)
+
+
+class PicklistChannelTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = PicklistStore(directory.name)
+        self.channel = PicklistChannel(self.store)
+
+    def move(self, team, tier, index=0):
+        return [{'type': 'move', 'team': team, 'tier': tier, 'index': index}]
+
+    def test_versions_always_increase(self):
+        first = self.channel.publish("2025test", replace([1])).version
+        second = self.channel.publish("2025test", replace([2]) + self.move(2, 1)).version
+        self.assertEquals((first, second), (1, 3))
+        self.assertEquals(self.channel.current("2025test").data, [[], [2], [], [], []])
+
+    def test_stale_replace_is_rejected(self):
+        self.channel.publish("2025test", replace([1]), base_version=0)
+        self.channel.publish("2025test", replace([2]), base_version=1)
+        with self.assertRaises(PicklistConflict) as conflict:
+            self.channel.publish("2025test", replace([3]), base_version=1)
+        self.assertEquals(conflict.exception.current.version, 2)
+        self.assertEquals(self.channel.current("2025test").data[0], [2])
+
+    def test_concurrent_moves_merge(self):
+        self.channel.publish("2025test", replace([1, 2, 3]))
+        self.channel.publish("2025test", self.move(1, 1), base_version=1)
+        self.channel.publish("2025test", self.move(3, 2), base_version=1)
+        self.assertEquals(self.channel.current("2025test").data, [[2], [1], [3], [], []])
+
+    def test_invalid_op_is_not_logged(self):
+        self.channel.publish("2025test", replace([1]))
+        with self.assertRaises(ValueError):
+            self.channel.publish("2025test", self.move(1, 1) + [{'type': 'fly'}])
+        self.assertEquals(self.channel.current("2025test").version, 1)
+
+    def test_ops_since(self):
+        self.channel.publish("2025test", replace([1, 2]))
+        self.channel.publish("2025test", self.move(1, 1), client="laptop")
+        picklist = self.channel.current("2025test")
+        self.assertEquals(picklist.ops_since(1), [{'version': 2, 'op': self.move(1, 1)[0], 'client': "laptop"}])
+
+    def test_compaction(self):
+        self.store.compact_ops = 5
+        self.channel.publish("2025test", replace([1, 2, 3]))
+        for tier in range(5):
+            self.channel.publish("2025test", self.move(1, tier))
+        # The fifth op folded everything into a snapshot, the sixth starts a new log
+        picklist = self.channel.current("2025test")
+        self.assertEquals((picklist.version, picklist.snapshot_version, len(picklist.ops)), (6, 5, 1))
+        self.assertEquals(len(self.store.log_path("2025test").read_text().splitlines()), 1)
+        self.assertIsNone(picklist.ops_since(3))
+        self.assertEquals(len(picklist.ops_since(5)), 1)
+        self.assertEquals(PicklistStore(self.store.directory).load("2025test").data, [[2, 3], [], [], [], [1]])
+
+    def test_concurrent_writers_never_lose_a_version(self):
+        self.channel.publish("2025test", replace([1, 2, 3, 4]))
+
+        def writer(team):
+            for tier in range(20):
+                PicklistStore(self.store.directory, compact_ops=7).apply("2025test", self.move(team, tier % 5))
+        threads = [threading.Thread(target=writer, args=(team,)) for team in range(1, 5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        picklist = PicklistStore(self.store.directory).load("2025test")
+        self.assertEquals(picklist.version, 81)
+        self.assertEquals(sorted(sum(picklist.data, [])), [1, 2, 3, 4])
+
+    def test_apply_rejects_ops_that_are_not_a_list_of_dicts(self):
+        self.channel.publish("2025test", replace([1]))
+        for ops in (self.move(1, 1)[0], ["move"], None):
+            with self.assertRaises(ValueError):
+                self.store.apply("2025test", ops, base_version=0)
+        self.assertEquals(self.channel.current("2025test").version, 1)
+
+    def test_reads_files_from_before_versioning(self):
+        self.store.directory.mkdir(parents=True, exist_ok=True)
+        self.store.path("2025test").write_text(json.dumps({'timestamp': 5, 'data': [[1], [], [], [], []]}))
+        self.assertEquals(self.channel.current("2025test").version, 1)
+        self.assertEquals(self.channel.publish("2025test", replace([2]), base_version=1).version, 2)
+
+    def await_newer(self, since, timeout=5, comp_code="2025test"):
+        return async_to_sync(self.channel.await_newer)(comp_code, since, timeout=timeout)
+
+    def test_await_newer_returns_immediately_when_behind(self):
+        self.channel.publish("2025test", replace([1]))
+        self.assertEquals(self.await_newer(0).version, 1)
+
+    def test_await_newer_times_out_without_changes(self):
+        self.channel.publish("2025test", replace([1]))
+        self.assertEquals(self.await_newer(1, timeout=0.05).version, 1)
+        self.assertIsNone(self.await_newer(0, timeout=0.05, comp_code="2025other"))
+        self.assertEquals(self.channel._waiters, {})
+
+    @mock.patch('strategy.picklists.PICKLIST_DISK_CHECK_INTERVAL', 30)
+    def test_publish_wakes_waiters_without_disk_check(self):
+        self.channel.publish("2025test", replace([1]))
+        timer = threading.Timer(0.1, lambda: self.channel.publish("2025test", self.move(1, 2)))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        started = monotonic()
+        self.assertEquals(self.await_newer(1, timeout=10).version, 2)
+        self.assertLess(monotonic() - started, 5)
+
+    @mock.patch('strategy.picklists.PICKLIST_DISK_CHECK_INTERVAL', 0.05)
+    def test_await_newer_sees_other_processes_on_disk(self):
+        self.channel.publish("2025test", replace([1]))
+        other = PicklistChannel(PicklistStore(self.store.directory))
+        timer = threading.Timer(0.1, lambda: other.publish("2025test", self.move(1, 2)))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        self.assertEquals(self.await_newer(1).version, 2)
+
+    def test_await_newer_sees_publish_from_another_thread(self):
+        self.channel.publish("2025test", replace([1]))
+        timer = threading.Timer(0.1, lambda: self.channel.publish("2025test", self.move(1, 2)))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        self.assertEquals(async_to_sync(self.channel.await_newer)("2025test", 1, timeout=5).version, 2)
+        self.assertEquals(async_to_sync(self.channel.await_newer)("2025test", 2, timeout=0.05).version, 2)
+
+    def test_sees_appends_from_other_processes(self):
+        self.channel.publish("2025test", replace([1]))
+        self.channel.current("2025test")
+        PicklistChannel(PicklistStore(self.store.directory)).publish("2025test", self.move(1, 3))
+        self.assertEquals(self.channel.current("2025test").data[3], [1])
+
+    def post(self, body):
+        with mock.patch('strategy.views.channel', self.channel):
+            return self.client.post(reverse('picklist_submit') + "?comp=2025test", json.dumps(body),
+                                    content_type="application/json")
+
+    def get(self, version):
+        with mock.patch('strategy.views.channel', self.channel):
+            return self.client.get(reverse('picklist_submit'), {'comp': "2025test", 'version': version, 'wait': 'true'})
+
+    def test_submit_ops_and_long_poll(self):
+        self.assertEquals(self.post({'version': 0, 'data': [[1, 2], [], [], [], []]}).json()['version'], 1)
+        self.assertEquals(self.get(0).json(), {'status': 'updated', 'data': [[1, 2], [], [], [], []], 'version': 1})
+
+        response = self.post({'version': 1, 'ops': self.move(2, 1), 'client': "laptop"})
+        self.assertEquals(response.json()['status'], 'success')
+        self.assertEquals(self.get(1).json(), {
+            'status': 'ops', 'version': 2,
+            'ops': [{'version': 2, 'op': self.move(2, 1)[0], 'client': "laptop"}],
+        })
+
+    def test_submit_merges_concurrent_ops(self):
+        self.post({'version': 0, 'data': [[1, 2], [], [], [], []]})
+        self.post({'version': 1, 'ops': self.move(1, 1)})
+        response = self.post({'version': 1, 'ops': self.move(2, 2)}).json()
+        self.assertEquals(response, {'status': 'merged', 'message': 'Data saved successfully', 'version': 3,
+                                     'data': [[], [1], [2], [], []]})
+
+    def test_submit_stale_replace_conflicts(self):
+        self.channel.publish("2025test", replace([1]))
+        response = self.post({'version': 0, 'data': [[9], [], [], [], []]})
+        self.assertEquals(response.status_code, 409)
+        self.assertEquals(response.json()['data'], [[1], [], [], [], []])
+
+    def test_submit_rejects_bad_op(self):
+        self.channel.publish("2025test", replace([1]))
+        self.assertEquals(self.post({'version': 1, 'ops': [{'type': 'fly'}]}).status_code, 400)
+
+    def test_submit_rejects_malformed_body(self):
+        self.channel.publish("2025test", replace([1]))
+        for body in ({'version': 1, 'ops': self.move(1, 1)[0]}, {'version': 1, 'ops': ["move"]},
+                     {'version': "one", 'ops': self.move(1, 1)}, {'version': 1}, 7):
+            self.assertEquals(self.post(body).status_code, 400, body)
+        self.assertEquals(self.channel.current("2025test").version, 1)
+
+    def test_bad_version_is_rejected(self):
+        self.assertEquals(self.get("abc").status_code, 400)
+
+    def test_submit_saves_merged_picklist_to_db(self):
+        self.channel.publish("2025test", replace([1, 2]))
+        with mock.patch('strategy.views.channel', self.channel):
+            self.client.post(reverse('picklist_submit') + "?comp=2025test&save_to_db=true",
+                             json.dumps({'version': 1, 'ops': self.move(2, 4)}), content_type="application/json")
+        row = PickList_Data.objects.get(event="2025test")
+        self.assertEquals((row.no_pick, row.dn_pick), ([1], [2]))
+
+
+class CacheConfigTests(TestCase):
+
+    def test_backend_from_environment(self):
+        with mock.patch.dict('os.environ', {'CACHE_BACKEND': 'file', 'CACHE_LOCATION': '/tmp/scouting_cache'}):
+            config = cache_config('/srv/app')['default']
+        self.assertEquals((config['BACKEND'], config['LOCATION']), (CACHE_BACKENDS['file'], '/tmp/scouting_cache'))
+        with mock.patch.dict('os.environ', {'CACHE_LOCATION': ''}):
+            self.assertEquals(cache_config('/srv/app', 'db')['default']['LOCATION'], 'django_cache')
+        with mock.patch.dict('os.environ', {'CACHE_BACKEND': 'redis'}), self.assertRaises(ValueError):
+            cache_config('/srv/app')
+
+    def test_saved_picklist_cached_until_saved(self):
+        cache.clear()
+        self.assertIsNone(saved_picklist("2025test"))
+        with self.assertNumQueries(0):
+            self.assertIsNone(saved_picklist("2025test"))
+        with self.captureOnCommitCallbacks(execute=True):
+            PickList_Data.objects.create(event="2025test", first_pick=[254])
+        self.assertEquals(saved_picklist("2025test")['first_pick'], [254])
+        self.assertEquals(async_to_sync(asaved_picklist)("2025test")['first_pick'], [254])
+
+
+class DatabaseConfigTests(SimpleTestCase):
+    url = "postgres://scout@db.example.com:5432/scouting"
+
+    def test_persistent_connections_under_wsgi(self):
+        config = database_config(self.url, '/srv/db.sqlite3', pool=False, conn_max_age=600, asgi=False)
+        self.assertEquals(config['CONN_MAX_AGE'], 600)
+
+    def test_asgi_closes_connections_after_every_request(self):
+        config = database_config(self.url, '/srv/db.sqlite3', pool=False, conn_max_age=600, asgi=True)
+        self.assertEquals(config['CONN_MAX_AGE'], 0)
+        self.assertEquals(database_config(None, '/srv/db.sqlite3', conn_max_age=600, asgi=True)['CONN_MAX_AGE'], 0)
+
+    def test_pool_without_psycopg3_warns_and_keeps_connections(self):
+        with mock.patch('scouting_backend.database.pool_available', return_value=False):
+            with self.assertWarnsRegex(RuntimeWarning, "DB_POOL"):
+                config = database_config(self.url, '/srv/db.sqlite3', pool=True, conn_max_age=600, asgi=False)
+        self.assertNotIn('pool', config.get('OPTIONS', {}))
+        self.assertEquals(config['CONN_MAX_AGE'], 600)
+
+    def test_asgi_application_settings(self):
+        code = ("import scouting_backend.asgi; from django.conf import settings; "
+                "print(settings.DATABASES['default']['CONN_MAX_AGE'])")
+        env = {**os.environ, 'DATABASE_URL': self.url, 'DB_POOL': 'false', 'DB_CONN_MAX_AGE': '600'}
+        env.pop('DJANGO_ASGI', None)
+        result = subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR, capture_output=True, text=True,
+                                env=env)
+        self.assertEquals(result.returncode, 0, result.stderr)
+        self.assertEquals(result.stdout.splitlines()[-1], "0")
+
+
+class ColdStartTests(SimpleTestCase):
+
+    def test_startup_does_not_import_lazy_clients(self):
+        from benchmarks.import_time import LAZY_MODULES, STARTUP
+
+        code = f"{STARTUP}; import sys; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+        result = subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR, capture_output=True, text=True,
+                                env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'scouting_backend.settings'})
+        self.assertEquals(result.returncode, 0, result.stderr)
+        # Settings may print warnings first
+        self.assertEquals(result.stdout.splitlines()[-1], "")
+
+
+class RequestTimingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        timing.views.clear()
+        timing.outbound.clear()
+
+    def test_header_log_and_histogram(self):
+        Team_Match_Data.objects.create(team_number=2073, event="2025test", match_number=1, scout_name="Scout A")
+        with self.assertLogs('scouting_backend.timing', 'INFO') as logs:
+            response = self.client.get(reverse('rankings'), {'comp': "2025test"})
+
+        metrics = dict(metric.split(';', 1) for metric in response['Server-Timing'].split(', '))
+        self.assertEquals(set(metrics), {'total', 'db'})
+        self.assertRegex(metrics['db'], r'dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertRegex(logs.output[0], r'view=rankings method=GET status=200 total_ms=[\d.]+ db_queries=[1-9]')
+        self.assertEquals(timing.views.summary()['rankings']['count'], 1)
+
+    def test_outbound_tba_time_in_async_view(self):
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json=[{"key": "2025test", "name": "Test"}]))
+        client = AsyncTBAClient(TBAClient(auth_key="key", session=mock.Mock(headers={}), cache_ttl=0), transport)
+        with mock.patch('api.tba.async_client', client):
+            response = self.client.get('/get_events/')
+        self.assertEquals(response.json()["2025test"], "Test")
+        self.assertIn('tba;dur=', response['Server-Timing'])
+        self.assertEquals(timing.outbound.summary()['tba']['count'], 1)
+
+    async def test_asgi_requests_are_timed(self):
+        response = await self.async_client.get(reverse('picklist'))
+        self.assertIn('total;dur=', response['Server-Timing'])
+        self.assertEquals(timing.views.summary()['picklist']['count'], 1)
+
+    def test_percentiles(self):
+        rolling = timing.RollingTimings(window=100)
+        for ms in range(1, 201):
+            rolling.add('view', ms / 1000)
+        self.assertEquals(rolling.summary(), {'view': {'count': 100, 'p50': 150.0, 'p95': 195.0, 'p99': 199.0}})
+
+    def test_counters_add_up_across_threads(self):
+        timings = timing.RequestTimings()
+
+        def work():
+            for _ in range(1000):
+                timings.add_query(0.001)
+                timings.add_outbound('tba', 0.001)
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEquals(timings.db_queries, 4000)
+        self.assertAlmostEqual(timings.outbound['tba'], 4.0)
+
+    @mock.patch('scouting_backend.timing.REQUEST_SLOW_MS', 0)
+    def test_long_polls_are_tagged_not_slow(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        channel = PicklistChannel(PicklistStore(directory.name))
+        channel.publish("2025test", replace([1]))
+        with mock.patch('strategy.views.channel', channel), \
+                self.assertLogs('scouting_backend.timing', 'INFO') as logs:
+            self.client.get(reverse('picklist_submit'), {'comp': "2025test", 'version': 0, 'wait': 'true'})
+            self.client.get(reverse('picklist_submit'), {'comp': "2025test", 'version': 0})
+        self.assertEquals([record.levelname for record in logs.records], ['INFO', 'WARNING'])
+        self.assertIn('long_poll=True', logs.output[0])
+        self.assertEquals(set(timing.views.summary()), {'picklist_submit', 'picklist_submit:long_poll'})
+
+    def test_summary_needs_login(self):
+        self.assertEquals(self.client.get(reverse('timing_summary')).status_code, 302)
+        session = self.client.session
+        session['email'] = "scout@team2073.com"
+        session.save()
+        self.client.get(reverse('rankings'))
+        self.assertEquals(self.client.get(reverse('timing_summary')).json()['views']['rankings']['count'], 1)
@@ -0,0 +1,160 @@
+"""
+Incremental maintenance of TeamEventAggregate.
+
+apply_scan_changes takes (old_values, new_values) pairs of Team_Match_Data
+rows, so an overwritten scan is retracted from its old bucket before the new
+values are added. ORM saves and deletes reach it through scan_saved and
+scan_deleted (connected in TeamsConfig.ready); bulk_create sends no signals,
+so scanner_bulk calls it itself. rebuild_team_aggregates recomputes
+everything from Team_Match_Data for repairs and backfills.
+"""
+from django.db import transaction
+from django.db.models import Count, Min, Sum
+
+from teams.models import (AGGREGATE_FIELDS, AGGREGATE_MATCH_LIMIT, Team_Match_Data,
+                          TeamEventAggregate)
+
+# Columns needed from a Team_Match_Data row to update its aggregate
+SCAN_VALUE_FIELDS = ('id', 'team_number', 'event', 'match_number', 'quantifier',
+                     'start_pos', 'missed_auto') + AGGREGATE_FIELDS
+
+
+def scan_values(obj):
+    """Aggregate-relevant values of a saved Team_Match_Data instance"""
+    return {field: getattr(obj, field) for field in SCAN_VALUE_FIELDS}
+
+
+def loaded_values(obj):
+    """scan_values of obj as it was last loaded or saved, None if unknown"""
+    loaded = getattr(obj, '_loaded_values', {})
+    if any(field not in loaded for field in SCAN_VALUE_FIELDS):
+        return None
+    return {field: loaded[field] for field in SCAN_VALUE_FIELDS}
+
+
+def _bucket(row):
+    if row is None or row['match_number'] >= AGGREGATE_MATCH_LIMIT:
+        return None
+    return int(row['team_number']), row['event'], row['quantifier']
+
+
+def apply_scan_changes(changes):
+    """
+    Apply a list of (old_values, new_values) pairs to TeamEventAggregate.
+    old_values is None for a brand new scan, new_values None for a deleted
+    one. Runs in a constant number of queries however many scans change.
+    """
+    deltas = {}
+    for old, new in changes:
+        for row, sign in ((old, -1), (new, 1)):
+            bucket = _bucket(row)
+            if bucket is None:
+                continue
+            delta = deltas.setdefault(bucket, {'count': 0, 'sums': dict.fromkeys(AGGREGATE_FIELDS, 0),
+                                               'added': [], 'retracted': set()})
+            delta['count'] += sign
+            for field in AGGREGATE_FIELDS:
+                delta['sums'][field] += sign * row[field]
+            if sign > 0:
+                delta['added'].append(row)
+            else:
+                delta['retracted'].add(row['id'])
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        TeamEventAggregate.objects.bulk_create(
+            [TeamEventAggregate(team_number=team_number, event=event, quantifier=quantifier)
+             for team_number, event, quantifier in deltas],
+            ignore_conflicts=True,
+        )
+        # Ordered so concurrent writers always lock buckets in the same order
+        aggregates = [
+            aggregate for aggregate in TeamEventAggregate.objects.select_for_update().filter(
+                team_number__in={bucket[0] for bucket in deltas},
+                event__in={bucket[1] for bucket in deltas},
+                quantifier__in={bucket[2] for bucket in deltas},
+            ).order_by('event', 'quantifier', 'team_number')
+            if (aggregate.team_number, aggregate.event, aggregate.quantifier) in deltas
+        ]
+
+        for aggregate in aggregates:
+            delta = deltas[aggregate.team_number, aggregate.event, aggregate.quantifier]
+            aggregate.match_count += delta['count']
+            for field, value in delta['sums'].items():
+                setattr(aggregate, f'sum_{field}', getattr(aggregate, f'sum_{field}') + value)
+
+            added_ids = {row['id'] for row in delta['added']}
+            if aggregate.first_scan_id in delta['retracted'] - added_ids:
+                # The earliest scan moved out of this bucket, find the next one
+                _set_first_scan(aggregate, Team_Match_Data.objects.filter(
+                    team_number=aggregate.team_number, event=aggregate.event, quantifier=aggregate.quantifier,
+                    match_number__lt=AGGREGATE_MATCH_LIMIT,
+                ).order_by('id').values('id', 'start_pos', 'missed_auto').first())
+            else:
+                for row in delta['added']:
+                    if aggregate.first_scan_id is None or row['id'] <= aggregate.first_scan_id:
+                        _set_first_scan(aggregate, row)
+
+        TeamEventAggregate.objects.bulk_update(
+            aggregates,
+            ['match_count', 'first_scan_id', 'start_pos', 'missed_auto'] + [f'sum_{field}' for field in AGGREGATE_FIELDS],
+        )
+
+
+def _set_first_scan(aggregate, row):
+    aggregate.first_scan_id = row['id'] if row else None
+    aggregate.start_pos = row['start_pos'] if row else 0
+    aggregate.missed_auto = row['missed_auto'] if row else 0
+
+
+def scan_saved(sender, instance, created, raw=False, **kwargs):
+    """post_save of Team_Match_Data"""
+    if raw:
+        return
+    previous = None if created else loaded_values(instance)
+    if created or previous is not None:
+        apply_scan_changes([(previous, scan_values(instance))])
+    else:
+        # Saved without being loaded first, what it replaced is unknown
+        rebuild_team_aggregates(instance.event, instance.team_number)
+    instance._loaded_values = scan_values(instance)
+
+
+def scan_deleted(sender, instance, **kwargs):
+    """post_delete of Team_Match_Data"""
+    apply_scan_changes([(loaded_values(instance) or scan_values(instance), None)])
+
+
+def rebuild_team_aggregates(event=None, team_number=None):
+    """Recompute TeamEventAggregate from scratch, for one event (or one of its teams) or all of them"""
+    match_data = Team_Match_Data.objects.filter(match_number__lt=AGGREGATE_MATCH_LIMIT)
+    aggregates = TeamEventAggregate.objects.all()
+    if event is not None:
+        match_data = match_data.filter(event=event)
+        aggregates = aggregates.filter(event=event)
+    if team_number is not None:
+        match_data = match_data.filter(team_number=team_number)
+        aggregates = aggregates.filter(team_number=team_number)
+
+    grouped = list(match_data.values('team_number', 'event', 'quantifier').annotate(
+        match_count=Count('id'),
+        first_scan_id=Min('id'),
+        **{f'sum_{field}': Sum(field) for field in AGGREGATE_FIELDS},
+    ))
+    first_scans = {
+        row['id']: row for row in Team_Match_Data.objects.filter(
+            id__in=[group['first_scan_id'] for group in grouped]
+        ).values('id', 'start_pos', 'missed_auto')
+    }
+
+    with transaction.atomic():
+        aggregates.delete()
+        TeamEventAggregate.objects.bulk_create([
+            TeamEventAggregate(
+                start_pos=first_scans[group['first_scan_id']]['start_pos'],
+                missed_auto=first_scans[group['first_scan_id']]['missed_auto'],
+                **group,
+            )
+            for group in grouped
+        ])
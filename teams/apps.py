@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class TeamsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'teams'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from teams import aggregates
+        from teams.models import Team_Match_Data
+
+        post_save.connect(aggregates.scan_saved, sender=Team_Match_Data, dispatch_uid='aggregate_scan_save')
+        post_delete.connect(aggregates.scan_deleted, sender=Team_Match_Data, dispatch_uid='aggregate_scan_delete')
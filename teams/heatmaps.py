@@ -0,0 +1,131 @@
+"""
+Auto path heatmaps.
+
+Every stored path is turned into line segments between its waypoints, all
+segments are sampled at once and the samples are binned into a grid over the
+replay canvas with one np.bincount. Results are cached per event and set of
+teams, keyed by a generation number of each team that
+invalidate_team_heatmaps bumps whenever a scan of the team is saved,
+overwritten or deleted (strategy.caching.invalidate_teams calls it).
+"""
+import io
+
+import numpy as np
+from django.core.cache import cache
+from PIL import Image
+
+from teams.models import Team_Match_Data
+from teams.paths import FIELD_POSITIONS
+
+# Canvas the positions are drawn on by teams/static/team/replay_system.js
+FIELD_WIDTH = 512
+FIELD_HEIGHT = 400
+
+# Pixel coordinates of each position, in FIELD_POSITIONS order
+FIELD_COORDINATES = np.array([
+    (277, 170), (279, 230), (285, 288), (331, 315), (375, 315), (419, 288),
+    (430, 220), (430, 170), (418, 105), (374, 80), (330, 80), (284, 105),
+    (388, 375), (173, 110), (176, 210), (175, 300), (88, 120), (86, 300),
+], dtype=float)
+assert len(FIELD_COORDINATES) == len(FIELD_POSITIONS)
+
+# Side of a grid cell in canvas pixels
+HEATMAP_CELL = 8
+
+# Points sampled along each segment, enough for every cell it crosses to count
+SEGMENT_SAMPLES = 64
+
+# Seconds a heatmap is kept; new scans change its key before then
+HEATMAP_TIMEOUT = 24 * 60 * 60
+
+
+def _generation_key(event_key, team_number):
+    return f"path_heatmap_generation:{event_key}:{team_number}"
+
+
+def heatmap_cache_key(event_key, team_numbers, image=False):
+    team_numbers = sorted(team_numbers)
+    generations = cache.get_many([_generation_key(event_key, team) for team in team_numbers])
+    versions = ','.join(f"{team}.{generations.get(_generation_key(event_key, team), 0)}" for team in team_numbers)
+    return f"path_heatmap:{event_key}:{versions}:{'png' if image else 'grid'}"
+
+
+def invalidate_team_heatmaps(event_key, team_numbers):
+    """Change the key of every cached heatmap that includes one of team_numbers"""
+    for team_number in set(team_numbers):
+        key = _generation_key(event_key, int(team_number))
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:  # Evicted between add and incr
+            cache.set(key, 1, None)
+
+
+def path_heatmap(codes, cell=HEATMAP_CELL):
+    """
+    Density grid of shape (rows, columns) over the canvas for byte-coded
+    paths. Each path adds 1 to every cell it passes through.
+    """
+    rows, columns = -(-FIELD_HEIGHT // cell), -(-FIELD_WIDTH // cell)
+    starts, ends, owners = [], [], []
+    for owner, code in enumerate(codes):
+        waypoints = np.frombuffer(bytes(code), dtype=np.uint8)
+        if len(waypoints) == 1:
+            waypoints = np.repeat(waypoints, 2)
+        starts.append(waypoints[:-1])
+        ends.append(waypoints[1:])
+        owners.append(np.full(max(len(waypoints) - 1, 0), owner))
+    if not starts or not sum(len(segment) for segment in starts):
+        return np.zeros((rows, columns))
+
+    start = FIELD_COORDINATES[np.concatenate(starts)]
+    end = FIELD_COORDINATES[np.concatenate(ends)]
+    owner = np.concatenate(owners)
+
+    # (segments, samples, 2) points along every segment
+    t = np.linspace(0, 1, SEGMENT_SAMPLES)[None, :, None]
+    points = start[:, None, :] + (end - start)[:, None, :] * t
+    column = np.clip((points[..., 0] // cell).astype(np.int64), 0, columns - 1)
+    row = np.clip((points[..., 1] // cell).astype(np.int64), 0, rows - 1)
+
+    # Count each (path, cell) once, however often the path crosses it
+    size = rows * columns
+    visits = np.unique(np.repeat(owner, SEGMENT_SAMPLES) * size + (row * columns + column).ravel())
+    return np.bincount(visits % size, minlength=size).reshape(rows, columns).astype(float)
+
+
+def render_heatmap_png(grid):
+    """Transparent red overlay the size of the canvas, opacity following density"""
+    peak = grid.max()
+    alpha = (grid / peak * 200).astype(np.uint8) if peak else np.zeros(grid.shape, dtype=np.uint8)
+    rgba = np.zeros(grid.shape + (4,), dtype=np.uint8)
+    rgba[..., 0] = 230
+    rgba[..., 1] = (1 - grid / peak) * 180 if peak else 180
+    rgba[..., 3] = alpha
+    image = Image.fromarray(rgba, 'RGBA').resize((FIELD_WIDTH, FIELD_HEIGHT), Image.Resampling.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def team_heatmap(event_key, team_numbers, image=False):
+    """
+    {'paths', 'cell', 'grid'} for the paths of team_numbers at an event, or
+    PNG bytes with image=True. No queries when cached. Paths with
+    positions outside FIELD_POSITIONS (no byte code) are left out.
+    """
+    key = heatmap_cache_key(event_key, team_numbers, image)
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    codes = list(Team_Match_Data.objects.filter(event=event_key, team_number__in=team_numbers)
+                 .exclude(auto_path_code=b'').exclude(auto_path_code__isnull=True)
+                 .values_list('auto_path_code', flat=True))
+    grid = path_heatmap(codes)
+    if image:
+        result = render_heatmap_png(grid)
+    else:
+        result = {'paths': len(codes), 'cell': HEATMAP_CELL, 'grid': grid.astype(int).tolist()}
+    cache.set(key, result, HEATMAP_TIMEOUT)
+    return result
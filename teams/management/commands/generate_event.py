@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from teams.synthetic import DEFAULT_MATCHES, DEFAULT_TEAMS, generate_event
+
+
+class Command(BaseCommand):
+    help = ("Fill the database with a synthetic event (roster, schedule, pit data, six scans per played match) "
+            "for load testing. Replaces anything stored for the event key.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_key', help="Event key to create, e.g. 2025synth")
+        parser.add_argument('--teams', type=int, default=DEFAULT_TEAMS, help="Registered teams")
+        parser.add_argument('--matches', type=int, default=DEFAULT_MATCHES, help="Qualification matches")
+        parser.add_argument('--played', type=int, help="Matches already scouted (default: all)")
+        parser.add_argument('--seed', type=int, default=0, help="Same seed, same event")
+
+    def handle(self, *args, **options):
+        if options['teams'] < 6:
+            raise CommandError("A match needs six teams")
+        counts = generate_event(options['event_key'], options['teams'], options['matches'], options['played'],
+                                options['seed'])
+        summary = ', '.join(f"{count} {name.replace('_', ' ')}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Generated {options['event_key']}: {summary}"))
@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from scouting_backend.sqlite_migration import CHUNK_SIZE, migrate_sqlite_data
+from teams.aggregates import rebuild_team_aggregates
+
+
+class Command(BaseCommand):
+    help = ("Copy the local SQLite database into DATABASE_URL's database in resumable chunks. "
+            "Run `manage.py migrate` against the target first.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=str(settings.BASE_DIR / 'db.sqlite3'), help="SQLite file to copy")
+        parser.add_argument('--checkpoint', default=str(settings.BASE_DIR / 'sqlite_migration.json'),
+                            help="Progress file, a rerun continues where it stopped")
+        parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and copy everything")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Rows per transaction")
+        parser.add_argument('models', nargs='*', help="Only these models, e.g. teams.team_match_data")
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            raise CommandError("DATABASE_URL is not set, the target would be the SQLite database itself")
+        if not Path(options['source']).exists():
+            raise CommandError(f"No SQLite database at {options['source']}")
+        if options['restart']:
+            Path(options['checkpoint']).unlink(missing_ok=True)
+
+        counts = migrate_sqlite_data(options['source'], options['checkpoint'], options['models'] or None,
+                                     chunk_size=options['chunk_size'], report=self.stdout.write)
+        # Derived from the copied scans rather than copied
+        rebuild_team_aggregates()
+        # Anything cached was built from the target's old contents
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS(f"Copied {sum(counts.values())} rows from {len(counts)} tables"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from strategy.previews import precompute_match_previews
+from strategy.schedule import sync_match_schedule
+
+
+class Command(BaseCommand):
+    help = "Cache dashboard previews for every match still to be played at an event"
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_key', help="TBA event key, e.g. 2025cc")
+        parser.add_argument('--sync', action='store_true', help="Download the match schedule from TBA first")
+
+    def handle(self, *args, **options):
+        event_key = options['event_key']
+        if options['sync']:
+            sync_match_schedule(event_key)
+
+        count = precompute_match_previews(event_key)
+        self.stdout.write(self.style.SUCCESS(f"Cached {count} match previews for {event_key}"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import tba
+from strategy.schedule import sync_match_schedule
+from teams.roster import sync_event_roster
+
+
+class Command(BaseCommand):
+    help = "Download and store TBA data for an event so the site works without venue internet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_key', help="TBA event key, e.g. 2025cc")
+
+    def handle(self, *args, **options):
+        if tba.client.offline:
+            raise CommandError("TBA_OFFLINE is set, unset it to download data")
+
+        team_count, match_count = tba.prewarm_event(options['event_key'])
+        sync_match_schedule(options['event_key'])
+        sync_event_roster(options['event_key'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {team_count} teams and {match_count} matches for {options['event_key']} in {tba.client.store.directory}"
+        ))
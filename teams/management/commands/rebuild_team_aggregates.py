@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from teams.aggregates import rebuild_team_aggregates
+from teams.models import TeamEventAggregate
+
+
+class Command(BaseCommand):
+    help = "Recompute TeamEventAggregate rows from Team_Match_Data"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', help="Only rebuild this event code (default: all events)")
+
+    def handle(self, *args, **options):
+        rebuild_team_aggregates(options['event'])
+        rows = TeamEventAggregate.objects.all()
+        if options['event']:
+            rows = rows.filter(event=options['event'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows.count()} team aggregates"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from teams.roster import sync_event_roster
+
+
+class Command(BaseCommand):
+    help = "Download the teams registered at an event from TBA, replacing the stored roster"
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_key', help="TBA event key, e.g. 2025cc")
+
+    def handle(self, *args, **options):
+        count = sync_event_roster(options['event_key'])
+        self.stdout.write(self.style.SUCCESS(f"Stored {count} teams for {options['event_key']}"))
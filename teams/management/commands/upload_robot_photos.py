@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from teams.photos import pending_robot_photos, upload_robot_photo
+
+
+class Command(BaseCommand):
+    help = "Upload robot photos still on local storage to Cloudinary"
+
+    def handle(self, *args, **options):
+        pending = pending_robot_photos()
+        uploaded = sum(upload_robot_photo(event_key, team_number) for event_key, team_number in pending)
+        self.stdout.write(self.style.SUCCESS(f"Uploaded {uploaded} of {len(pending)} pending robot photos"))
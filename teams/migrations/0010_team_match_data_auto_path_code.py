@@ -0,0 +1,48 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:46
+
+from django.db import migrations, models
+
+FIELD_POSITIONS = (
+    'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L',
+    'processor', 'groundA', 'groundB', 'groundC', 'sourceA', 'sourceB',
+)
+
+
+def encode_path(path):
+    codes = {position: code for code, position in enumerate(FIELD_POSITIONS)}
+    if not path:
+        return b''
+    if isinstance(path, str):
+        path = path.split(',')
+    try:
+        return bytes(codes[str(position).strip()] for position in path if str(position).strip())
+    except KeyError:
+        return None
+
+
+def backfill_path_codes(apps, schema_editor):
+    Team_Match_Data = apps.get_model('teams', 'Team_Match_Data')
+    batch = []
+    for scan in Team_Match_Data.objects.only('id', 'auto_path').iterator(chunk_size=1000):
+        scan.auto_path_code = encode_path(scan.auto_path)
+        batch.append(scan)
+        if len(batch) == 1000:
+            Team_Match_Data.objects.bulk_update(batch, ['auto_path_code'])
+            batch = []
+    Team_Match_Data.objects.bulk_update(batch, ['auto_path_code'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0008_alter_team_match_data_unique_together'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team_match_data',
+            name='auto_path_code',
+            field=models.BinaryField(default=b'', null=True),
+        ),
+        migrations.RunPython(backfill_path_codes, migrations.RunPython.noop),
+    ]
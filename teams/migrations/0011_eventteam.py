@@ -0,0 +1,25 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0010_team_match_data_auto_path_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventTeam',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(max_length=16)),
+                ('team_number', models.IntegerField()),
+                ('nickname', models.CharField(blank=True, default='', max_length=100)),
+            ],
+            options={
+                'unique_together': {('event', 'team_number')},
+            },
+        ),
+    ]
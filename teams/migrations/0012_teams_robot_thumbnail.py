@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0011_eventteam'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teams',
+            name='robot_thumbnail',
+            field=models.URLField(null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0012_teams_robot_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='human_player_match',
+            index=models.Index(fields=['event', 'team_number'], name='hpm_event_team_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='team_match_data',
+            index=models.Index(fields=['event', 'quantifier', 'team_number', 'match_number'], name='tmd_event_quant_team_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teams',
+            index=models.Index(fields=['event', 'pit_scout_status'], include=('team_number',), name='teams_event_pit_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:20
+
+from django.db import migrations
+
+FIELD_POSITIONS = (
+    'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L',
+    'processor', 'groundA', 'groundB', 'groundC', 'sourceA', 'sourceB',
+)
+
+
+def encode_path(path):
+    codes = {position: code for code, position in enumerate(FIELD_POSITIONS)}
+    if isinstance(path, str):
+        path = path.split(',')
+    try:
+        return bytes(codes[str(position).strip()] for position in path if str(position).strip())
+    except KeyError:
+        return None
+
+
+def clear_encoded_paths(apps, schema_editor):
+    """Keep the raw auto_path only where auto_path_code can't hold it"""
+    Team_Match_Data = apps.get_model('teams', 'Team_Match_Data')
+    scans = Team_Match_Data.objects.exclude(auto_path=[]).exclude(auto_path="").only('id', 'auto_path')
+    batch = []
+    for scan in scans.iterator(chunk_size=1000):
+        scan.auto_path_code = encode_path(scan.auto_path)
+        if scan.auto_path_code is not None:
+            scan.auto_path = []
+        batch.append(scan)
+        if len(batch) == 1000:
+            Team_Match_Data.objects.bulk_update(batch, ['auto_path', 'auto_path_code'])
+            batch = []
+    Team_Match_Data.objects.bulk_update(batch, ['auto_path', 'auto_path_code'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0013_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_encoded_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:05
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+AGGREGATE_FIELDS = (
+    'auto_leave', 'auto_L1', 'auto_L2', 'auto_L3', 'auto_L4',
+    'auto_net', 'auto_processor', 'auto_removed',
+    'teleL1', 'teleL2', 'teleL3', 'teleL4',
+    'telenet', 'teleProcessor', 'teleRemoved',
+    'climb', 'defense_ranking',
+)
+
+
+def backfill_aggregates(apps, schema_editor):
+    Team_Match_Data = apps.get_model('teams', 'Team_Match_Data')
+    TeamEventAggregate = apps.get_model('teams', 'TeamEventAggregate')
+
+    grouped = list(Team_Match_Data.objects.filter(match_number__lt=100).values(
+        'team_number', 'event', 'quantifier'
+    ).annotate(
+        match_count=Count('id'),
+        first_scan_id=Min('id'),
+        **{f'sum_{field}': Sum(field) for field in AGGREGATE_FIELDS},
+    ))
+    first_scans = {
+        row['id']: row for row in Team_Match_Data.objects.filter(
+            id__in=[group['first_scan_id'] for group in grouped]
+        ).values('id', 'start_pos', 'missed_auto')
+    }
+    TeamEventAggregate.objects.bulk_create([
+        TeamEventAggregate(
+            start_pos=first_scans[group['first_scan_id']]['start_pos'],
+            missed_auto=first_scans[group['first_scan_id']]['missed_auto'],
+            **group,
+        )
+        for group in grouped
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0014_clear_encoded_auto_paths'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamEventAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('team_number', models.IntegerField()),
+                ('event', models.CharField(max_length=16)),
+                ('quantifier', models.CharField(default='Quals', max_length=10)),
+                ('match_count', models.IntegerField(default=0)),
+                ('first_scan_id', models.BigIntegerField(null=True)),
+                ('start_pos', models.IntegerField(default=0)),
+                ('missed_auto', models.IntegerField(default=0)),
+                ('sum_auto_leave', models.IntegerField(default=0)),
+                ('sum_auto_L1', models.IntegerField(default=0)),
+                ('sum_auto_L2', models.IntegerField(default=0)),
+                ('sum_auto_L3', models.IntegerField(default=0)),
+                ('sum_auto_L4', models.IntegerField(default=0)),
+                ('sum_auto_net', models.IntegerField(default=0)),
+                ('sum_auto_processor', models.IntegerField(default=0)),
+                ('sum_auto_removed', models.IntegerField(default=0)),
+                ('sum_teleL1', models.IntegerField(default=0)),
+                ('sum_teleL2', models.IntegerField(default=0)),
+                ('sum_teleL3', models.IntegerField(default=0)),
+                ('sum_teleL4', models.IntegerField(default=0)),
+                ('sum_telenet', models.IntegerField(default=0)),
+                ('sum_teleProcessor', models.IntegerField(default=0)),
+                ('sum_teleRemoved', models.IntegerField(default=0)),
+                ('sum_climb', models.IntegerField(default=0)),
+                ('sum_defense_ranking', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('event', 'quantifier', 'team_number')},
+            },
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
 from django.db import models
 from django.db.models import Model
 
+from teams.paths import encode_path
+
+
 class Teams(models.Model):
     team_number = models.IntegerField()
     event = models.CharField(max_length=10)
@@ -19,11 +22,16 @@ class Teams(models.Model):
     auto_algae_max = models.IntegerField(null=True)
     auto_coral_max = models.IntegerField(null=True)
     robot_picture = models.URLField(max_length=200, null=True)
+    robot_thumbnail = models.URLField(max_length=200, null=True)
     additional_info = models.TextField(null=True)
     pit_scout_status = models.BooleanField(default=False)
 
     class Meta:
         unique_together = ('team_number', 'event')
+        indexes = [
+            # Registered and pit scouted teams of an event, answered from the index alone
+            models.Index(fields=['event', 'pit_scout_status'], include=['team_number'], name='teams_event_pit_idx'),
+        ]
 
 class Team_Match_Data(models.Model):
     # Meta Information
@@ -74,16 +82,111 @@ class Team_Match_Data(models.Model):
     is_disabled = models.IntegerField(default=0)
     is_tipped = models.IntegerField(default=0)
     
+    # Scanned path, only kept when auto_path_code is null; read both with teams.paths.stored_path
     auto_path = models.JSONField(default=list) 
+    # auto_path as one byte per position (teams/paths.py), null if it cannot be encoded
+    auto_path_code = models.BinaryField(default=b'', null=True)
     
     # Scout Information
     scout_name = models.CharField(max_length=32)
 
     class Meta:
         unique_together = ('team_number', 'event', 'match_number', 'scout_name')
+        indexes = [
+            # Event-wide loads (rankings, dashboard, heatmaps); team lookups use the unique index
+            models.Index(fields=['event', 'quantifier', 'team_number', 'match_number'], name='tmd_event_quant_team_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The row as loaded, so a save can retract it from TeamEventAggregate, see teams/aggregates.py
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # bulk_create and update() skip this, callers there set auto_path_code themselves.
+        # A raw path that encodes is replaced by its code; no raw path keeps the code as is.
+        if self.auto_path:
+            self.auto_path_code = encode_path(self.auto_path)
+            if self.auto_path_code is not None:
+                self.auto_path = []
+        super().save(*args, **kwargs)
 
 class Human_Player_Match(models.Model):
     team_number = models.IntegerField()
     match_number = models.IntegerField(default=0)
     event = models.CharField(max_length=16, default="testing")
     human_player_comment = models.CharField(max_length=1000, default="None")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'team_number'], name='hpm_event_team_idx'),
+        ]
+
+
+class EventTeam(models.Model):
+    """One team registered at an event, copied from TBA, see teams/roster.py"""
+    event = models.CharField(max_length=16)
+    team_number = models.IntegerField()
+    nickname = models.CharField(max_length=100, blank=True, default='')
+
+    class Meta:
+        # Leads with event, so an event's sorted team numbers come off the index
+        unique_together = ('event', 'team_number')
+
+
+# Team_Match_Data columns averaged on the rankings and dashboard pages
+AGGREGATE_FIELDS = (
+    'auto_leave', 'auto_L1', 'auto_L2', 'auto_L3', 'auto_L4',
+    'auto_net', 'auto_processor', 'auto_removed',
+    'teleL1', 'teleL2', 'teleL3', 'teleL4',
+    'telenet', 'teleProcessor', 'teleRemoved',
+    'climb', 'defense_ranking',
+)
+
+# Only match numbers below this count toward a team's averages
+AGGREGATE_MATCH_LIMIT = 100
+
+
+class TeamEventAggregate(models.Model):
+    """
+    Running sums of Team_Match_Data per (team, event, quantifier).
+    Kept current on every scan write and delete, see teams/aggregates.py.
+    """
+    team_number = models.IntegerField()
+    event = models.CharField(max_length=16)
+    quantifier = models.CharField(max_length=10, default='Quals')
+    match_count = models.IntegerField(default=0)
+
+    # Values from the earliest scan (lowest id), shown as-is rather than averaged
+    first_scan_id = models.BigIntegerField(null=True)
+    start_pos = models.IntegerField(default=0)
+    missed_auto = models.IntegerField(default=0)
+
+    # Auto Period
+    sum_auto_leave = models.IntegerField(default=0)
+    sum_auto_L1 = models.IntegerField(default=0)
+    sum_auto_L2 = models.IntegerField(default=0)
+    sum_auto_L3 = models.IntegerField(default=0)
+    sum_auto_L4 = models.IntegerField(default=0)
+    sum_auto_net = models.IntegerField(default=0)
+    sum_auto_processor = models.IntegerField(default=0)
+    sum_auto_removed = models.IntegerField(default=0)
+
+    # Teleop Period
+    sum_teleL1 = models.IntegerField(default=0)
+    sum_teleL2 = models.IntegerField(default=0)
+    sum_teleL3 = models.IntegerField(default=0)
+    sum_teleL4 = models.IntegerField(default=0)
+    sum_telenet = models.IntegerField(default=0)
+    sum_teleProcessor = models.IntegerField(default=0)
+    sum_teleRemoved = models.IntegerField(default=0)
+
+    # End Game and Rankings
+    sum_climb = models.IntegerField(default=0)
+    sum_defense_ranking = models.IntegerField(default=0)
+
+    class Meta:
+        # Leads with event, so an event's buckets come off the index
+        unique_together = ('event', 'quantifier', 'team_number')
@@ -0,0 +1,77 @@
+"""
+Read model behind teams.views.team_page.
+
+team_page_data builds everything the page shows for one (team, event) from
+plain values() rows, leaving out the auto_path column (paths are fetched by
+the page through teams.views.team_paths). The result is cached until a scan
+or pit scouting form for that team lands.
+"""
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, IntegerField, Q, Value, When
+from django.forms.models import model_to_dict
+
+from strategy.stats import EventStats
+from teams.models import Team_Match_Data, Teams
+
+# Seconds the page data is kept if nothing invalidates it first
+TEAM_PAGE_TIMEOUT = 60 * 60
+
+# Team_Match_Data columns shown in the match table
+MATCH_ROW_FIELDS = (
+    'match_number', 'quantifier', 'auto_leave', 'auto_L1', 'auto_L2', 'auto_L3', 'auto_L4',
+    'auto_net', 'auto_processor', 'auto_removed', 'teleL1', 'teleL2', 'teleL3', 'teleL4',
+    'telenet', 'teleProcessor', 'teleRemoved', 'climb', 'driver_ranking', 'defense_ranking',
+    'start_pos', 'missed_auto', 'is_broken', 'is_disabled', 'is_tipped', 'comment', 'scout_name',
+)
+
+
+def team_page_cache_key(event_key, team_number):
+    return f"team_page:{event_key}:{team_number}"
+
+
+def team_page_data(team_number, event_key):
+    """{'team', 'team_stats', 'all_team_match_data'} for the team page, cached"""
+    key = team_page_cache_key(event_key, team_number)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    team = Teams.objects.filter(team_number=team_number, event=event_key).values().first()
+    if team is None:
+        team = model_to_dict(Teams.objects.get_or_create(team_number=team_number, event=event_key)[0])
+
+    all_team_match_data = list(Team_Match_Data.objects.filter(
+        team_number=team_number,
+        event=event_key
+    ).annotate(
+        custom_order=Case(
+            When(quantifier__in=['Playoff', 'Play Off'], then=Value(1)),
+            When(quantifier='Quals', then=Value(2)),
+            When(quantifier='Prac', then=Value(3)),
+            default=Value(4),
+            output_field=IntegerField(),
+        ),
+        # Whether there is a path to fetch, without loading the path itself
+        has_path=Case(
+            When(Q(auto_path_code__isnull=False) & ~Q(auto_path_code=b''), then=Value(True)),
+            When(Q(auto_path__isnull=True) | Q(auto_path=[]) | Q(auto_path=""), then=Value(False)),
+            default=Value(True),
+            output_field=BooleanField(),
+        ),
+    ).order_by('custom_order', '-match_number').values(*MATCH_ROW_FIELDS, 'has_path'))
+
+    # Distribution of this team's qualification match scores
+    stats = EventStats.load(event_key, 'Quals', team_numbers=[team_number])
+    team_stats = stats.metric_table(team_number) if team_number in stats else []
+
+    data = {
+        'team': team,
+        'team_stats': team_stats,
+        'all_team_match_data': all_team_match_data,
+    }
+    cache.set(key, data, TEAM_PAGE_TIMEOUT)
+    return data
+
+
+def invalidate_team_page(event_key, team_numbers):
+    cache.delete_many([team_page_cache_key(event_key, int(team_number)) for team_number in team_numbers])
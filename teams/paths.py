@@ -0,0 +1,48 @@
+"""
+Compact storage for scout-drawn auto paths.
+
+A path is the list of field positions the robot visited, as scanned:
+"A,B,processor" (or a JSON list of the same names). Every position the
+scanner can record is in FIELD_POSITIONS, so a path is stored as one byte
+per waypoint in Team_Match_Data.auto_path_code. The raw auto_path is only
+stored for paths with positions outside the table (code None); readers go
+through stored_path.
+"""
+
+# Positions drawn by teams/static/team/replay_system.js; the byte code of a
+# position is its index, so only ever append to this tuple
+FIELD_POSITIONS = (
+    'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L',
+    'processor', 'groundA', 'groundB', 'groundC', 'sourceA', 'sourceB',
+)
+
+_CODES = {position: code for code, position in enumerate(FIELD_POSITIONS)}
+
+
+def path_positions(path):
+    """List of position names in a scanned path (string or list), blanks dropped"""
+    if not path:
+        return []
+    if isinstance(path, str):
+        path = path.split(',')
+    return [str(position).strip() for position in path if str(position).strip()]
+
+
+def encode_path(path):
+    """Byte code of a scanned path, b'' for an empty path, None if it has an unknown position"""
+    try:
+        return bytes(_CODES[position] for position in path_positions(path))
+    except KeyError:
+        return None
+
+
+def decode_path(code):
+    """Comma separated path, the format replay_system.js reads"""
+    return ','.join(FIELD_POSITIONS[byte] for byte in bytes(code))
+
+
+def stored_path(code, raw):
+    """Comma separated path of a scan from its auto_path_code, or its raw auto_path when it has no code"""
+    if code:
+        return decode_path(code)
+    return ','.join(path_positions(raw))
@@ -0,0 +1,181 @@
+"""
+Robot photos from pit scouting.
+
+The phone photo is downscaled and re-encoded with Pillow while the request is
+handled, and the result plus a thumbnail are written to local media storage,
+so the team page can show them straight away. Uploading both to Cloudinary
+happens on a background thread with retries; once it succeeds the Teams row
+is pointed at the Cloudinary URLs and the local files are removed. Photos
+still on local storage (a worker restarted mid-upload, Cloudinary down all
+event) are retried by the upload_robot_photos command. Local media does not
+survive a redeploy on Render; a photo whose file is gone is cleared from its
+Teams row instead of being retried forever.
+"""
+import io
+import logging
+import os
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from time import sleep
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from PIL import Image, ImageOps
+
+from scouting_backend.timing import timed
+from teams.models import Teams
+from teams.pages import invalidate_team_page
+
+logger = logging.getLogger(__name__)
+
+# Longest side in pixels of the stored photo and of its thumbnail
+PHOTO_MAX_SIZE = 1280
+THUMBNAIL_MAX_SIZE = 320
+PHOTO_QUALITY = 82
+
+# Directory in media storage for photos waiting to be uploaded
+PHOTO_DIR = 'robots'
+
+# Names save_robot_photo gives files in PHOTO_DIR, the only ones robot_photo serves
+LOCAL_PHOTO_NAME = re.compile(r'^[\w-]+\.jpg$')
+
+# Upload attempts per photo, waiting PHOTO_UPLOAD_BACKOFF * 2**attempt seconds between them
+PHOTO_UPLOAD_ATTEMPTS = 4
+PHOTO_UPLOAD_BACKOFF = 2
+
+_uploads = ThreadPoolExecutor(max_workers=2, thread_name_prefix='robot-photo')
+
+
+@cache
+def cloudinary_uploader():
+    """cloudinary.uploader, imported and configured on the first upload rather than at startup"""
+    import cloudinary
+    import cloudinary.uploader
+
+    cloudinary.config(
+        cloud_name=os.environ.get("CLOUD_NAME"),
+        api_key=os.environ.get("CLOUD_API_KEY"),
+        api_secret=os.environ.get("CLOUD_API_SECRET"),
+        secure=True)
+    return cloudinary.uploader
+
+
+def encode_jpeg(image, max_size):
+    """JPEG bytes of image shrunk to fit max_size x max_size"""
+    image = image.copy()
+    image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=PHOTO_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def process_robot_photo(image_file):
+    """(photo, thumbnail) JPEG bytes for an uploaded image file, upright and without EXIF data"""
+    with Image.open(image_file) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+    return encode_jpeg(image, PHOTO_MAX_SIZE), encode_jpeg(image, THUMBNAIL_MAX_SIZE)
+
+
+def save_robot_photo(event_key, team_number, image_file):
+    """Process and store a photo locally. Returns the (photo, thumbnail) media URLs."""
+    photo, thumbnail = process_robot_photo(image_file)
+    stem = f"{PHOTO_DIR}/{event_key}_{team_number}_{uuid.uuid4().hex[:12]}"
+    photo_name = default_storage.save(f"{stem}.jpg", ContentFile(photo))
+    thumbnail_name = default_storage.save(f"{stem}_thumb.jpg", ContentFile(thumbnail))
+    return default_storage.url(photo_name), default_storage.url(thumbnail_name)
+
+
+def open_local_photo(name):
+    """A file save_robot_photo stored in PHOTO_DIR, None if there is no such photo"""
+    path = f"{PHOTO_DIR}/{name}"
+    if not LOCAL_PHOTO_NAME.match(name) or not default_storage.exists(path):
+        return None
+    return default_storage.open(path, 'rb')
+
+
+def is_local(url):
+    return bool(url) and url.startswith(settings.MEDIA_URL)
+
+
+def _storage_name(url):
+    return url[len(settings.MEDIA_URL):]
+
+
+def _upload(name):
+    """secure_url of a media file uploaded to Cloudinary, retrying with backoff"""
+    for attempt in range(PHOTO_UPLOAD_ATTEMPTS):
+        try:
+            with default_storage.open(name, 'rb') as f:
+                with timed('cloudinary'):
+                    return cloudinary_uploader().upload(f, folder=PHOTO_DIR)['secure_url']
+        except FileNotFoundError:
+            # No retry brings a deleted file back
+            raise
+        except Exception:
+            if attempt == PHOTO_UPLOAD_ATTEMPTS - 1:
+                raise
+            logger.warning("Upload of %s failed, retrying", name, exc_info=True)
+            sleep(PHOTO_UPLOAD_BACKOFF * 2 ** attempt)
+
+
+def upload_robot_photo(event_key, team_number):
+    """
+    Upload a team's locally stored photo and thumbnail and point the Teams row
+    at them; files that are gone are cleared from the row instead. Returns
+    True once the row no longer points at local files.
+    """
+    team = Teams.objects.filter(team_number=team_number, event=event_key) \
+        .values('robot_picture', 'robot_thumbnail').first()
+    if team is None or not is_local(team['robot_picture']):
+        return True
+
+    local_urls = [url for url in (team['robot_picture'], team['robot_thumbnail']) if is_local(url)]
+    lost = {url for url in local_urls if not default_storage.exists(_storage_name(url))}
+    if team['robot_picture'] in lost:
+        # A thumbnail without its photo is not worth keeping
+        lost.update(local_urls)
+    if lost:
+        logger.warning("Robot photo files for %s at %s are gone, clearing them: %s",
+                       team_number, event_key, ', '.join(sorted(lost)))
+    try:
+        remote = {url: _upload(_storage_name(url)) for url in local_urls if url not in lost}
+    except Exception:
+        logger.exception("Giving up on robot photo for %s at %s", team_number, event_key)
+        return False
+    remote.update(dict.fromkeys(lost))
+
+    # Only if no newer photo was taken while this one uploaded
+    updated = Teams.objects.filter(
+        team_number=team_number, event=event_key, robot_picture=team['robot_picture']
+    ).update(
+        robot_picture=remote[team['robot_picture']],
+        robot_thumbnail=remote.get(team['robot_thumbnail'], team['robot_thumbnail']),
+    )
+    for url in local_urls:
+        default_storage.delete(_storage_name(url))
+    if updated:
+        invalidate_team_page(event_key, [team_number])
+    return bool(updated)
+
+
+def _upload_in_background(event_key, team_number):
+    try:
+        return upload_robot_photo(event_key, team_number)
+    finally:
+        # The thread's own connection, no request cycle closes it
+        connection.close()
+
+
+def queue_robot_photo_upload(event_key, team_number):
+    """Upload a team's photo on a background thread"""
+    return _uploads.submit(_upload_in_background, event_key, team_number)
+
+
+def pending_robot_photos():
+    """(event, team_number) of every team whose photo is still on local storage"""
+    return list(Teams.objects.filter(robot_picture__startswith=settings.MEDIA_URL)
+                .values_list('event', 'team_number'))
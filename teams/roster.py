@@ -0,0 +1,105 @@
+"""
+Local copy of the teams registered at each event.
+
+sync_event_roster pulls an event's team list from TBA in one call and stores
+it as EventTeam rows, so the teams and picklist pages read the roster with
+one indexed query instead of calling TBA on every view, cached until the
+roster is synced again. afind_event_team_numbers is the same for async
+views, fetching from TBA without blocking.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+
+from api.tba import aget_teams_list, get_teams_list
+from teams.models import EventTeam, Teams
+
+# Practice event without a TBA roster, its teams are the ones pit scouted
+TESTING_EVENT = "testing"
+
+# Seconds a roster is cached; sync_event_roster drops it straight away
+ROSTER_TIMEOUT = 24 * 60 * 60
+
+
+def roster_cache_key(event_key):
+    return f"roster:{event_key}"
+
+
+def sync_event_roster(event_key):
+    """Replace the stored roster for event_key with TBA's. Returns the number of teams."""
+    return store_event_roster(event_key, get_teams_list(event_key))
+
+
+def store_event_roster(event_key, teams):
+    """Replace the stored roster for event_key with TBA's /teams/simple response"""
+    roster = [
+        EventTeam(event=event_key, team_number=team['team_number'], nickname=team.get('nickname') or '')
+        for team in teams
+    ]
+    with transaction.atomic():
+        EventTeam.objects.filter(event=event_key).delete()
+        EventTeam.objects.bulk_create(roster)
+    invalidate_roster(event_key)
+    return len(roster)
+
+
+def event_team_numbers(event_key):
+    """Sorted team numbers at an event, as stored"""
+    if event_key == TESTING_EVENT:
+        return list(Teams.objects.filter(event=event_key).order_by('team_number')
+                    .values_list('team_number', flat=True))
+    return list(EventTeam.objects.filter(event=event_key).order_by('team_number')
+                .values_list('team_number', flat=True))
+
+
+def find_event_team_numbers(event_key):
+    """
+    event_team_numbers, cached, syncing the roster from TBA once if none is
+    stored. The testing event is not cached, its roster changes with Teams.
+    """
+    if event_key == TESTING_EVENT:
+        return event_team_numbers(event_key)
+    key = roster_cache_key(event_key)
+    team_numbers = cache.get(key)
+    if team_numbers:
+        return team_numbers
+
+    team_numbers = event_team_numbers(event_key)
+    if not team_numbers:
+        sync_event_roster(event_key)
+        team_numbers = event_team_numbers(event_key)
+    if team_numbers:
+        cache.set(key, team_numbers, ROSTER_TIMEOUT)
+    return team_numbers
+
+
+def invalidate_roster(event_key):
+    cache.delete(roster_cache_key(event_key))
+
+
+async def aevent_team_numbers(event_key):
+    """event_team_numbers with the async ORM"""
+    if event_key == TESTING_EVENT:
+        rows = Teams.objects.filter(event=event_key)
+    else:
+        rows = EventTeam.objects.filter(event=event_key)
+    return [team_number async for team_number in rows.order_by('team_number').values_list('team_number', flat=True)]
+
+
+async def afind_event_team_numbers(event_key):
+    """find_event_team_numbers for async views"""
+    if event_key == TESTING_EVENT:
+        return await aevent_team_numbers(event_key)
+    key = roster_cache_key(event_key)
+    team_numbers = await cache.aget(key)
+    if team_numbers:
+        return team_numbers
+
+    team_numbers = await aevent_team_numbers(event_key)
+    if not team_numbers:
+        teams = await aget_teams_list(event_key)
+        await sync_to_async(store_event_roster)(event_key, teams)
+        team_numbers = await aevent_team_numbers(event_key)
+    if team_numbers:
+        await cache.aset(key, team_numbers, ROSTER_TIMEOUT)
+    return team_numbers
@@ -25,6 +25,37 @@ const fieldPositions = {
     "sourceB": { x: 86, y: 300 },
 };
 
+// Every path of the team at this event, fetched once in a single request and
+// shared by the replay and the match table's "View Path" links
+let teamPathsRequest = null;
+
+function loadTeamPaths() {
+    if (!teamPathsRequest) {
+        const teamNumber = document.getElementById('team_number')?.value;
+        const compCode = new URLSearchParams(window.location.search).get('comp');
+        if (!teamNumber || !compCode) {
+            return Promise.reject(new Error("Missing team number or competition code"));
+        }
+
+        teamPathsRequest = fetch(`/teams/${teamNumber}/paths/?comp=${encodeURIComponent(compCode)}`, {
+            headers: { 'Accept': 'application/json' },
+            credentials: 'same-origin'
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => data.paths)
+        .catch(error => {
+            teamPathsRequest = null;
+            throw error;
+        });
+    }
+    return teamPathsRequest;
+}
+
 class ReplaySystem {
     constructor() {
         console.log("Initializing Replay System");
@@ -223,40 +254,13 @@ class ReplaySystem {
     }
 
     fetchPathData(matchNumber, scoutName = '') {
-        const teamNumber = document.getElementById('team_number')?.value;
-        const urlParams = new URLSearchParams(window.location.search);
-        const compCode = urlParams.get('comp');
-    
-        if (!teamNumber || !compCode) {
-            console.error("Missing team number or competition code");
-            return;
-        }
-    
-        console.log(`Fetching path data for team ${teamNumber}, match ${matchNumber}, scout ${scoutName}`);
-    
-        // Add scout_name parameter if provided
-        let url = `/api/get_path_data/${teamNumber}/?comp=${compCode}&match=${matchNumber}`;
-        if (scoutName) {
-            url += `&scout=${encodeURIComponent(scoutName)}`;
-        }
-        
-        fetch(url, {
-            method: 'GET',
-            headers: {
-                'Accept': 'application/json',
-                'X-Requested-With': 'XMLHttpRequest',
-            },
-            credentials: 'same-origin'
-        })
-        .then(response => {
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-            return response.json();
-        })
-        .then(data => {
-            console.log("Received path data:", data);
-            if (data.path) {
+        console.log(`Loading path data for match ${matchNumber}, scout ${scoutName}`);
+
+        loadTeamPaths()
+        .then(paths => {
+            const records = paths.filter(path => String(path.match_number) === String(matchNumber));
+            const data = records.find(path => path.scout_name === scoutName) || records[0];
+            if (data && data.path) {
                 // Clean up the path string by removing extra spaces after commas
                 this.currentPath = data.path.split(',').map(pos => pos.trim()).join(',');
                 console.log("Path loaded:", this.currentPath);
@@ -268,8 +272,8 @@ class ReplaySystem {
                 }
                 
                 // Handle multiple records case
-                if (data.multiple_records && data.all_scouts && !scoutName) {
-                    this.showScoutOptions(data.all_scouts, matchNumber);
+                if (records.length > 1 && !scoutName) {
+                    this.showScoutOptions(records.map(record => record.scout_name), matchNumber);
                 }
             } else {
                 console.error("No path data in response");
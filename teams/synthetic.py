@@ -0,0 +1,190 @@
+"""
+Synthetic events for load testing and benchmarks.
+
+generate_event fills the database with an event shaped like a real regional:
+a TBA roster and qualification schedule stored through the same code as a
+TBA sync, pit scouting for most teams, one scan per robot (six scouts) for
+every played match with an auto path, and human player comments. Scans are
+built as scanner QR payloads and parsed by the scanner, so they hold what a
+real scan would. Everything derives from the event key and seed: the same
+arguments always produce the same event.
+
+synthetic_tba_responses is the TBA side of the same event, {API path: JSON},
+for a fake TBA server (see benchmarks/end_to_end.py).
+"""
+import random
+
+from django.db import transaction
+
+from api.tba import TEAM_KEY, YEAR
+from scanner.views import parse_scan
+from strategy.caching import invalidate_teams
+from strategy.schedule import store_match_schedule
+from teams.aggregates import rebuild_team_aggregates
+from teams.models import Human_Player_Match, Team_Match_Data, Teams
+from teams.paths import FIELD_POSITIONS
+from teams.roster import store_event_roster
+
+DEFAULT_TEAMS = 75
+DEFAULT_MATCHES = 100
+
+# Share of registered teams the pit scouts reach
+PIT_SCOUTED_SHARE = 0.9
+
+# One scout per driver station
+STATIONS = [(color, station) for color in ('red', 'blue') for station in (1, 2, 3)]
+
+DRIVETRAINS = ['Swerve', 'Tank', 'Mecanum']
+COMMENTS = ['', '', 'Fast cycles', 'Dropped coral twice', 'Played defense', 'Slow climb', 'Great driver']
+HUMAN_PLAYER_COMMENTS = ['Accurate throws', 'Missed two nets', 'Quick feeding', 'Slow to the station']
+
+
+def _rng(event_key, seed, *parts):
+    return random.Random(':'.join(map(str, [event_key, seed, *parts])))
+
+
+def synthetic_roster(event_key, team_count=DEFAULT_TEAMS, seed=0):
+    """TBA /event/{key}/teams/simple response"""
+    rng = _rng(event_key, seed, 'roster')
+    numbers = sorted(rng.sample(range(1, 10000), team_count))
+    return [{'key': f"frc{number}", 'team_number': number, 'nickname': f"Synthetic {number}"} for number in numbers]
+
+
+def synthetic_schedule(event_key, team_numbers, match_count=DEFAULT_MATCHES, seed=0):
+    """
+    TBA /event/{key}/matches/simple response of qualification matches, every
+    team playing about as often as every other
+    """
+    rng = _rng(event_key, seed, 'schedule')
+    queue = []
+    schedule = []
+    for number in range(1, match_count + 1):
+        if len(queue) < 6:
+            rest = [team for team in team_numbers if team not in queue]
+            rng.shuffle(rest)
+            queue += rest
+        teams, queue = queue[:6], queue[6:]
+        schedule.append({
+            'key': f"{event_key}_qm{number}", 'comp_level': 'qm', 'set_number': 1, 'match_number': number,
+            'alliances': {
+                'red': {'team_keys': [f"frc{team}" for team in teams[:3]]},
+                'blue': {'team_keys': [f"frc{team}" for team in teams[3:]]},
+            },
+        })
+    return schedule
+
+
+def synthetic_tba_responses(event_key, team_count=DEFAULT_TEAMS, match_count=DEFAULT_MATCHES, seed=0):
+    """{TBA API path: JSON} for everything the site asks TBA about the event"""
+    roster = synthetic_roster(event_key, team_count, seed)
+    schedule = synthetic_schedule(event_key, [team['team_number'] for team in roster], match_count, seed)
+    return {
+        f"/team/{TEAM_KEY}/events/{YEAR}": [{'key': event_key, 'name': f"Synthetic Regional {event_key}"}],
+        f"/event/{event_key}/teams/simple": roster,
+        f"/event/{event_key}/matches/simple": schedule,
+    }
+
+
+def team_skill(event_key, team_number, seed=0):
+    """0..1, how well a team scores; fixed per team so averages differ between teams"""
+    return _rng(event_key, seed, 'skill', team_number).betavariate(2, 3)
+
+
+def synthetic_scan(event_key, match_number, team_number, scout_name, seed=0):
+    """Scanner QR payload of one robot in one match"""
+    rng = _rng(event_key, seed, 'scan', match_number, team_number)
+    skill = team_skill(event_key, team_number, seed)
+
+    def score(most):
+        return min(most, max(0, round(rng.gauss(skill * most, 1))))
+
+    path = [rng.choice(['sourceA', 'sourceB'])] + rng.sample(FIELD_POSITIONS[:12], rng.randint(1, 3))
+    if rng.random() < 0.3:
+        path.append('processor')
+    return {
+        'teamNumber': team_number, 'matchNumber': match_number, 'name': scout_name, 'comp_code': event_key,
+        'quantifier': 'Quals', 'startPos': rng.randint(1, 4),
+        'autoLeave': int(rng.random() < 0.6 + skill * 0.4),
+        'autoL1': score(1), 'autoL2': score(1), 'autoL3': score(2), 'autoL4': score(3),
+        'autoNet': score(1), 'autoProcessor': score(1), 'autoRemoved': score(1),
+        'autoPath': ','.join(path),
+        'teleL1': score(4), 'teleL2': score(4), 'teleL3': score(5), 'teleL4': score(7),
+        'telenet': score(4), 'teleProcessor': score(3), 'teleRemoved': score(2),
+        'endClimb': score(4), 'driverRanking': rng.randint(1, 5), 'defenseRanking': rng.randint(1, 5),
+        'comment': rng.choice(COMMENTS),
+        'isBroken': int(rng.random() < 0.03), 'isDisabled': int(rng.random() < 0.03),
+        'isTipped': int(rng.random() < 0.01),
+    }
+
+
+def match_scans(event_key, match, seed=0):
+    """The six scans of a TBA match, one per driver station scout"""
+    return [
+        synthetic_scan(event_key, match['match_number'], int(match['alliances'][color]['team_keys'][station - 1][3:]),
+                       f"{color.title()} {station} Scout", seed)
+        for color, station in STATIONS
+    ]
+
+
+def pit_data(event_key, team_number, seed=0):
+    """Teams fields from pit scouting"""
+    rng = _rng(event_key, seed, 'pit', team_number)
+    return {
+        'drivetrain': rng.choice(DRIVETRAINS), 'weight': rng.randint(90, 125),
+        'length': rng.randint(26, 34), 'width': rng.randint(26, 34),
+        'intake_design': rng.choice(['Over bumper', 'Under bumper']),
+        'intake_locations': rng.choice(['Ground', 'Source', 'Ground,Source']),
+        'scoring_locations': ','.join(rng.sample(['L1', 'L2', 'L3', 'L4', 'Net', 'Processor'], 3)),
+        'cage_positions': rng.choice(['Shallow', 'Deep', 'None']),
+        'under_shallow': rng.choice(['Yes', 'No']), 'algae_picker': rng.choice(['Yes', 'No']),
+        'auto_positions': ','.join(map(str, rng.sample(range(1, 5), 2))), 'auto_leave': 'Yes',
+        'auto_algae_max': rng.randint(0, 2), 'auto_coral_max': rng.randint(0, 4),
+        'additional_info': rng.choice(['', 'Strong defender', 'Ask about their climber']),
+        'pit_scout_status': True,
+    }
+
+
+def generate_event(event_key, team_count=DEFAULT_TEAMS, match_count=DEFAULT_MATCHES, played=None, seed=0):
+    """
+    Replace everything stored for event_key with a synthetic event where the
+    first `played` matches (default all) have been scouted. Returns the
+    number of rows created per model.
+    """
+    played = match_count if played is None else played
+    tba = synthetic_tba_responses(event_key, team_count, match_count, seed)
+    roster = tba[f"/event/{event_key}/teams/simple"]
+    schedule = tba[f"/event/{event_key}/matches/simple"]
+    team_numbers = [team['team_number'] for team in roster]
+    rng = _rng(event_key, seed, 'event')
+
+    scans = []
+    for match in schedule[:played]:
+        for payload in match_scans(event_key, match, seed):
+            key, defaults = parse_scan(payload)
+            scans.append(Team_Match_Data(**key, **defaults))
+    pit_scouted = set(rng.sample(team_numbers, round(team_count * PIT_SCOUTED_SHARE)))
+    human_players = [
+        Human_Player_Match(event=event_key, match_number=match['match_number'],
+                           team_number=int(match['alliances'][color]['team_keys'][0][3:]),
+                           human_player_comment=rng.choice(HUMAN_PLAYER_COMMENTS))
+        for match in schedule[:played] for color in ('red', 'blue')
+    ]
+
+    with transaction.atomic():
+        for model in (Team_Match_Data, Teams, Human_Player_Match):
+            model.objects.filter(event=event_key).delete()
+        store_event_roster(event_key, roster)
+        store_match_schedule(event_key, schedule)
+        Teams.objects.bulk_create(
+            Teams(event=event_key, team_number=team, **(pit_data(event_key, team, seed) if team in pit_scouted else {}))
+            for team in team_numbers
+        )
+        Team_Match_Data.objects.bulk_create(scans, batch_size=1000)
+        Human_Player_Match.objects.bulk_create(human_players)
+        rebuild_team_aggregates(event_key)
+        transaction.on_commit(lambda: invalidate_teams(event_key, team_numbers))
+
+    return {
+        'teams': len(team_numbers), 'pit_scouted': len(pit_scouted), 'matches': len(schedule),
+        'scans': len(scans), 'human_player_comments': len(human_players),
+    }
@@ -1,15 +1,42 @@
-from django.test import TestCase
+import io
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.models import Group, User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
 
 # Create your tests here.
 from django.urls import reverse, resolve
 
-from .models import Teams
+from authenticate.models import AuthorizedUser
+from strategy.models import Match, MatchAlliance, PickList_Data
+from strategy.stats import EventStats
+
+from .aggregates import rebuild_team_aggregates
+from .heatmaps import path_heatmap
+from .paths import decode_path, encode_path, stored_path
+from .photos import pending_robot_photos, process_robot_photo, save_robot_photo, upload_robot_photo
+from .models import AGGREGATE_FIELDS, EventTeam, Human_Player_Match, Teams, Team_Match_Data, TeamEventAggregate
+from .roster import sync_event_roster
 from .views import display_teams, team_page
 
 
 class TeamTests(TestCase):
 
     def setUp(self):
+        cache.clear()
         self.team = Teams.objects.create(team_number=2073)
         teams_page_url = reverse('teams')
         self.response = self.client.get(teams_page_url)
@@ -32,6 +59,14 @@ class TeamTests(TestCase):
         response = self.client.get(url)
         self.assertEquals(response.status_code, 200)
 
+    def test_team_page_shows_match_stats(self):
+        Team_Match_Data.objects.create(team_number=2073, event="2025test", match_number=1,
+                                       scout_name="Scout A", teleL4=3)
+        url = reverse('team_page', kwargs={'team_number': self.team.team_number})
+        response = self.client.get(url, {'comp': "2025test"})
+        total = next(row for row in response.context['team_stats'] if row['metric'] == 'total')
+        self.assertEquals(total['mean'], 3)
+
     def test_team_page_view_not_found_status_code(self):
         url = reverse('team_page', kwargs={'team_number': 0})
         response = self.client.get(url)
@@ -40,3 +75,564 @@ class TeamTests(TestCase):
     def test_team_page_url_resolves_teams_page_view(self):
         view = resolve('/teams/2073')
         self.assertEquals(view.func, team_page)
+
+
+class TeamEventAggregateTests(TestCase):
+
+    def scan(self, match_number=1, name="Scout A", **fields):
+        data = {"teamNumber": 2073, "comp_code": "2025test", "matchNumber": match_number,
+                "name": name, "quantifier": "Quals"}
+        data.update(fields)
+        return self.client.post(reverse('scanner'), data=json.dumps(data), content_type='application/json',
+                                HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+    def aggregate(self, quantifier="Quals"):
+        return TeamEventAggregate.objects.get(team_number=2073, event="2025test", quantifier=quantifier)
+
+    def test_scans_accumulate(self):
+        self.scan(match_number=1, teleL4=2, startPos=3)
+        self.scan(match_number=2, teleL4=4, startPos=1)
+
+        aggregate = self.aggregate()
+        self.assertEquals(aggregate.match_count, 2)
+        self.assertEquals(aggregate.sum_teleL4, 6)
+        self.assertEquals(aggregate.start_pos, 3)
+
+    def test_overwritten_scan_is_retracted(self):
+        self.scan(teleL4=2)
+        self.scan(teleL4=6)
+
+        aggregate = self.aggregate()
+        self.assertEquals(aggregate.match_count, 1)
+        self.assertEquals(aggregate.sum_teleL4, 6)
+
+    def test_quantifier_change_moves_scan(self):
+        self.scan(teleL4=2, startPos=2)
+        self.scan(teleL4=2, startPos=2, quantifier="Prac")
+
+        self.assertEquals(self.aggregate("Quals").match_count, 0)
+        self.assertIsNone(self.aggregate("Quals").first_scan_id)
+        self.assertEquals(self.aggregate("Prac").match_count, 1)
+        self.assertEquals(self.aggregate("Prac").start_pos, 2)
+
+    def test_deleted_scan_is_retracted(self):
+        self.scan(match_number=1, teleL4=2, startPos=3)
+        self.scan(match_number=2, teleL4=4, startPos=1)
+        Team_Match_Data.objects.get(match_number=1).delete()
+
+        aggregate = self.aggregate()
+        self.assertEquals((aggregate.match_count, aggregate.sum_teleL4), (1, 4))
+        # The earliest scan went, the next one's start position is shown
+        self.assertEquals(aggregate.start_pos, 1)
+
+    def test_save_without_load_rebuilds_team(self):
+        self.scan(teleL4=2)
+        scan = Team_Match_Data.objects.get()
+        Team_Match_Data(pk=scan.pk, team_number=2073, event="2025test", match_number=1,
+                        scout_name="Scout A", teleL4=7).save()
+        self.assertEquals((self.aggregate().match_count, self.aggregate().sum_teleL4), (1, 7))
+
+    def test_matches_over_limit_are_ignored(self):
+        self.scan(match_number=100, teleL4=9)
+        self.assertFalse(TeamEventAggregate.objects.exists())
+
+    def test_rebuild_matches_incremental(self):
+        self.scan(match_number=1, teleL1=1, name="Scout A")
+        self.scan(match_number=1, teleL1=3, name="Scout B")
+        self.scan(match_number=1, teleL1=5, name="Scout A")
+        incremental = self.aggregate()
+
+        rebuild_team_aggregates("2025test")
+        rebuilt = self.aggregate()
+        for field in AGGREGATE_FIELDS:
+            self.assertEquals(getattr(rebuilt, f'sum_{field}'), getattr(incremental, f'sum_{field}'))
+        self.assertEquals(rebuilt.match_count, incremental.match_count)
+        self.assertEquals(rebuilt.first_scan_id, incremental.first_scan_id)
+
+
+class TeamPageTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        Team_Match_Data.objects.create(team_number=2073, event="2025test", match_number=1, scout_name="Scout A",
+                                       teleL4=3, auto_path="A,B,processor")
+        Team_Match_Data.objects.create(team_number=2073, event="2025test", match_number=2, scout_name="Scout A")
+        self.url = reverse('team_page', kwargs={'team_number': 2073})
+
+    def test_heatmap_needs_comp_code(self):
+        self.assertContains(self.client.get(self.url, {'comp': "2025test"}), "Auto Path Heatmap")
+        self.assertNotContains(self.client.get(self.url), "Auto Path Heatmap")
+
+    def test_match_rows_leave_out_paths(self):
+        response = self.client.get(self.url, {'comp': "2025test"})
+        rows = response.context['all_team_match_data']
+        self.assertEquals([(row['match_number'], row['has_path']) for row in rows], [(2, False), (1, True)])
+        self.assertNotIn('auto_path', rows[0])
+        self.assertNotContains(response, "A,B,processor")
+
+    def test_cached_page_skips_the_database(self):
+        self.client.get(self.url, {'comp': "2025test"})
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {'comp': "2025test"})
+        self.assertEquals(response.status_code, 200)
+
+    def test_scan_invalidates_page(self):
+        self.client.get(self.url, {'comp': "2025test"})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('scanner_bulk'), json.dumps([{
+                "teamNumber": 2073, "matchNumber": 3, "name": "Scout B", "comp_code": "2025test",
+            }]), content_type="application/json")
+        response = self.client.get(self.url, {'comp': "2025test"})
+        self.assertEquals(len(response.context['all_team_match_data']), 3)
+
+    def test_team_paths(self):
+        response = self.client.get(reverse('team_paths', kwargs={'team_number': 2073}), {'comp': "2025test"})
+        self.assertEquals(response.json(), {'paths': [
+            {'match_number': 1, 'quantifier': "Quals", 'scout_name': "Scout A", 'path': "A,B,processor"},
+        ]})
+
+
+class PathEncodingTests(TestCase):
+
+    def test_round_trip(self):
+        code = encode_path("A, B,processor,sourceB")
+        self.assertEquals(code, bytes([0, 1, 12, 17]))
+        self.assertEquals(decode_path(code), "A,B,processor,sourceB")
+        self.assertEquals(encode_path(["groundA", "L"]), bytes([13, 11]))
+
+    def test_empty_and_unknown_paths(self):
+        self.assertEquals(encode_path([]), b'')
+        self.assertEquals(encode_path(""), b'')
+        self.assertIsNone(encode_path("A,somewhere"))
+
+    def test_save_encodes_path(self):
+        scan = Team_Match_Data.objects.create(team_number=2073, event="2025test", match_number=1,
+                                              scout_name="Scout A", auto_path="C,D")
+        scan = Team_Match_Data.objects.get(pk=scan.pk)
+        self.assertEquals(bytes(scan.auto_path_code), bytes([2, 3]))
+        # The raw path is only kept when it can't be encoded
+        self.assertEquals(scan.auto_path, [])
+        scan.save()
+        self.assertEquals(bytes(Team_Match_Data.objects.get(pk=scan.pk).auto_path_code), bytes([2, 3]))
+
+    def test_unknown_path_keeps_raw(self):
+        scan = Team_Match_Data.objects.create(team_number=2073, event="2025test", match_number=1,
+                                              scout_name="Scout A", auto_path="A,somewhere")
+        scan = Team_Match_Data.objects.get(pk=scan.pk)
+        self.assertIsNone(scan.auto_path_code)
+        self.assertEquals(stored_path(scan.auto_path_code, scan.auto_path), "A,somewhere")
+
+    def test_bulk_scans_encode_path(self):
+        self.client.post(reverse('scanner_bulk'), json.dumps([{
+            "teamNumber": 2073, "matchNumber": 1, "name": "Scout A", "comp_code": "2025test", "autoPath": "E,F",
+        }]), content_type="application/json")
+        scan = Team_Match_Data.objects.get()
+        self.assertEquals((bytes(scan.auto_path_code), scan.auto_path), (bytes([4, 5]), []))
+
+    def test_team_paths_batch(self):
+        for match_number, path in ((1, "A,B"), (2, ""), (3, "A,somewhere")):
+            Team_Match_Data.objects.create(team_number=2073, event="2025test", match_number=match_number,
+                                           scout_name="Scout A", auto_path=path)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('team_paths', kwargs={'team_number': 2073}), {'comp': "2025test"})
+        self.assertEquals([(row['match_number'], row['path']) for row in response.json()['paths']],
+                          [(1, "A,B"), (3, "A,somewhere")])
+
+    def test_team_paths_are_gzipped(self):
+        for match_number in range(1, 13):
+            Team_Match_Data.objects.create(team_number=2073, event="2025test", match_number=match_number,
+                                           scout_name="Scout A", auto_path="A,B,C,processor,groundA")
+        response = self.client.get(reverse('team_paths', kwargs={'team_number': 2073}), {'comp': "2025test"},
+                                   HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEquals(response['Content-Encoding'], "gzip")
+
+    def test_get_path_data_is_one_query(self):
+        for scout_name in ("Scout A", "Scout B"):
+            Team_Match_Data.objects.create(team_number=2073, event="2025test", match_number=1,
+                                           scout_name=scout_name, auto_path="G,H")
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('get_path_data', kwargs={'team_number': 2073}),
+                                       {'comp': "2025test", 'match': 1})
+        self.assertEquals(response.json()['path'], "G,H")
+        self.assertEquals(response.json()['all_scouts'], ["Scout A", "Scout B"])
+
+
+class PathHeatmapTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for team_number, match_number, path in ((2073, 1, "A,B"), (2073, 2, "A"), (254, 1, "sourceA,groundA"),
+                                                (254, 2, "A,somewhere")):
+            Team_Match_Data.objects.create(team_number=team_number, event="2025test", match_number=match_number,
+                                           scout_name="Scout A", auto_path=path)
+
+    def test_grid_counts_each_path_once_per_cell(self):
+        grid = path_heatmap([bytes([0, 1]), bytes([0]), bytes([0, 1, 0])])
+        self.assertEquals(grid.shape, (50, 64))
+        # A (277, 170) is visited by all three paths, B (279, 230) by two
+        self.assertEquals(grid[170 // 8, 277 // 8], 3)
+        self.assertEquals(grid[230 // 8, 279 // 8], 2)
+        self.assertEquals(grid.max(), 3)
+        self.assertEquals(path_heatmap([]).sum(), 0)
+
+    def test_alliance_heatmap(self):
+        response = self.client.get(reverse('path_heatmap'), {'comp': "2025test", 'teams': "2073,254"})
+        data = response.json()
+        self.assertEquals(data['teams'], [254, 2073])
+        self.assertEquals(data['paths'], 3)
+        self.assertEquals(data['grid'][170 // 8][277 // 8], 2)
+
+    def test_png(self):
+        response = self.client.get(reverse('path_heatmap'), {'comp': "2025test", 'teams': "2073", 'format': "png"})
+        self.assertEquals(response['Content-Type'], "image/png")
+        self.assertEquals(response.content[:8], b'\x89PNG\r\n\x1a\n')
+
+    def test_cached_until_new_scan(self):
+        params = {'comp': "2025test", 'teams': "2073"}
+        self.client.get(reverse('path_heatmap'), params)
+        with self.assertNumQueries(0):
+            self.assertEquals(self.client.get(reverse('path_heatmap'), params).json()['paths'], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            Team_Match_Data.objects.create(team_number=2073, event="2025test", match_number=3,
+                                           scout_name="Scout A", auto_path="C")
+        self.assertEquals(self.client.get(reverse('path_heatmap'), params).json()['paths'], 3)
+
+    def test_overwritten_scan_invalidates(self):
+        params = {'comp': "2025test", 'teams': "2073,254"}
+        self.assertEquals(self.client.get(reverse('path_heatmap'), params).json()['grid'][170 // 8][277 // 8], 2)
+        # The same scout rescans match 1 with a path that avoids A
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('scanner_bulk'), json.dumps([{
+                "teamNumber": 2073, "matchNumber": 1, "name": "Scout A", "comp_code": "2025test", "autoPath": "K",
+            }]), content_type="application/json")
+        data = self.client.get(reverse('path_heatmap'), params).json()
+        self.assertEquals(data['paths'], 3)
+        self.assertEquals(data['grid'][170 // 8][277 // 8], 1)
+
+    def test_bad_teams(self):
+        response = self.client.get(reverse('path_heatmap'), {'comp': "2025test", 'teams': "abc"})
+        self.assertEquals(response.status_code, 400)
+
+
+ROSTER = [{"key": "frc254", "team_number": 254, "nickname": "The Cheesy Poofs"},
+          {"key": "frc2073", "team_number": 2073, "nickname": "EagleForce"}]
+
+
+class EventRosterTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch('teams.roster.get_teams_list', return_value=ROSTER)
+        self.get_teams_list = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('teams.roster.aget_teams_list', return_value=ROSTER)
+        self.aget_teams_list = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sync_replaces_roster(self):
+        EventTeam.objects.create(event="2025test", team_number=9999)
+        self.assertEquals(sync_event_roster("2025test"), 2)
+        self.assertEquals(list(EventTeam.objects.filter(event="2025test").values_list('team_number', 'nickname')
+                               .order_by('team_number')), [(254, "The Cheesy Poofs"), (2073, "EagleForce")])
+
+    def test_teams_page_syncs_once(self):
+        Teams.objects.create(team_number=2073, event="2025test", pit_scout_status=True)
+        self.client.get(reverse('teams'), {'comp': "2025test"})
+        self.aget_teams_list.assert_awaited_once_with("2025test")
+        self.aget_teams_list.reset_mock()
+        # Pit scouted teams; the roster is cached
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('teams'), {'comp': "2025test"})
+        self.aget_teams_list.assert_not_called()
+        self.assertEquals(response.context['all_teams'], [254, 2073])
+        self.assertEquals(response.context['pit_scouted'], {2073})
+
+    def test_picklist_uses_roster(self):
+        sync_event_roster("2025test")
+        self.get_teams_list.reset_mock()
+        response = self.client.get(reverse('picklist'), {'comp': "2025test"})
+        self.aget_teams_list.assert_not_called()
+        self.assertEquals(response.context['teams'], [254, 2073])
+
+
+def phone_photo(width=4000, height=3000):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(buffer, format='JPEG')
+    return SimpleUploadedFile("robot.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+
+class RobotPhotoTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        patcher = mock.patch('teams.photos.sleep')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_photo_is_downscaled(self):
+        photo, thumbnail = process_robot_photo(phone_photo())
+        self.assertEquals(Image.open(io.BytesIO(photo)).size, (1280, 960))
+        self.assertEquals(Image.open(io.BytesIO(thumbnail)).size, (320, 240))
+
+    def test_upload_retries_then_replaces_local_urls(self):
+        picture, thumbnail = save_robot_photo("2025test", 2073, phone_photo())
+        self.assertTrue(picture.startswith("/media/robots/2025test_2073_"))
+        Teams.objects.create(team_number=2073, event="2025test", robot_picture=picture, robot_thumbnail=thumbnail)
+        self.assertEquals(pending_robot_photos(), [("2025test", 2073)])
+
+        responses = [ConnectionError("venue wifi"), {'secure_url': "https://cdn/photo.jpg"},
+                     {'secure_url': "https://cdn/thumb.jpg"}]
+        with mock.patch('cloudinary.uploader.upload', side_effect=responses) as upload, \
+                self.assertLogs('teams.photos', 'WARNING'):
+            self.assertTrue(upload_robot_photo("2025test", 2073))
+        self.assertEquals(upload.call_count, 3)
+        team = Teams.objects.get()
+        self.assertEquals((team.robot_picture, team.robot_thumbnail), ("https://cdn/photo.jpg", "https://cdn/thumb.jpg"))
+        self.assertFalse(default_storage.exists(picture[len("/media/"):]))
+        self.assertEquals(pending_robot_photos(), [])
+
+    def test_local_photo_is_served_from_storage(self):
+        picture, _ = save_robot_photo("2025test", 2073, phone_photo())
+        response = self.client.get(picture)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response['Content-Type'], "image/jpeg")
+        self.assertEquals(Image.open(io.BytesIO(b''.join(response.streaming_content))).size, (1280, 960))
+
+    def test_only_stored_photos_are_served(self):
+        default_storage.save("robots/notes.txt", io.BytesIO(b"secret"))
+        for path in ("/media/robots/notes.txt", "/media/robots/missing.jpg", "/media/robots/..%2Fdb.jpg"):
+            self.assertEquals(self.client.get(path).status_code, 404, path)
+
+    def test_lost_local_files_are_cleared(self):
+        picture, thumbnail = save_robot_photo("2025test", 2073, phone_photo())
+        Teams.objects.create(team_number=2073, event="2025test", robot_picture=picture, robot_thumbnail=thumbnail)
+        # A redeploy wiped the instance's disk
+        default_storage.delete(picture[len("/media/"):])
+
+        with mock.patch('cloudinary.uploader.upload') as upload, self.assertLogs('teams.photos', 'WARNING'):
+            self.assertTrue(upload_robot_photo("2025test", 2073))
+        upload.assert_not_called()
+        team = Teams.objects.get()
+        self.assertEquals((team.robot_picture, team.robot_thumbnail), (None, None))
+        self.assertFalse(default_storage.exists(thumbnail[len("/media/"):]))
+        self.assertEquals(pending_robot_photos(), [])
+
+    def test_lost_thumbnail_keeps_photo(self):
+        picture, thumbnail = save_robot_photo("2025test", 2073, phone_photo())
+        Teams.objects.create(team_number=2073, event="2025test", robot_picture=picture, robot_thumbnail=thumbnail)
+        default_storage.delete(thumbnail[len("/media/"):])
+
+        with mock.patch('cloudinary.uploader.upload', return_value={'secure_url': "https://cdn/photo.jpg"}), \
+                self.assertLogs('teams.photos', 'WARNING'):
+            self.assertTrue(upload_robot_photo("2025test", 2073))
+        team = Teams.objects.get()
+        self.assertEquals((team.robot_picture, team.robot_thumbnail), ("https://cdn/photo.jpg", None))
+
+    def test_failed_upload_stays_local(self):
+        picture, thumbnail = save_robot_photo("2025test", 2073, phone_photo())
+        Teams.objects.create(team_number=2073, event="2025test", robot_picture=picture, robot_thumbnail=thumbnail)
+        with mock.patch('cloudinary.uploader.upload', side_effect=ConnectionError("offline")), \
+                self.assertLogs('teams.photos', 'ERROR'):
+            self.assertFalse(upload_robot_photo("2025test", 2073))
+        self.assertEquals(Teams.objects.get().robot_picture, picture)
+        self.assertTrue(default_storage.exists(picture[len("/media/"):]))
+
+
+@skipUnless(connection.vendor == 'postgresql', "query plans are checked on Postgres")
+class QueryPlanTests(TestCase):
+    """The hot read paths must stay on indexes once an event's data is too big to scan"""
+
+    @classmethod
+    def setUpTestData(cls):
+        events = [f"2025e{event}" for event in range(20)]
+        Teams.objects.bulk_create(Teams(event=event, team_number=team, pit_scout_status=team % 2 == 0)
+                                  for event in events for team in range(1, 41))
+        Team_Match_Data.objects.bulk_create(
+            Team_Match_Data(event=event, team_number=team, match_number=match, scout_name="Scout A",
+                            quantifier="Quals" if match <= 10 else "Playoff", auto_path_code=b'\x00\x01')
+            for event in events for team in range(1, 41) for match in range(1, 13)
+        )
+        Human_Player_Match.objects.bulk_create(Human_Player_Match(event=event, team_number=team)
+                                               for event in events for team in range(1, 41))
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        cache.clear()
+
+    def assertNoSequentialScans(self, function):
+        with CaptureQueriesContext(connection) as queries:
+            function()
+        self.assertTrue(queries.captured_queries)
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                cursor.execute(f"EXPLAIN {query['sql']}")
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                self.assertNotIn("Seq Scan", plan, f"{query['sql']}\n{plan}")
+
+    def test_rankings(self):
+        self.assertNoSequentialScans(lambda: EventStats.load("2025e7", 'Quals', registered_only=True))
+
+    def test_dashboard(self):
+        self.assertNoSequentialScans(lambda: EventStats.load("2025e7", 'Quals', team_numbers=[1, 2, 3, 4, 5, 6]))
+
+    def test_team_page(self):
+        self.assertNoSequentialScans(lambda: self.client.get(
+            reverse('team_page', kwargs={'team_number': 12}), {'comp': "2025e7"}))
+
+    def test_paths(self):
+        self.assertNoSequentialScans(lambda: self.client.get(
+            reverse('team_paths', kwargs={'team_number': 12}), {'comp': "2025e7"}))
+        self.assertNoSequentialScans(lambda: self.client.get(
+            reverse('path_heatmap'), {'comp': "2025e7", 'teams': "12,13,14"}))
+
+    def test_pit_scouted_and_human_player_lookups(self):
+        self.assertNoSequentialScans(lambda: list(Teams.objects.filter(event="2025e7", pit_scout_status=True)
+                                                  .values_list('team_number', flat=True)))
+        self.assertNoSequentialScans(lambda: list(Human_Player_Match.objects.filter(event="2025e7", team_number=12)))
+
+
+# Tables as an older db.sqlite3 had them, before later migrations added columns
+OLD_SQLITE_SCHEMA = """
+CREATE TABLE teams_team_match_data (id integer PRIMARY KEY, team_number integer, event varchar(16),
+    match_number integer, quantifier varchar(10), scout_name varchar(32), climb integer, is_broken integer);
+CREATE TABLE strategy_picklist_data (id integer PRIMARY KEY, event varchar(16), first_pick integer[],
+    second_pick integer[], dn_pick integer[], third_pick integer[]);
+CREATE TABLE strategy_match (id integer PRIMARY KEY, event varchar(16), key varchar(32), comp_level varchar(4),
+    set_number integer, match_number integer, quantifier varchar(10), number integer);
+CREATE TABLE strategy_matchalliance (id integer PRIMARY KEY, match_id integer, color varchar(4), station integer,
+    team_number integer);
+"""
+
+# Content type and permission ids deliberately unlike the ones migrate creates
+AUTH_SQLITE_SCHEMA = """
+CREATE TABLE django_content_type (id integer PRIMARY KEY, app_label varchar(100), model varchar(100));
+CREATE TABLE auth_permission (id integer PRIMARY KEY, content_type_id integer, codename varchar(100),
+    name varchar(255));
+CREATE TABLE auth_group (id integer PRIMARY KEY, name varchar(150));
+CREATE TABLE auth_group_permissions (id integer PRIMARY KEY, group_id integer, permission_id integer);
+CREATE TABLE auth_user (id integer PRIMARY KEY, username varchar(150), password varchar(128),
+    date_joined datetime);
+CREATE TABLE auth_user_groups (id integer PRIMARY KEY, user_id integer, group_id integer);
+CREATE TABLE auth_user_user_permissions (id integer PRIMARY KEY, user_id integer, permission_id integer);
+CREATE TABLE django_admin_log (id integer PRIMARY KEY, action_time datetime, object_id text,
+    object_repr varchar(200), action_flag smallint, change_message text, content_type_id integer, user_id integer);
+CREATE TABLE authenticate_authorizeduser (id integer PRIMARY KEY, email varchar(254), created_at datetime);
+INSERT INTO django_content_type VALUES (901, 'teams', 'teams'), (902, 'auth', 'user'), (903, 'gone', 'model');
+INSERT INTO auth_permission VALUES (801, 901, 'change_teams', 'Can change teams'),
+    (802, 902, 'view_user', 'Can view user'), (803, 903, 'do_gone', 'Removed app');
+INSERT INTO auth_group VALUES (3, 'Strategists');
+INSERT INTO auth_group_permissions VALUES (1, 3, 801), (2, 3, 803);
+INSERT INTO auth_user VALUES (5, 'lead', '!', '2024-03-01 12:00:00');
+INSERT INTO auth_user_groups VALUES (1, 5, 3);
+INSERT INTO auth_user_user_permissions VALUES (1, 5, 802);
+INSERT INTO django_admin_log VALUES (1, '2024-03-02 09:00:00', '2073', 'Team 2073', 2, '[]', 901, 5);
+INSERT INTO authenticate_authorizeduser VALUES (1, 'scout@team2073.com', '2024-02-01 08:00:00');
+"""
+
+
+class MigrateSqliteDataTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source = str(Path(directory.name) / "db.sqlite3")
+        self.checkpoint = Path(directory.name) / "checkpoint.json"
+        with sqlite3.connect(self.source) as db:
+            db.executescript(OLD_SQLITE_SCHEMA)
+            db.executemany("INSERT INTO teams_team_match_data VALUES (?, ?, '2024test', ?, 'Quals', 'Scout', 2, 0)",
+                           [(id, 2073, match) for id, match in zip(range(1, 6), range(10, 15))])
+            db.execute("INSERT INTO strategy_picklist_data VALUES (4, '2024test', '[254, 1678]', '[]', '[]', '[]')")
+            db.execute("INSERT INTO strategy_match VALUES (7, '2024test', '2024test_qm1', 'qm', 1, 1, 'Quals', 1)")
+            db.execute("INSERT INTO strategy_matchalliance VALUES (1, 7, 'red', 1, 2073)")
+        db.close()
+
+    def migrate(self, *args):
+        call_command('migrate_sqlite_data', *args, source=self.source, checkpoint=str(self.checkpoint),
+                     chunk_size=2, stdout=io.StringIO())
+
+    def test_copies_every_table_in_chunks(self):
+        self.migrate()
+        self.assertEquals(sorted(Team_Match_Data.objects.values_list('match_number', flat=True)),
+                          [10, 11, 12, 13, 14])
+        self.assertEquals(PickList_Data.objects.get(pk=4).first_pick, [254, 1678])
+        self.assertEquals(MatchAlliance.objects.get().match, Match.objects.get(key="2024test_qm1"))
+        # Columns the old file lacks get defaults, aggregates are rebuilt from the copy
+        self.assertEquals(Team_Match_Data.objects.get(pk=1).teleL4, 0)
+        self.assertEquals(TeamEventAggregate.objects.get(event="2024test").match_count, 5)
+        # Sequences continue after the copied ids
+        self.assertEquals(Team_Match_Data.objects.create(team_number=1, event="2024test", match_number=1).pk, 6)
+
+    def test_groups_and_permissions_survive(self):
+        with sqlite3.connect(self.source) as db:
+            db.executescript(AUTH_SQLITE_SCHEMA)
+        db.close()
+        self.migrate()
+
+        user = User.objects.get(username="lead")
+        self.assertEquals([group.name for group in user.groups.all()], ["Strategists"])
+        self.assertEquals([(permission.content_type.app_label, permission.codename)
+                           for permission in user.user_permissions.all()], [("auth", "view_user")])
+        # The permission of a removed app is left out
+        self.assertEquals([(permission.content_type.model, permission.codename)
+                           for permission in Group.objects.get().permissions.all()], [("teams", "change_teams")])
+        self.assertTrue(user.has_perm("teams.change_teams"))
+        self.assertEquals(LogEntry.objects.get().content_type, ContentType.objects.get_for_model(Teams))
+        # auto_now_add keeps the stored time
+        self.assertEquals(AuthorizedUser.objects.get().created_at.year, 2024)
+
+    def test_resumes_from_checkpoint(self):
+        # Crashed after committing rows 1-4 but before checkpointing 3-4
+        self.checkpoint.write_text(json.dumps({'teams.team_match_data': 2}))
+        with sqlite3.connect(self.source) as db:
+            rows = db.execute("SELECT id, match_number FROM teams_team_match_data WHERE id <= 4").fetchall()
+        db.close()
+        Team_Match_Data.objects.bulk_create(Team_Match_Data(id=id, team_number=2073, event="2024test",
+                                                            match_number=match, scout_name="Scout")
+                                            for id, match in rows)
+
+        self.migrate('teams.team_match_data')
+        self.assertEquals(Team_Match_Data.objects.count(), 5)
+        self.assertEquals(json.loads(self.checkpoint.read_text()), {'teams.team_match_data': True})
+
+        self.migrate('teams.team_match_data')
+        self.assertEquals(Team_Match_Data.objects.count(), 5)
+
+
+class SyntheticEventTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def generate(self, *args):
+        call_command('generate_event', '2025synth', *args, stdout=io.StringIO())
+
+    def test_generates_scouted_event(self):
+        self.generate('--teams', '30', '--matches', '20', '--played', '15')
+        self.assertEquals(EventTeam.objects.filter(event="2025synth").count(), 30)
+        self.assertEquals(Match.objects.filter(event="2025synth").count(), 20)
+        self.assertEquals(Teams.objects.filter(event="2025synth", pit_scout_status=True).count(), 27)
+        # Six scouts per played match, one per robot, each with an encoded auto path
+        self.assertEquals(Team_Match_Data.objects.filter(event="2025synth").count(), 15 * 6)
+        self.assertEquals(Team_Match_Data.objects.filter(match_number=15).values('scout_name').distinct().count(), 6)
+        self.assertFalse(Team_Match_Data.objects.filter(auto_path_code=b'').exists())
+        for match in Match.objects.filter(event="2025synth"):
+            self.assertEquals(len({alliance.team_number for alliance in match.alliances.all()}), 6)
+        self.assertEquals(TeamEventAggregate.objects.filter(event="2025synth").count(), 30)
+        self.assertEquals(Human_Player_Match.objects.filter(event="2025synth").count(), 15 * 2)
+
+    def test_same_seed_same_event(self):
+        def scans():
+            return list(Team_Match_Data.objects.order_by('match_number', 'team_number')
+                        .values_list('team_number', 'match_number', 'teleL4', 'auto_path'))
+
+        self.generate('--teams', '12', '--matches', '6')
+        first = scans()
+        self.generate('--teams', '12', '--matches', '6')
+        self.assertEquals(scans(), first)
+        self.generate('--teams', '12', '--matches', '6', '--seed', '1')
+        self.assertNotEquals(scans(), first)
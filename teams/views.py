@@ -1,91 +1,45 @@
-import os
-
-import cloudinary
-import cloudinary.api
-import cloudinary.uploader
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.shortcuts import render, redirect
+from django.views.decorators.gzip import gzip_page
 
-from api.tba import get_teams_list, get_team_events
+from api.tba import aget_team_events
 from helpers import login_required
+from teams.heatmaps import team_heatmap
 from teams.models import Teams, Team_Match_Data, Human_Player_Match
+from teams.pages import invalidate_team_page, team_page_data
+from teams.paths import stored_path
+from teams.photos import open_local_photo, queue_robot_photo_upload, save_robot_photo
+from teams.roster import afind_event_team_numbers
 from .forms import NewPitScoutingData, NewHumanScoutingData
-from django.db.models import Case, When, Value, IntegerField
-
-cloudinary.config(
-    cloud_name=os.environ.get("CLOUD_NAME"),
-    api_key=os.environ.get("CLOUD_API_KEY"),
-    api_secret=os.environ.get("CLOUD_API_SECRET"),
-    secure=True)
-
 
 def home(request):
     return render(request, 'home.html')
 
 
-def get_events(request):
-    return JsonResponse(get_team_events())
+async def get_events(request):
+    return JsonResponse(await aget_team_events())
 
 
 # @login_required
-def display_teams(request):
+async def display_teams(request):
     comp_code = request.GET.get('comp', "testing")
-    pit_scouted = []
-    for team in Teams.objects.filter(event=comp_code, pit_scout_status=True):
-        pit_scouted.append(team.team_number)
-
-    all_teams = []
-    if comp_code == "testing":
-        for team in Teams.objects.filter(event=comp_code):
-            all_teams.append(team.team_number)
-    else:
-        for team in get_teams_list(comp_code):
-            all_teams.append(team["team_number"])
-    all_teams.sort()
+    pit_scouted = {team async for team in Teams.objects.filter(event=comp_code, pit_scout_status=True)
+                   .values_list('team_number', flat=True)}
+    all_teams = await afind_event_team_numbers(comp_code)
 
-    return render(request, 'teams/view_teams.html', {'all_teams': all_teams, "pit_scouted": pit_scouted})
+    # Templates read request.session, which may query the database
+    return await sync_to_async(render)(request, 'teams/view_teams.html',
+                                       {'all_teams': all_teams, "pit_scouted": pit_scouted})
 
 # @login_required
 def team_page(request, team_number):
     comp_code = request.GET.get('comp')
     if comp_code is not None:
-        team, created = Teams.objects.get_or_create(team_number=team_number, event=comp_code)
-        all_team_match_data = Team_Match_Data.objects.filter(
-            team_number=team_number, 
-            event=comp_code
-        ).annotate(
-            custom_order=Case(
-                When(quantifier='Play Off', then=Value(1)),
-                When(quantifier='Quals', then=Value(2)),
-                When(quantifier='Prac', then=Value(3)),
-                default=Value(4),
-                output_field=IntegerField(),
-            )
-        ).order_by('custom_order', '-match_number')
-        
-        # Debug: Print auto_path data
-        for match in all_team_match_data:
-            print(f"Match {match.match_number} auto_path: {match.auto_path}")
-            print(f"Auto path type: {type(match.auto_path)}")
-        
-        # Extract paths with match numbers for dropdown
-        paths_data = [
-            {
-                'match_number': match.match_number,
-                'quantifier': match.quantifier,
-                'path': match.auto_path
-            }
-            for match in all_team_match_data if match.auto_path
-        ]
-        
-        # Debug: Print paths_data
-        print("Paths data:", paths_data)
-
         context = {
-            'team': team,
-            'all_team_match_data': all_team_match_data,
+            **team_page_data(team_number, comp_code),
             'team_number': team_number,
-            'paths_data': paths_data,
             'comp_code': comp_code
         }
         return render(request, 'teams/team_page.html', context)
@@ -93,6 +47,73 @@ def team_page(request, team_number):
     return render(request, 'teams/team_page.html', {'team_number': team_number})
 
 
+def robot_photo(request, name):
+    """
+    A pit photo waiting for its Cloudinary upload, read through media storage
+    so only files written by teams/photos.py are ever served
+    """
+    photo = open_local_photo(name)
+    if photo is None:
+        raise Http404("No such robot photo")
+    response = FileResponse(photo, content_type='image/jpeg')
+    # Every photo gets a new name, so a cached copy never goes stale
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
+
+
+# @login_required
+@gzip_page
+def team_paths(request, team_number):
+    """
+    Auto paths of every scanned match of a team in one (gzipped) response,
+    loaded by the team page and its replay on demand
+    """
+    comp_code = request.GET.get('comp')
+    if not comp_code:
+        return JsonResponse({'error': 'Competition code required'}, status=400)
+
+    rows = list(Team_Match_Data.objects.filter(
+        team_number=team_number,
+        event=comp_code
+    ).order_by('match_number', 'scout_name').values(
+        'match_number', 'quantifier', 'scout_name', 'auto_path_code', 'auto_path'
+    ))
+
+    paths = []
+    for row in rows:
+        # auto_path is only stored for paths the code can't hold, so it is small to load
+        path = stored_path(row['auto_path_code'], row['auto_path'])
+        if path:
+            paths.append({
+                'match_number': row['match_number'],
+                'quantifier': row['quantifier'],
+                'scout_name': row['scout_name'],
+                'path': path
+            })
+    return JsonResponse({'paths': paths})
+
+
+def path_heatmap(request):
+    """
+    Heatmap of every auto path of one team or an alliance,
+    ?comp=<event>&teams=2073,254[&format=png]. JSON holds the density grid,
+    the PNG is an overlay for the replay field image.
+    """
+    comp_code = request.GET.get('comp')
+    if not comp_code:
+        return JsonResponse({'error': 'Competition code required'}, status=400)
+    try:
+        team_numbers = sorted({int(team) for team in request.GET.get('teams', '').split(',') if team.strip()})
+    except ValueError:
+        return JsonResponse({'error': 'teams must be comma separated team numbers'}, status=400)
+    if not team_numbers:
+        return JsonResponse({'error': 'At least one team required'}, status=400)
+
+    if request.GET.get('format') == 'png':
+        return HttpResponse(team_heatmap(comp_code, team_numbers, image=True), content_type='image/png')
+    return JsonResponse({'teams': team_numbers, **team_heatmap(comp_code, team_numbers)})
+
+
 def pit_scouting(request, team_number):
     comp_code = request.GET.get('comp')
     print(f"Method: {request.method}")  # Check if POST
@@ -118,16 +139,10 @@ def pit_scouting(request, team_number):
                             'message': 'Invalid file type. Only PNG, JPEG, and JPG are allowed.'
                         }, status=400)
 
-                    # Upload to Cloudinary
-                    image_response = cloudinary.uploader.upload(image_file)
-                    img_url = image_response["secure_url"]
-
-                    # Resize image (optional)
-                    image_url_list = img_url.split("upload/")
-                    image_url_list.insert(1, "upload/w_0.4,c_scale/")
-                    img_url = "".join(image_url_list)
+                    # Stored locally now, uploaded to Cloudinary in the background
+                    img_url, thumbnail_url = save_robot_photo(comp_code, team_number, image_file)
                 else:
-                    img_url = None  # No image provided
+                    img_url = thumbnail_url = None  # No image provided
 
                 # Get or create team
                 team, created = Teams.objects.get_or_create(
@@ -162,9 +177,13 @@ def pit_scouting(request, team_number):
                     auto_algae_max=form.cleaned_data.get('auto_algae_max'),
                     auto_coral_max=form.cleaned_data.get('auto_coral_max'),
                     robot_picture=img_url,  # Save the image URL
+                    robot_thumbnail=thumbnail_url,
                     additional_info=form.cleaned_data.get('additional_info'),
                     pit_scout_status=True
                 )
+                invalidate_team_page(comp_code, [team_number])
+                if img_url:
+                    transaction.on_commit(lambda: queue_robot_photo_upload(comp_code, team_number))
                 print(f"Update result: {update_result}")  # Check if update was successful
                 print(f"Cleaned data: {form.cleaned_data}")  # Print the form data
 
@@ -210,6 +229,6 @@ def get_path_data(request, team_number):
             match_number=match_number
         )
         
-        return HttpResponse(match_data.auto_path, content_type='text/plain')
+        return HttpResponse(stored_path(match_data.auto_path_code, match_data.auto_path), content_type='text/plain')
     except Team_Match_Data.DoesNotExist:
         return HttpResponse('Match data not found', status=404)
\ No newline at end of file